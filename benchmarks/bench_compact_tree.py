@@ -0,0 +1,63 @@
+"""Microbenchmark: retained memory of DocumentTree vs CompactTree.
+
+Parses a large, deeply nested Markdown document both ways and reports
+the tracemalloc size of each result and the peak during parsing.
+
+Usage:
+    python benchmarks/bench_compact_tree.py [--size-mb N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from doc2anki.parser import build_compact_tree, build_document_tree
+
+
+def make_document(size_bytes: int) -> str:
+    sections = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        level = 1 + i % 6
+        section = (
+            f"{'#' * level} Section title number {i % 50}\n\n"
+            f"Short paragraph {i}.\n"
+        )
+        sections.append(section)
+        total += len(section)
+        i += 1
+    return "\n".join(sections)
+
+
+def measure(label: str, build, doc: str):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(doc)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} {elapsed:>7.2f} s  retained {retained / 1024 / 1024:>7.1f} MB  "
+        f"peak {peak / 1024 / 1024:>7.1f} MB"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0, help="document size in MB")
+    args = parser.parse_args()
+
+    doc = make_document(int(args.size_mb * 1024 * 1024))
+    tree = measure("tree", lambda d: build_document_tree(d, format="markdown"), doc)
+    del tree
+    compact = measure("compact", lambda d: build_compact_tree(d, format="markdown"), doc)
+    print(f"document: {args.size_mb:.1f} MB, {len(compact):,} nodes, {len(compact.titles)} titles")
+
+
+if __name__ == "__main__":
+    main()
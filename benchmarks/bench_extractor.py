@@ -0,0 +1,85 @@
+"""Microbenchmark: response decoding, legacy path vs single-pass extractor.
+
+Legacy path: json.loads on the whole text, DOTALL code-block regex, brace
+slicing, then CardOutput.model_validate on the resulting dict.
+New path: iter_json_spans + TypeAdapter(CardOutput).validate_json.
+
+Usage:
+    python benchmarks/bench_extractor.py [--cards N] [--repeat N]
+"""
+
+import argparse
+import json
+import re
+import timeit
+
+from doc2anki.llm.extractor import parse_card_output
+from doc2anki.models import CardOutput
+
+
+def legacy_extract_json(text: str):
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    for match in re.findall(r"```(?:json)?\s*\n?(.*?)\n?```", text, re.DOTALL):
+        try:
+            return json.loads(match.strip())
+        except json.JSONDecodeError:
+            continue
+    first_brace = text.find("{")
+    last_brace = text.rfind("}")
+    if first_brace != -1 and last_brace > first_brace:
+        return json.loads(text[first_brace : last_brace + 1])
+    raise ValueError("no json")
+
+
+def legacy_parse(text: str) -> CardOutput:
+    return CardOutput.model_validate(legacy_extract_json(text))
+
+
+def make_response(num_cards: int) -> str:
+    style = "<style>.card{font-family:monospace;color:#c0caf5;background:#1a1b26}</style>"
+    cards = []
+    for i in range(num_cards):
+        cards.append(
+            {
+                "type": "basic",
+                "front": f"{style}<div class=\"q\">Question {i}: what does {{x}} mean?</div>",
+                "back": f"{style}<div class=\"a\">" + "Answer text. " * 60 + "</div>",
+                "tags": ["bench", f"t{i}"],
+            }
+        )
+    return json.dumps({"cards": cards}, ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=20, help="cards per response")
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per case")
+    args = parser.parse_args()
+
+    payload = make_response(args.cards)
+    cases = {
+        "pure": payload,
+        "fenced": f"Sure! Here are the cards:\n```json\n{payload}\n```\nLet me know.",
+        "prose": f"Cards follow {payload} -- end of output",
+        # Stray braces defeat the outermost slice and force the structural scan
+        "scan": f"Use {{x}} below:\n```json\n{payload}\n```\n(see {{y}})",
+    }
+
+    print(f"response size: {len(payload):,} chars, {args.cards} cards, {args.repeat} runs")
+    print(f"{'case':<8} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, text in cases.items():
+        assert legacy_parse(text) == parse_card_output(text)
+        legacy = timeit.timeit(lambda: legacy_parse(text), number=args.repeat)
+        new = timeit.timeit(lambda: parse_card_output(text), number=args.repeat)
+        print(
+            f"{name:<8} {legacy / args.repeat * 1000:>10.3f} "
+            f"{new / args.repeat * 1000:>10.3f} {legacy / new:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Microbenchmark: full re-parse vs incremental re-parse after a small edit.
+
+Builds a large Markdown document, edits one paragraph in the middle, and
+times MarkdownParser.parse against MarkdownParser.parse_incremental with
+the previous result.
+
+Usage:
+    python benchmarks/bench_incremental.py [--size-mb N] [--repeat N]
+"""
+
+import argparse
+import time
+
+from doc2anki.parser import MarkdownParser
+
+
+def make_document(size_bytes: int) -> str:
+    sections = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        level = 1 + i % 3
+        section = (
+            f"{'#' * level} Section {i}\n\n"
+            f"Paragraph {i} explains a topic in a few sentences of plain prose. "
+            "It has enough words to look like a real note in a knowledge base.\n\n"
+            f"- point {i}.a\n- point {i}.b\n\n"
+            "```python\nprint('example')\n```\n"
+        )
+        sections.append(section)
+        total += len(section)
+        i += 1
+    return "---\ntitle: Bench\n---\n" + "\n".join(sections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0, help="document size in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="edits to time")
+    args = parser.parse_args()
+
+    md = MarkdownParser()
+    doc = make_document(int(args.size_mb * 1024 * 1024))
+    state = md.parse_incremental(doc)
+
+    full_total = incremental_total = 0.0
+    for n in range(args.repeat):
+        # Edit one paragraph near the middle
+        marker = f"Paragraph {len(doc) // 600 + n} explains"
+        doc = doc.replace(marker, marker + " (edited)", 1)
+
+        start = time.perf_counter()
+        full = md.parse(doc)
+        full_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        state = md.parse_incremental(doc, state)
+        incremental_total += time.perf_counter() - start
+
+        assert state.document == full
+
+    nodes = state.reused_nodes + state.rebuilt_nodes
+    print(f"document: {len(doc) / 1024 / 1024:.1f} MB, {nodes:,} heading nodes")
+    print(f"last edit: {state.rebuilt_nodes} rebuilt, {state.reused_nodes:,} reused")
+    print(f"{'full':<12} {full_total / args.repeat * 1000:>9.1f} ms/edit")
+    print(f"{'incremental':<12} {incremental_total / args.repeat * 1000:>9.1f} ms/edit")
+    print(f"speedup      {full_total / incremental_total:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Microbenchmark: text vs memory-mapped Markdown file ingestion.
+
+Writes a large Markdown file and parses it in a fresh subprocess per mode,
+reporting wall time and peak RSS (ru_maxrss):
+
+- text: the previous path (read_text, split/join frontmatter, encode the
+  body once for tree-sitter and again for span extraction)
+- mmap: MarkdownParser.parse(path), which maps the file and decodes only
+  the emitted spans
+
+Both modes build a CompactTree, so the result itself stays small next to
+the input. Mapped file pages count toward RSS while they are resident.
+
+Usage:
+    python benchmarks/bench_mmap_ingest.py [--size-mb N]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RUN = """
+import resource, sys, time
+from pathlib import Path
+from doc2anki.parser import CompactTreeBuilder, MarkdownParser
+
+path, mode = Path(sys.argv[1]), sys.argv[2]
+parser = MarkdownParser()
+start = time.perf_counter()
+if mode == "mmap":
+    tree = parser.parse_compact(path)
+else:
+    content = path.read_text(encoding="utf-8")
+    metadata, body = parser._extract_frontmatter(content)
+    ts_tree = parser._parser.parse(body.encode("utf-8"))
+    tree = parser._build_tree(
+        ts_tree.root_node, body.encode("utf-8"), metadata, CompactTreeBuilder()
+    )
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{elapsed:.2f} {rss:.0f} {len(tree)}")
+"""
+
+
+def write_document(path: Path, size_bytes: int) -> None:
+    total = 0
+    i = 0
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("---\ntitle: Bench\ntags: [a, b]\n---\n")
+        while total < size_bytes:
+            section = (
+                f"{'#' * (1 + i % 3)} Section {i}\n\n"
+                f"Paragraph {i} explains a topic in a few sentences of plain prose. "
+                "It has enough words to look like a real note in a knowledge base.\n\n"
+                f"- point {i}.a\n- point {i}.b\n\n"
+            )
+            handle.write(section)
+            total += len(section)
+            i += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=100.0, help="document size in MB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large.md"
+        write_document(path, int(args.size_mb * 1024 * 1024))
+        print(f"document: {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        nodes = set()
+        for mode in ("text", "mmap"):
+            output = subprocess.run(
+                [sys.executable, "-c", RUN, str(path), mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            elapsed, rss, count = float(output[0]), float(output[1]), int(output[2])
+            nodes.add(count)
+            print(f"{mode:<6} {elapsed:>7.2f} s  peak RSS {rss:>8.0f} MB")
+        assert len(nodes) == 1, "modes disagree"
+
+
+if __name__ == "__main__":
+    main()
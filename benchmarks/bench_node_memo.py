@@ -0,0 +1,60 @@
+"""Microbenchmark: full_content and token counts on every node of a tree.
+
+Asks each node of a synthetic tree for full_content and its own/subtree
+token counts twice, as the interactive summary and the pipeline do. The
+first pass fills the memo; the second is served from it. The uncached
+recursive full_content is timed for comparison.
+
+Usage:
+    python benchmarks/bench_node_memo.py [--nodes N]
+"""
+
+import argparse
+import time
+
+from doc2anki.parser import TreeBuilder, count_tokens
+
+
+def build(nodes: int):
+    builder = TreeBuilder()
+    for i in range(nodes):
+        # One top-level heading holding everything, then levels 2..6
+        builder.add_heading(1 if i == 0 else 2 + i % 5, f"Section {i}")
+        builder.add_content(f"Paragraph {i} with a few words of body text in it.")
+    return builder.build()
+
+
+def uncached_full_content(node) -> str:
+    parts = [f"{'#' * node.level} {node.title}"]
+    if node.content.strip():
+        parts.append(node.content.strip())
+    parts.extend(uncached_full_content(child) for child in node.children)
+    return "\n\n".join(parts)
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20_000, help="nodes in the tree")
+    args = parser.parse_args()
+
+    count_tokens("warm up")
+    tree = build(args.nodes)
+    nodes = list(tree.iter_all_nodes())
+    print(f"tree: {len(nodes):,} nodes")
+
+    timed("full_content, uncached", lambda: [uncached_full_content(n) for n in nodes])
+    timed("full_content, first pass", lambda: [n.full_content for n in nodes])
+    timed("full_content, memoised", lambda: [n.full_content for n in nodes])
+    timed("count_tokens(own_text) x2", lambda: [count_tokens(n.own_text) for n in nodes * 2])
+    timed("own_tokens x2", lambda: [n.own_tokens for n in nodes * 2])
+    timed("subtree_tokens x2", lambda: [n.subtree_tokens for n in nodes * 2])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Microbenchmark: native Org scanner vs the orgparse-based parser.
+
+Writes a large Org file and parses it from disk with OrgParser and the
+OrgparseParser test oracle (needs the dev dependencies), checking that both produce the same DocumentTree.
+
+Usage:
+    python benchmarks/bench_org_parser.py [--size-mb N] [--repeat N]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from doc2anki.parser.orgmode import OrgParser
+
+# The orgparse reference parser is test code (orgparse is a dev dependency)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.orgparse_reference import OrgparseParser  # noqa: E402
+
+
+def make_document(size_bytes: int) -> str:
+    parts = ["#+TITLE: Bench\n#+FILETAGS: :bench:\n\nIntro paragraph.\n"]
+    total = 0
+    i = 0
+    while total < size_bytes:
+        level = 1 + i % 3
+        section = (
+            f"{'*' * level} TODO [#B] Section {i} :tag:\n"
+            "SCHEDULED: <2024-01-02 Tue>\n"
+            f":PROPERTIES:\n:ID: node-{i}\n:END:\n"
+            f"Paragraph {i} explains a topic with a [[https://example.org][link]] "
+            "and enough words to look like a real note.\n\n"
+            f"- point {i}.a\n- point {i}.b\n\n"
+            "#+BEGIN_SRC python\nprint('example')\n#+END_SRC\n"
+        )
+        parts.append(section)
+        total += len(section)
+        i += 1
+    return "".join(parts)
+
+
+def best_time(parse, path: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0, help="document size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per parser (best is kept)")
+    args = parser.parse_args()
+
+    native, reference = OrgParser(), OrgparseParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large.org"
+        path.write_text(make_document(int(args.size_mb * 1024 * 1024)), encoding="utf-8")
+        assert native.parse(path) == reference.parse(path)
+
+        native_time = best_time(native.parse, path, args.repeat)
+        reference_time = best_time(reference.parse, path, args.repeat)
+
+    print(f"document: {args.size_mb:.1f} MB")
+    print(f"{'orgparse':<10} {reference_time * 1000:>9.1f} ms")
+    print(f"{'native':<10} {native_time * 1000:>9.1f} ms")
+    print(f"speedup    {reference_time / native_time:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
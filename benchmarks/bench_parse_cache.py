@@ -0,0 +1,58 @@
+"""Microbenchmark: parse_files with a cold vs warm on-disk parse cache.
+
+Writes a directory of small notes, parses and chunks them once to fill a
+temporary ParseCache, then again with every entry cached.
+
+Usage:
+    python benchmarks/bench_parse_cache.py [--files N]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from doc2anki.pipeline import ParseCache, parse_files
+
+
+def make_note(i: int) -> str:
+    sections = "".join(
+        f"## Part {j}\n\nParagraph {j} of note {i}, long enough to look real.\n\n"
+        f"- point {j}.a\n- point {j}.b\n\n"
+        for j in range(8)
+    )
+    return f"---\ntitle: Note {i}\n---\n# Note {i}\n\nIntro.\n\n{sections}"
+
+
+def timed(files: list[Path], cache: ParseCache) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = list(parse_files(files, max_tokens=500, cache=cache))
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="number of notes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        files = []
+        for i in range(args.files):
+            path = root / f"note{i}.md"
+            path.write_text(make_note(i), encoding="utf-8")
+            files.append(path)
+        cache = ParseCache(root / "cache")
+
+        cold_time, cold = timed(files, cache)
+        warm_time, warm = timed(files, cache)
+        assert [r.chunks for r in warm] == [r.chunks for r in cold]
+
+    print(f"files: {args.files}")
+    print(f"{'cold':<6} {cold_time * 1000:>9.1f} ms")
+    print(f"{'warm':<6} {warm_time * 1000:>9.1f} ms  ({warm_time / args.files * 1e6:.0f} us/file)")
+    print(f"speedup {cold_time / warm_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Microbenchmark: parsing many small notes with and without the parser pool.
+
+Uncached: a new MarkdownParser (tree-sitter Language + Parser) per note, as
+build_document_tree did before the per-thread registry.
+Cached: parser.pool.get_parser() reuses one parser per thread.
+
+Usage:
+    python benchmarks/bench_parser_pool.py [--notes N] [--format markdown|org]
+"""
+
+import argparse
+import time
+
+import tree_sitter_markdown
+from tree_sitter import Language, Parser
+
+from doc2anki.parser import MarkdownParser, OrgParser, get_parser
+
+
+class UncachedMarkdownParser(MarkdownParser):
+    """MarkdownParser that builds its own Language, as before the pool."""
+
+    def __init__(self):
+        self._language = Language(tree_sitter_markdown.language())
+        self._parser = Parser(self._language)
+
+
+def make_note(i: int, format: str) -> str:
+    if format == "org":
+        return (
+            f"#+TITLE: Note {i}\n\n* Note {i}\nA short note about topic {i}.\n"
+            f"** Detail\n- point one\n- point two\n"
+        )
+    return (
+        f"---\ntitle: Note {i}\n---\n\n# Note {i}\n\nA short note about topic {i}.\n\n"
+        f"## Detail\n\n- point one\n- point two\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=10_000, help="number of notes")
+    parser.add_argument("--format", choices=("markdown", "org"), default="markdown")
+    args = parser.parse_args()
+
+    notes = [make_note(i, args.format) for i in range(args.notes)]
+    factory = UncachedMarkdownParser if args.format == "markdown" else OrgParser
+
+    start = time.perf_counter()
+    for note in notes:
+        factory().parse(note)
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for note in notes:
+        get_parser(args.format).parse(note)
+    cached = time.perf_counter() - start
+
+    print(f"{args.notes:,} {args.format} notes")
+    print(f"{'uncached':<10} {uncached:>8.3f}s {uncached / args.notes * 1e6:>8.1f} us/note")
+    print(f"{'cached':<10} {cached:>8.3f}s {cached / args.notes * 1e6:>8.1f} us/note")
+    print(f"speedup    {uncached / cached:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
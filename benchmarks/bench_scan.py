@@ -0,0 +1,78 @@
+"""Microbenchmark: `scan` statistics vs a serial dry run with per-chunk output.
+
+Writes a directory of notes and compares:
+
+- dry run: parse_files(jobs=1) and, per chunk, a token count and a preview
+  line (what `generate --dry-run --verbose` does)
+- scan: scan_files with --jobs workers, numbers only
+
+Usage:
+    python benchmarks/bench_scan.py [--files N] [--jobs N]
+"""
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+from doc2anki.parser import count_tokens
+from doc2anki.pipeline import parse_files, scan_files
+
+
+def make_note(i: int) -> str:
+    sections = "".join(
+        f"## Part {j}\n\nParagraph {j} of note {i}, long enough to look like a real note.\n\n"
+        f"- point {j}.a\n- point {j}.b\n\n"
+        for j in range(12)
+    )
+    return f"---\ntitle: Note {i}\ntags: [bench]\n---\n# Note {i}\n\nIntro.\n\n{sections}"
+
+
+def dry_run(files: list[Path], max_tokens: int) -> int:
+    console = Console(file=io.StringIO(), width=120)
+    chunks = 0
+    for parsed in parse_files(files, max_tokens=max_tokens, jobs=1):
+        for i, ctx in enumerate(parsed.chunks):
+            tokens = count_tokens(ctx.chunk_content)
+            content = ctx.chunk_content.replace("\n", " ")
+            console.print(f"  [{i + 1}] {' > '.join(ctx.parent_chain)} (tokens: {tokens})")
+            console.print(f"      {content[:40]}...{content[-30:]}")
+        chunks += len(parsed.chunks)
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="number of notes")
+    parser.add_argument("--jobs", type=int, default=0, help="scan workers (0 = one per CPU)")
+    parser.add_argument("--max-tokens", type=int, default=200, help="chunk size")
+    args = parser.parse_args()
+
+    count_tokens("warm up")
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(args.files):
+            path = Path(tmp) / f"note{i}.md"
+            path.write_text(make_note(i), encoding="utf-8")
+            files.append(path)
+
+        start = time.perf_counter()
+        dry_chunks = dry_run(files, args.max_tokens)
+        dry_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scan_chunks = sum(s.chunks for s in scan_files(files, args.max_tokens, args.jobs))
+        scan_time = time.perf_counter() - start
+
+    assert dry_chunks == scan_chunks
+    print(f"files: {args.files}, chunks: {scan_chunks:,}")
+    print(f"{'dry run':<8} {dry_time:>7.2f} s")
+    print(f"{'scan':<8} {scan_time:>7.2f} s")
+    print(f"speedup  {dry_time / scan_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Microbenchmark: bounded-prefix format sniffing vs whole-document regex scans.
+
+Builds a large Markdown document and compares the previous detection (two
+re.findall passes over all of it) with sniff_format.
+
+Usage:
+    python benchmarks/bench_sniff.py [--size-mb N] [--repeat N]
+"""
+
+import argparse
+import re
+import time
+
+from doc2anki.parser import sniff_format
+
+
+def make_document(size_bytes: int) -> str:
+    parts = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        section = (
+            f"{'#' * (1 + i % 3)} Section {i}\n\n"
+            f"Paragraph {i} with enough words to look like a real note.\n\n"
+            f"- bullet {i}\n- another bullet\n\n"
+        )
+        parts.append(section)
+        total += len(section)
+        i += 1
+    return "".join(parts)
+
+
+def full_scan(content: str) -> str:
+    md_headings = len(re.findall(r"^#{1,6}\s+.+$", content, re.MULTILINE))
+    org_headings = len(re.findall(r"^\*+\s+.+$", content, re.MULTILINE))
+    return "org" if org_headings > md_headings else "markdown"
+
+
+def best_time(detect, content: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        detect(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0, help="document size in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per method (best is kept)")
+    args = parser.parse_args()
+
+    content = make_document(int(args.size_mb * 1024 * 1024))
+    assert full_scan(content) == sniff_format(content) == "markdown"
+
+    full_time = best_time(full_scan, content, args.repeat)
+    sniff_time = best_time(sniff_format, content, args.repeat)
+
+    print(f"document: {args.size_mb:.1f} MB")
+    print(f"{'full scan':<10} {full_time * 1000:>9.2f} ms")
+    print(f"{'sniff':<10} {sniff_time * 1000:>9.2f} ms")
+    print(f"speedup    {full_time / sniff_time:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Microbenchmark: peak memory of tree chunking vs streaming chunking.
+
+Writes a large Markdown file, then chunks it with process_pipeline on a
+full DocumentTree and with stream_file_chunks, reporting time and the
+tracemalloc peak of each.
+
+Usage:
+    python benchmarks/bench_stream.py [--size-mb N] [--max-tokens N]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from doc2anki.parser import build_document_tree, count_tokens
+from doc2anki.pipeline import process_pipeline, stream_file_chunks
+
+
+def write_document(path: Path, size_bytes: int) -> None:
+    total = 0
+    i = 0
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("---\ntitle: Bench\n---\n")
+        while total < size_bytes:
+            level = 1 + i % 3
+            section = (
+                f"{'#' * level} Section {i}\n\n"
+                f"Paragraph {i} explains a topic in a few sentences of plain prose. "
+                "It has enough words to look like a real note in a knowledge base.\n\n"
+                f"- point {i}.a\n- point {i}.b\n\n"
+                "```python\nprint('example')\n```\n\n"
+            )
+            handle.write(section)
+            total += len(section)
+            i += 1
+
+
+def measure(label: str, run) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {elapsed:>8.2f} s  peak {peak / 1024 / 1024:>8.1f} MB  {chunks:,} chunks")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0, help="document size in MB")
+    parser.add_argument("--max-tokens", type=int, default=3000, help="tokens per chunk")
+    args = parser.parse_args()
+
+    count_tokens("warm up")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large.md"
+        write_document(path, int(args.size_mb * 1024 * 1024))
+        print(f"document: {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        # Count chunks without keeping them, as a streaming consumer would
+        measure(
+            "tree",
+            lambda: sum(
+                1 for _ in process_pipeline(build_document_tree(path), max_tokens=args.max_tokens)
+            ),
+        )
+        measure(
+            "stream",
+            lambda: sum(1 for _ in stream_file_chunks(path, max_tokens=args.max_tokens)[1]),
+        )
+
+
+if __name__ == "__main__":
+    main()
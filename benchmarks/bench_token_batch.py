@@ -0,0 +1,81 @@
+"""Microbenchmark: batched, multi-threaded token counting on a large vault.
+
+Builds the blocks of a synthetic vault (every section of every note, as
+flatten_tree produces them) and counts their tokens:
+
+- serial: one encode() per block, as count_tokens used to
+- encode_ordinary_batch: tiktoken's batch API (keeps every token list)
+- count_tokens_batch: cold cache, with 1 thread and with --threads
+
+Peak Python memory is measured with tracemalloc, which sees the token
+lists tiktoken returns. Threads only help with more than one CPU.
+
+Usage:
+    python benchmarks/bench_token_batch.py [--files N] [--threads N]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from doc2anki.parser import build_document_tree, clear_token_cache, count_tokens_batch
+from doc2anki.parser.chunker import _get_encoder
+
+
+def make_note(i: int) -> str:
+    sections = "".join(
+        f"## Part {j}\n\nParagraph {j} of note {i}, long enough to look like a real note. "
+        f"It mentions value {i * j} and term{i % 97} so blocks differ.\n\n"
+        f"- point {j}.a\n- point {j}.b\n\n"
+        for j in range(20)
+    )
+    return f"# Note {i}\n\nIntro {i}.\n\n{sections}"
+
+
+def measure(label: str, count) -> None:
+    # Timed and traced separately: tracing slows allocation-heavy code down
+    clear_token_cache()
+    start = time.perf_counter()
+    total = count()
+    elapsed = time.perf_counter() - start
+    clear_token_cache()
+    tracemalloc.start()
+    count()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB  ({total:,} tokens)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=min(8, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    texts = [
+        node.own_text
+        for i in range(args.files)
+        for node in build_document_tree(make_note(i), format="markdown").iter_all_nodes()
+    ]
+    encoder = _get_encoder()
+    encoder.encode("warm up")
+    print(
+        f"{args.files} notes, {len(texts):,} blocks, {sum(map(len, texts)) / 1e6:.1f} MB, "
+        f"{os.cpu_count()} CPU(s)"
+    )
+
+    measure("serial encode", lambda: sum(len(encoder.encode(t)) for t in texts))
+    measure(
+        f"encode_ordinary_batch ({args.threads})",
+        lambda: sum(map(len, encoder.encode_ordinary_batch(texts, num_threads=args.threads))),
+    )
+    for threads in sorted({1, args.threads}):
+        measure(
+            f"count_tokens_batch ({threads})",
+            lambda: sum(count_tokens_batch(texts, threads=threads)),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Microbenchmark: shared token-count cache vs re-tokenizing at each call site.
+
+A verbose dry run with compression counts every chunk several times: the
+greedy chunker sums node counts, compression stats count the chunk before
+and after, and the verbose listing counts it again. This replays those
+counts over the chunks of a synthetic vault, with and without the cache,
+and reports the overhead of the digest on the first (all-miss) pass.
+
+Usage:
+    python benchmarks/bench_token_cache.py [--files N] [--passes N]
+"""
+
+import argparse
+import time
+
+from doc2anki.parser import build_document_tree, clear_token_cache, count_tokens, token_cache_info
+from doc2anki.parser.chunker import _get_encoder
+from doc2anki.pipeline import process_pipeline
+
+
+def make_note(i: int) -> str:
+    sections = "".join(
+        f"## Part {j}\n\nParagraph {j} of note {i}, long enough to look like a real note.\n\n"
+        f"- point {j}.a\n- point {j}.b\n\n"
+        for j in range(12)
+    )
+    return f"# Note {i}\n\nIntro.\n\n{sections}"
+
+
+def uncached(text: str) -> int:
+    return len(_get_encoder().encode(text))
+
+
+def replay(texts: list[str], passes: int, count) -> float:
+    start = time.perf_counter()
+    for _ in range(passes):
+        for text in texts:
+            count(text)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--passes", type=int, default=4)
+    args = parser.parse_args()
+
+    texts = []
+    for i in range(args.files):
+        tree = build_document_tree(make_note(i), format="markdown")
+        texts.extend(chunk.chunk_content for chunk in process_pipeline(tree, max_tokens=200))
+    uncached("warm up")
+    print(f"{len(texts)} chunks, {sum(map(len, texts)) / 1e6:.1f} MB, {args.passes} passes")
+
+    plain = replay(texts, args.passes, uncached)
+    clear_token_cache()
+    first = replay(texts, 1, count_tokens)
+    rest = replay(texts, args.passes - 1, count_tokens)
+    info = token_cache_info()
+
+    print(f"uncached:        {plain * 1000:8.1f} ms")
+    print(f"cached:          {(first + rest) * 1000:8.1f} ms  ({plain / (first + rest):.1f}x)")
+    print(f"  first pass:    {first * 1000:8.1f} ms  (uncached: {plain / args.passes * 1000:.1f} ms)")
+    print(f"  hit rate:      {info.hit_rate:8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Microbenchmark: structural tree diff on large documents.
+
+Builds two versions of a large Markdown document that differ in a few
+sections (one edit, one insertion, one deletion, one moved subtree) and
+times diff_trees at several sizes, to show it grows linearly.
+
+Usage:
+    python benchmarks/bench_tree_diff.py [--sections N ...]
+"""
+
+import argparse
+import time
+
+from doc2anki.parser import build_document_tree, diff_trees
+
+
+def make_sections(count: int) -> list[str]:
+    return [
+        f"# Chapter {i}\n\nIntro {i}.\n\n"
+        f"## Part {i}.1\n\nBody {i}.1 with a few words.\n\n"
+        f"### Detail {i}.1.1\n\nMore {i}.\n\n"
+        f"## Part {i}.2\n\nBody {i}.2.\n\n"
+        for i in range(count)
+    ]
+
+
+def edited(sections: list[str]) -> list[str]:
+    new = list(sections)
+    middle = len(new) // 2
+    new[middle] = new[middle].replace("Intro", "Changed intro")
+    new.insert(middle + 1, "# Inserted\n\nNew text.\n\n")
+    del new[1]
+    # Move chapter 2's first part under the last chapter
+    moved = "## Part 2.1\n\nBody 2.1 with a few words.\n\n### Detail 2.1.1\n\nMore 2.\n\n"
+    new[1] = new[1].replace(moved, "")
+    new[-1] += moved
+    return new
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sections", type=int, nargs="+", default=[1000, 4000, 16000],
+        help="top-level sections per document",
+    )
+    args = parser.parse_args()
+
+    print(f"{'sections':>9} {'nodes':>7} {'diff ms':>9} {'changes':>8}")
+    for count in args.sections:
+        sections = make_sections(count)
+        old = build_document_tree("".join(sections))
+        new = build_document_tree("".join(edited(sections)))
+
+        start = time.perf_counter()
+        diff = diff_trees(old, new)
+        elapsed = time.perf_counter() - start
+
+        nodes = sum(1 for _ in old.iter_all_nodes())
+        print(f"{count:>9} {nodes:>7} {elapsed * 1000:>9.1f} {len(diff.changes):>8}")
+
+
+if __name__ == "__main__":
+    main()
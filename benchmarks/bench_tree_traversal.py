@@ -0,0 +1,80 @@
+"""Microbenchmark: tree construction and traversal on 100k-node trees.
+
+Builds synthetic trees through TreeBuilder (freeze) and times
+iter_descendants, get_nodes_at_level, full_content and flatten_tree: a
+wide tree of 100k nodes under one top-level heading, and a single chain
+deeper than the recursion limit. The recursive implementations these
+replaced are included for comparison; on the deep chain they fail with
+RecursionError. (parent_titles makes a chain quadratic in memory, so it
+is kept much smaller.)
+
+Usage:
+    python benchmarks/bench_tree_traversal.py [--nodes N] [--depth N]
+"""
+
+import argparse
+import time
+
+from doc2anki.parser import TreeBuilder
+from doc2anki.pipeline.processor import flatten_tree
+
+
+def build(nodes: int, shape: str):
+    builder = TreeBuilder(source_format="org")
+    for i in range(nodes):
+        # wide: one root, then levels cycling 2..6; deep: one chain
+        level = (1 if i == 0 else 2 + i % 5) if shape == "wide" else i + 1
+        builder.add_heading(level, f"Section {i}")
+        builder.add_content(f"Body {i}.")
+    return builder.build()
+
+
+def recursive_descendants(node):
+    for child in node.children:
+        yield child
+        yield from recursive_descendants(child)
+
+
+def recursive_full_content(node):
+    parts = [f"{'#' * node.level} {node.title}"]
+    if node.content.strip():
+        parts.append(node.content.strip())
+    for child in node.children:
+        parts.append(recursive_full_content(child))
+    return "\n\n".join(parts)
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    try:
+        fn()
+    except RecursionError:
+        print(f"  {label:<28} RecursionError")
+        return
+    print(f"  {label:<28} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100_000, help="nodes in the wide tree")
+    parser.add_argument("--depth", type=int, default=3_000, help="length of the deep chain")
+    args = parser.parse_args()
+
+    for shape, nodes in (("wide", args.nodes), ("deep", args.depth)):
+        print(f"{shape} tree, {nodes:,} nodes")
+        start = time.perf_counter()
+        tree = build(nodes, shape)
+        print(f"  {'build + freeze':<28} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        top = tree.children[0]
+
+        timed("iter_all_nodes", lambda: sum(1 for _ in tree.iter_all_nodes()))
+        timed("iter_descendants", lambda: sum(1 for _ in top.iter_descendants()))
+        timed("  recursive", lambda: sum(1 for _ in recursive_descendants(top)))
+        timed("get_nodes_at_level(3)", lambda: tree.get_nodes_at_level(3))
+        timed("full_content", lambda: top.full_content)
+        timed("  recursive", lambda: recursive_full_content(top))
+        timed("flatten_tree", lambda: flatten_tree(tree))
+
+
+if __name__ == "__main__":
+    main()
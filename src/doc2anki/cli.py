@@ -1,9 +1,10 @@
 """CLI interface for doc2anki."""
 
+import itertools
 import os
 from importlib.metadata import version as get_version
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
 
 import typer
 from rich.console import Console
@@ -16,6 +17,10 @@ from .config import (
     fatal_exit,
 )
 
+if TYPE_CHECKING:
+    from .llm.window import WindowAdjustment
+    from .pipeline import ChunkWithContext, CompressionStats
+
 
 def version_callback(value: bool) -> None:
     """Print version and exit."""
@@ -94,6 +99,112 @@ def resolve_config_path(user_config: Optional[Path] = None) -> Path:
 DEFAULT_CONFIG_PATH = None
 
 
+def configured_model(config_path: Path, provider_name: str) -> Optional[str]:
+    """Model configured for a provider, or None if it can't be resolved."""
+    try:
+        providers = list_providers(config_path, show_all=True)
+    except ConfigError:
+        return None
+    for info in providers:
+        if info.name == provider_name:
+            return info.model
+    return None
+
+
+def print_chunk(index: int, ctx: "ChunkWithContext", tokens: int) -> None:
+    """Print one line of the verbose chunk listing."""
+    chain_str = " > ".join(ctx.parent_chain) if ctx.parent_chain else "(root)"
+
+    # Show beginning and ending of content
+    content = ctx.chunk_content.replace("\n", " ")
+    if len(content) > 80:
+        preview = f"{content[:40]}...{content[-30:]}"
+    else:
+        preview = content
+
+    console.print(f"  [{index}] {chain_str} (tokens: {tokens})")
+    console.print(f"      {preview}")
+
+
+def iter_printed_chunks(chunks: Iterable["ChunkWithContext"]) -> Iterator["ChunkWithContext"]:
+    """Print the verbose listing line of each chunk as it is consumed."""
+    from .parser import count_tokens
+
+    for i, ctx in enumerate(chunks, 1):
+        print_chunk(i, ctx, count_tokens(ctx.chunk_content))
+        yield ctx
+
+
+def print_compression(file_path: Path, stats: "CompressionStats") -> None:
+    """Print the token savings of compressing one file."""
+    console.print(
+        f"[blue]Compression:[/blue] {file_path}: "
+        f"{stats.tokens_before:,} -> {stats.tokens_after:,} tokens "
+        f"(saved {stats.tokens_saved:,}, {stats.ratio_saved:.0%})"
+    )
+
+
+def print_adjustments(adjustments: list["WindowAdjustment"], context_window: int) -> None:
+    """Print the changes made to fit chunks into the context window."""
+    if not adjustments:
+        return
+    console.print(
+        f"[yellow]Adjusted {len(adjustments)} chunk(s) to fit the "
+        f"{context_window:,}-token context window:[/yellow]"
+    )
+    for adjustment in adjustments:
+        console.print(f"  [yellow]- {adjustment.describe()}[/yellow]")
+
+
+def record_skipped(
+    skipped: list[tuple[Path, int, int, tuple[str, ...]]],
+    file_path: Path,
+    first_index: int,
+    chunks: Iterable["ChunkWithContext"],
+) -> None:
+    """
+    Record the chunks a budget stop leaves unsent.
+
+    Args:
+        skipped: (file, 1-based index, chunks in file, parent chain) entries
+        file_path: File the chunks belong to
+        first_index: 1-based index of the first chunk in chunks
+        chunks: The remaining chunks of the file (consumed)
+    """
+    rest = [ctx.parent_chain for ctx in chunks]
+    total = first_index - 1 + len(rest)
+    for offset, chain in enumerate(rest):
+        skipped.append((file_path, first_index + offset, total, chain))
+
+
+def exit_on_error(
+    chunks: Iterable["ChunkWithContext"], message: str
+) -> Iterator["ChunkWithContext"]:
+    """Pass a lazy chunk iterator through, exiting with message if it fails."""
+    try:
+        yield from chunks
+    except Exception as e:
+        fatal_exit(f"{message}: {e}")
+
+
+def collect_input_files(input_path: Path) -> list[Path]:
+    """The input file, or every registered document file under a directory."""
+    if input_path.is_file():
+        return [input_path]
+
+    from .parser import registered_extensions
+
+    extensions = registered_extensions()
+    files = sorted(
+        path
+        for path in input_path.rglob("*")
+        if path.suffix.lower() in extensions and path.is_file()
+    )
+    if not files:
+        fatal_exit(f"No document files ({', '.join(extensions)}) found in {input_path}")
+    return files
+
+
 @app.command("list")
 def list_cmd(
     config: Optional[Path] = typer.Option(
@@ -208,6 +319,304 @@ def validate_cmd(
             )
 
 
+@app.command("bench-provider")
+def bench_provider_cmd(
+    provider: list[str] = typer.Option(
+        ...,
+        "-p",
+        "--provider",
+        help="AI provider name to benchmark (repeatable)",
+    ),
+    config: Optional[Path] = typer.Option(
+        None,
+        "-c",
+        "--config",
+        help="Path to AI provider configuration file",
+    ),
+    concurrency: str = typer.Option(
+        "1,2,4,8",
+        "--concurrency",
+        help="Comma-separated concurrency levels to run, in the given order",
+    ),
+    requests: Optional[int] = typer.Option(
+        None,
+        "--requests",
+        help="Requests per concurrency level (default: 2x the concurrency)",
+    ),
+    chunk_tokens: int = typer.Option(
+        1000,
+        "--chunk-tokens",
+        help="Approximate size of the synthetic chunk in tokens",
+    ),
+    max_tokens: int = typer.Option(
+        256,
+        "--max-tokens",
+        help="Completion tokens requested per call",
+    ),
+    slowdown: float = typer.Option(
+        2.0,
+        "--slowdown",
+        help="p50 latency slowdown (vs. a concurrency-1 baseline, always measured) "
+        "treated as throttling",
+    ),
+    keep_going: bool = typer.Option(
+        False,
+        "--keep-going",
+        help="Run every level even after throttling is detected",
+    ),
+) -> None:
+    """Measure provider latency and throughput at increasing concurrency."""
+    try:
+        levels = [int(c) for c in concurrency.split(",") if c.strip()]
+    except ValueError:
+        fatal_exit(f"Invalid --concurrency value: {concurrency}")
+        return
+    if not levels or min(levels) < 1:
+        fatal_exit("--concurrency levels must be positive integers")
+        return
+
+    resolved_config = resolve_config_path(config)
+    provider_configs = []
+    for name in provider:
+        try:
+            provider_configs.append((name, get_provider_config(resolved_config, name)))
+        except ConfigError as e:
+            fatal_exit(str(e))
+            return
+
+    # Import LLM module only when needed
+    from .llm import create_client
+    from .llm.bench import bench_provider
+
+    for name, provider_config in provider_configs:
+        console.print(
+            f"\n[blue]Benchmarking[/blue] {name} ({provider_config.model}) "
+            f"at {provider_config.base_url}"
+        )
+        # Retries would hide 429 responses
+        client = create_client(provider_config).with_options(max_retries=0)
+
+        report = bench_provider(
+            client,
+            provider=name,
+            model=provider_config.model,
+            concurrency_levels=levels,
+            requests_per_level=requests,
+            chunk_tokens=chunk_tokens,
+            max_tokens=max_tokens,
+            slowdown_factor=slowdown,
+            stop_on_throttle=not keep_going,
+            on_level=lambda level: console.print(
+                f"  concurrency {level.concurrency}: "
+                f"{len(level.succeeded)}/{len(level.samples)} ok"
+            ),
+        )
+
+        table = Table(title=f"{name} ({provider_config.model})")
+        table.add_column("Concurrency", justify="right", style="cyan")
+        table.add_column("OK", justify="right")
+        table.add_column("429", justify="right")
+        table.add_column("TTFT p50", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("p99", justify="right")
+        table.add_column("Tokens/s", justify="right", style="green")
+
+        rows = [(str(level.concurrency), level) for level in report.levels]
+        if report.baseline is not None and report.baseline not in report.levels:
+            rows.insert(0, ("1 (baseline)", report.baseline))
+        for label, level in rows:
+            style = "yellow" if report.is_throttled(level) else None
+            table.add_row(
+                label,
+                f"{len(level.succeeded)}/{len(level.samples)}",
+                str(level.throttled),
+                f"{level.ttft(50):.2f}s",
+                f"{level.latency(50):.2f}s",
+                f"{level.latency(95):.2f}s",
+                f"{level.latency(99):.2f}s",
+                f"{level.tokens_per_second:.1f}",
+                style=style,
+            )
+
+        console.print(table)
+
+        errors = [s.error for level in report.levels for s in level.samples if s.error]
+        if errors:
+            console.print(f"[yellow]{len(errors)} request(s) failed, first error:[/yellow] {errors[0]}")
+
+        if report.throttle_concurrency is None:
+            console.print(
+                "[green]No throttling up to concurrency "
+                f"{max(level.concurrency for level in report.levels)}[/green]"
+            )
+        else:
+            console.print(
+                f"[yellow]Throttling starts at concurrency {report.throttle_concurrency}[/yellow]"
+            )
+
+
+@app.command("diff")
+def diff_cmd(
+    old_path: Path = typer.Argument(..., help="Previous version of the document"),
+    new_path: Path = typer.Argument(..., help="Current version of the document"),
+    format: Optional[str] = typer.Option(
+        None,
+        "--format",
+        help="Document format (markdown or org; default: detect)",
+    ),
+) -> None:
+    """Show which heading sections changed between two document versions."""
+    from .parser import build_document_tree, diff_trees
+
+    for path in (old_path, new_path):
+        if not path.is_file():
+            fatal_exit(f"File not found: {path}")
+            return
+
+    try:
+        old_tree = build_document_tree(old_path, format=format)
+        new_tree = build_document_tree(new_path, format=format)
+    except Exception as e:
+        fatal_exit(f"Failed to parse: {e}")
+        return
+
+    diff = diff_trees(old_tree, new_tree)
+    if not diff:
+        console.print("[green]No changes.[/green]")
+        return
+
+    styles = {"inserted": "green", "deleted": "red", "moved": "blue", "modified": "yellow"}
+    table = Table(title=f"{old_path} → {new_path}")
+    table.add_column("Change")
+    table.add_column("Section", style="cyan")
+
+    if diff.metadata_changed:
+        table.add_row("[yellow]modified[/yellow]", "(metadata)")
+    if diff.preamble_changed:
+        table.add_row("[yellow]modified[/yellow]", "(preamble)")
+    for change in diff.changes:
+        section = " > ".join(change.path)
+        if change.kind == "moved" and change.old is not None:
+            section = f"{' > '.join(change.old.path)} → {section}"
+        style = styles[change.kind]
+        table.add_row(f"[{style}]{change.kind}[/{style}]", section)
+
+    console.print(table)
+    console.print(
+        f"{len(diff.inserted)} inserted, {len(diff.deleted)} deleted, "
+        f"{len(diff.moved)} moved, {len(diff.modified)} modified"
+    )
+
+
+@app.command("scan")
+def scan_cmd(
+    input_path: Path = typer.Argument(..., help="Input file or directory"),
+    max_tokens: int = typer.Option(
+        3000,
+        "--max-tokens",
+        help="Chunk size to project chunk counts against",
+    ),
+    jobs: int = typer.Option(
+        0,
+        "-j",
+        "--jobs",
+        help="Worker processes (0 = one per CPU)",
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print per-file and total statistics as JSON",
+    ),
+) -> None:
+    """Inventory documents (headings, tokens, projected chunks) without calling an LLM."""
+    import json
+
+    from .pipeline import ScanTotals, scan_files
+
+    if jobs < 0:
+        fatal_exit("--jobs must be 0 or a positive number")
+        return
+    if not input_path.exists():
+        fatal_exit(f"Input path does not exist: {input_path}")
+        return
+
+    files = collect_input_files(input_path)
+    if not files:
+        return
+
+    totals = ScanTotals()
+    results = []
+    for stats in scan_files(files, max_tokens=max_tokens, jobs=jobs):
+        totals.add(stats)
+        results.append(stats)
+
+    if as_json:
+        print(
+            json.dumps(
+                {
+                    "max_tokens": max_tokens,
+                    "files": [stats.to_dict() for stats in results],
+                    "totals": totals.to_dict(),
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+        return
+
+    base = input_path if input_path.is_dir() else input_path.parent
+    table = Table(title=f"Scan of {input_path} (max {max_tokens:,} tokens per chunk)")
+    table.add_column("File", style="cyan")
+    table.add_column("Format")
+    table.add_column("Frontmatter")
+    table.add_column("Headings", justify="right")
+    table.add_column("Depth", justify="right")
+    table.add_column("Tokens", justify="right")
+    table.add_column("Chunks", justify="right")
+    table.add_column("Oversized", justify="right")
+
+    for stats in results:
+        name = str(stats.path.relative_to(base))
+        if stats.error is not None:
+            table.add_row(name, f"[red]error: {stats.error}[/red]", "", "", "", "", "", "")
+            continue
+        oversized = f"[red]{len(stats.oversized)}[/red]" if stats.oversized else "0"
+        table.add_row(
+            name,
+            stats.format,
+            ", ".join(stats.frontmatter_keys) or "-",
+            f"{stats.headings:,}",
+            str(stats.depth),
+            f"{stats.tokens:,}",
+            f"{stats.chunks:,}",
+            oversized,
+        )
+
+    table.add_section()
+    table.add_row(
+        f"[bold]{totals.files:,} files[/bold]",
+        ", ".join(f"{fmt} {count:,}" for fmt, count in sorted(totals.formats.items())),
+        "",
+        f"{totals.headings:,}",
+        "",
+        f"{totals.tokens:,}",
+        f"{totals.chunks:,}",
+        str(totals.oversized),
+    )
+    console.print(table)
+
+    if totals.failed:
+        console.print(f"[red]{totals.failed} file(s) could not be parsed[/red]")
+    for stats in results:
+        for section in stats.oversized:
+            where = " > ".join(section.path) or "(preamble)"
+            console.print(
+                f"[yellow]Oversized:[/yellow] {stats.path}: {where} "
+                f"({section.tokens:,} tokens > {max_tokens:,})"
+            )
+
+
 @app.command("generate")
 def generate_cmd(
     input_path: Path = typer.Argument(
@@ -240,13 +649,29 @@ def generate_cmd(
     max_tokens: int = typer.Option(
         3000,
         "--max-tokens",
-        help="Maximum tokens per chunk",
+        help="Maximum tokens per chunk, in the provider's tokens once the model "
+        "is calibrated",
     ),
     max_retries: int = typer.Option(
         3,
         "--max-retries",
         help="Maximum LLM call retries",
     ),
+    max_input_tokens: Optional[int] = typer.Option(
+        None,
+        "--max-input-tokens",
+        help="Stop the run before prompt tokens exceed this total",
+    ),
+    max_output_tokens: Optional[int] = typer.Option(
+        None,
+        "--max-output-tokens",
+        help="Stop the run once completion tokens reach this total",
+    ),
+    max_cost: Optional[float] = typer.Option(
+        None,
+        "--max-cost",
+        help="Stop the run before spend exceeds this amount (USD, needs provider prices)",
+    ),
     deck_depth: int = typer.Option(
         2,
         "--deck-depth",
@@ -262,6 +687,45 @@ def generate_cmd(
         "--include-parent-chain/--no-parent-chain",
         help="Include heading hierarchy as context",
     ),
+    compress: bool = typer.Option(
+        False,
+        "--compress/--no-compress",
+        help="Strip non-semantic markup from chunks before sending",
+    ),
+    compress_rules: str = typer.Option(
+        "all",
+        "--compress-rules",
+        help="Compression rules (comma-separated): html_comments, data_uris, "
+        "long_urls, org_drawers, blank_lines, tables, or all",
+    ),
+    max_table_rows: int = typer.Option(
+        20,
+        "--max-table-rows",
+        min=0,
+        help="Rows kept per table when compressing",
+    ),
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        help="Worker processes for parsing and chunking (0 = one per CPU)",
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Chunk files section by section without building a document tree "
+        "(for very large files)",
+    ),
+    parse_cache: bool = typer.Option(
+        True,
+        "--parse-cache/--no-parse-cache",
+        help="Reuse parse and chunk results for unchanged files",
+    ),
+    rebuild_parse_cache: bool = typer.Option(
+        False,
+        "--rebuild-parse-cache",
+        help="Ignore cached parse results and rebuild them",
+    ),
     dry_run: bool = typer.Option(
         False,
         "--dry-run",
@@ -281,19 +745,45 @@ def generate_cmd(
 ) -> None:
     """Generate Anki cards from documents."""
     # Import parser here to avoid circular imports and speed up CLI startup
-    from .parser import build_document_tree
-    from .pipeline import process_pipeline
+    from .pipeline import (
+        process_pipeline,
+        parse_files,
+        CompressionOptions,
+        CompressionStats,
+        ParseCache,
+        compress_chunks,
+        iter_compressed_chunks,
+    )
 
     # Validate input path
+    if jobs < 0:
+        fatal_exit("--jobs must be 0 or a positive number")
+        return
+
+    if stream and interactive:
+        fatal_exit("--stream cannot be combined with --interactive")
+        return
+
     if not input_path.exists():
         fatal_exit(f"Input path does not exist: {input_path}")
         return
 
+    compression = None
+    if compress:
+        try:
+            compression = CompressionOptions.from_rules(
+                compress_rules.split(","), max_table_rows=max_table_rows
+            )
+        except ValueError as e:
+            fatal_exit(str(e))
+            return
+
     # Resolve config path
     resolved_config = resolve_config_path(config)
 
     # Load provider config (unless dry-run)
     provider_config = None
+    budget = None
     if not dry_run:
         try:
             provider_config = get_provider_config(resolved_config, provider)
@@ -306,37 +796,91 @@ def generate_cmd(
             console.print(f"[blue]Model:[/blue] {provider_config.model}")
             console.print(f"[blue]Base URL:[/blue] {provider_config.base_url}")
 
-    # Collect input files
-    if input_path.is_file():
-        files = [input_path]
-    else:
-        files = list(input_path.glob("**/*.md")) + list(input_path.glob("**/*.org"))
-        if not files:
-            fatal_exit(f"No .md or .org files found in {input_path}")
+        # Run budget (checked before every LLM request)
+        from .llm.budget import RunBudget
+
+        try:
+            budget = RunBudget(
+                max_input_tokens=max_input_tokens,
+                max_output_tokens=max_output_tokens,
+                max_cost=max_cost,
+                input_price=provider_config.input_price,
+                output_price=provider_config.output_price,
+            )
+        except ValueError as e:
+            fatal_exit(str(e))
             return
 
+    # Local token counts are scaled to the provider's tokenizer, so
+    # --max-tokens means provider tokens. Dry runs apply it too, so they
+    # report the chunks a real run would send.
+    from .llm.calibration import TokenCalibration
+
+    calibration = TokenCalibration.load()
+    if provider_config:
+        model: Optional[str] = provider_config.model
+    else:
+        model = configured_model(resolved_config, provider)
+    chunk_max_tokens = max_tokens
+    if model:
+        chunk_max_tokens = calibration.to_local(model, max_tokens)
+        if verbose:
+            console.print(
+                f"[blue]Token calibration:[/blue] "
+                f"{calibration.factor(model):.3f} provider tokens per local token "
+                f"({calibration.samples(model)} samples), "
+                f"chunks up to {chunk_max_tokens:,} local tokens"
+            )
+
+    budget_exhausted: Optional[str] = None
+    skipped_chunks: list[tuple[Path, int, int, tuple[str, ...]]] = []
+
+    files = collect_input_files(input_path)
+    if not files:
+        return
+
     if verbose:
         console.print(f"[blue]Found {len(files)} file(s) to process[/blue]")
 
     all_cards = []
 
-    for file_path in files:
+    cache = (
+        ParseCache.default(rebuild=rebuild_parse_cache)
+        if parse_cache or rebuild_parse_cache
+        else None
+    )
+
+    # Parse (and, outside interactive mode, chunk) files in input order,
+    # across worker processes with --jobs
+    parsed_files = parse_files(
+        files,
+        max_tokens=chunk_max_tokens,
+        include_parent_chain=include_parent_chain,
+        jobs=jobs,
+        chunk=not interactive,
+        stream=stream,
+        cache=cache,
+        # One process: stream chunks straight from the file
+        lazy=stream and jobs == 1,
+    )
+
+    for parsed in parsed_files:
+        file_path = parsed.path
         if verbose:
             console.print(f"\n[blue]Processing:[/blue] {file_path}")
 
-        # Build document tree (includes metadata extraction)
-        try:
-            tree = build_document_tree(file_path)
-        except Exception as e:
-            fatal_exit(f"Failed to parse {file_path}: {e}")
+        if parsed.error_stage == "parse":
+            fatal_exit(f"Failed to parse {file_path}: {parsed.error}")
             return
+        tree = parsed.tree
+        metadata = parsed.metadata
 
-        if verbose and tree.metadata.raw_data:
-            console.print(f"[blue]Metadata:[/blue] {len(tree.metadata.raw_data)} items")
-            for key, value in tree.metadata.raw_data.items():
+        if verbose and metadata.raw_data:
+            console.print(f"[blue]Metadata:[/blue] {len(metadata.raw_data)} items")
+            for key, value in metadata.raw_data.items():
                 console.print(f"  - {key}: {value}")
 
-        if verbose:
+        if verbose and tree is not None:
             console.print(f"[blue]Document tree:[/blue] {tree}")
 
         # Interactive classification if requested
@@ -348,7 +892,7 @@ def generate_cmd(
                 tree=tree,
                 console=console,
                 filename=str(file_path.name),
-                max_tokens=max_tokens,
+                max_tokens=chunk_max_tokens,
             )
 
             if not classified_nodes:
@@ -356,74 +900,162 @@ def generate_cmd(
                 continue
 
         # Process through pipeline
-        try:
-            chunk_contexts = process_pipeline(
-                tree=tree,
-                max_tokens=max_tokens,
-                include_parent_chain=include_parent_chain,
-                classified_nodes=classified_nodes,
-            )
-        except Exception as e:
-            fatal_exit(f"Failed to process pipeline for {file_path}: {e}")
+        if parsed.error_stage == "pipeline":
+            fatal_exit(f"Failed to process pipeline for {file_path}: {parsed.error}")
             return
+        chunk_contexts = parsed.chunks
+        if classified_nodes is not None:
+            try:
+                chunk_contexts = process_pipeline(
+                    tree=tree,
+                    max_tokens=chunk_max_tokens,
+                    include_parent_chain=include_parent_chain,
+                    classified_nodes=classified_nodes,
+                )
+            except Exception as e:
+                fatal_exit(f"Failed to process pipeline for {file_path}: {e}")
+                return
+
+        # --stream --jobs 1: chunks are read from the file as they are
+        # consumed, so each stage wraps the iterator and reports at the end
+        lazy = not isinstance(chunk_contexts, list)
+        if lazy:
+            chunk_contexts = exit_on_error(
+                chunk_contexts, f"Failed to process pipeline for {file_path}"
+            )
 
-        if verbose:
-            from .parser import count_tokens
-
-            console.print(f"[blue]Chunks:[/blue] {len(chunk_contexts)}")
-            for i, ctx in enumerate(chunk_contexts):
-                tokens = count_tokens(ctx.chunk_content)
-                chain_str = " > ".join(ctx.parent_chain) if ctx.parent_chain else "(root)"
+        compression_stats = None
+        if compression is not None:
+            if lazy:
+                compression_stats = CompressionStats()
+                chunk_contexts = iter_compressed_chunks(
+                    chunk_contexts, compression, compression_stats
+                )
+            else:
+                compression_stats = compress_chunks(chunk_contexts, compression)
+                print_compression(file_path, compression_stats)
 
-                # Show beginning and ending of content
-                content = ctx.chunk_content.replace("\n", " ")
-                if len(content) > 80:
-                    preview = f"{content[:40]}...{content[-30:]}"
-                else:
-                    preview = content
+        if verbose:
+            from .parser import count_tokens_batch
 
-                console.print(f"  [{i+1}] {chain_str} (tokens: {tokens})")
-                console.print(f"      {preview}")
+            if lazy:
+                console.print("[blue]Chunks:[/blue] (listed as they are read)")
+                chunk_contexts = iter_printed_chunks(chunk_contexts)
+            else:
+                console.print(f"[blue]Chunks:[/blue] {len(chunk_contexts)}")
+                chunk_tokens = count_tokens_batch([ctx.chunk_content for ctx in chunk_contexts])
+                for i, (ctx, tokens) in enumerate(zip(chunk_contexts, chunk_tokens), 1):
+                    print_chunk(i, ctx, tokens)
 
         if dry_run:
+            chunk_count = sum(1 for _ in chunk_contexts) if lazy else len(chunk_contexts)
+            if lazy and compression_stats is not None:
+                print_compression(file_path, compression_stats)
             console.print(f"\n[green]Dry run complete for {file_path}[/green]")
-            console.print(f"  Metadata items: {len(tree.metadata.raw_data)}")
-            console.print(f"  Chunks: {len(chunk_contexts)}")
+            console.print(f"  Metadata items: {len(metadata.raw_data)}")
+            console.print(f"  Chunks: {chunk_count}")
+            continue
+
+        if budget_exhausted:
+            # Budget already spent: only record what this run leaves behind
+            record_skipped(skipped_chunks, file_path, 1, chunk_contexts)
             continue
 
         # Import LLM module only when needed
-        from .llm import generate_cards_for_chunk, create_client, load_template
+        from .llm import (
+            generate_cards_for_chunk,
+            create_client,
+            load_template,
+            BudgetExceededError,
+        )
+        from .llm.client import DEFAULT_MAX_COMPLETION_TOKENS
+        from .llm.window import (
+            WindowAdjustment,
+            completion_reserve,
+            fit_chunks_to_window,
+            iter_fit_chunks_to_window,
+        )
+        from .parser import ChunkingError
 
         # Create client and load template
         client = create_client(provider_config)
         template = load_template(prompt_template)
 
+        # Fit rendered prompts into the model context window
+        max_completion_tokens = DEFAULT_MAX_COMPLETION_TOKENS
+        adjustments: list[WindowAdjustment] = []
+        if provider_config.context_window:
+            max_completion_tokens = completion_reserve(provider_config.context_window)
+            window_options = dict(
+                template=template,
+                context_window=provider_config.context_window,
+                include_parent_chain=include_parent_chain,
+                reserved_output_tokens=max_completion_tokens,
+                token_scale=calibration.factor(provider_config.model),
+            )
+            if lazy:
+                chunk_contexts = exit_on_error(
+                    iter_fit_chunks_to_window(chunk_contexts, adjustments, **window_options),
+                    f"Prompt does not fit context window for {file_path}",
+                )
+            else:
+                try:
+                    chunk_contexts, adjustments = fit_chunks_to_window(
+                        chunk_contexts, **window_options
+                    )
+                except ChunkingError as e:
+                    fatal_exit(f"Prompt does not fit context window for {file_path}: {e}")
+                    return
+                print_adjustments(adjustments, provider_config.context_window)
+
         # Generate cards for each chunk
+        cards = []
+        total = "?" if lazy else len(chunk_contexts)
+        chunk_iter = iter(chunk_contexts)
         try:
-            cards = []
-            for i, ctx in enumerate(chunk_contexts):
+            for i, ctx in enumerate(chunk_iter, 1):
                 if verbose:
-                    console.print(f"[blue]Processing chunk {i + 1}/{len(chunk_contexts)}...[/blue]")
-
-                chunk_cards = generate_cards_for_chunk(
-                    chunk=ctx.chunk_content,
-                    global_context=dict(ctx.metadata.raw_data) if ctx.metadata.raw_data else {},
-                    client=client,
-                    model=provider_config.model,
-                    template=template,
-                    max_retries=max_retries,
-                    verbose=verbose,
-                    parent_chain=list(ctx.parent_chain) if include_parent_chain else None,
-                )
+                    console.print(f"[blue]Processing chunk {i}/{total}...[/blue]")
+
+                try:
+                    chunk_cards = generate_cards_for_chunk(
+                        chunk=ctx.chunk_content,
+                        global_context=dict(ctx.metadata.raw_data) if ctx.metadata.raw_data else {},
+                        client=client,
+                        model=provider_config.model,
+                        template=template,
+                        max_retries=max_retries,
+                        verbose=verbose,
+                        parent_chain=list(ctx.parent_chain) if include_parent_chain else None,
+                        budget=budget if budget and budget.is_limited else None,
+                        accumulated_context=ctx.accumulated_context,
+                        max_completion_tokens=max_completion_tokens,
+                        calibration=calibration,
+                    )
+                except BudgetExceededError as e:
+                    budget_exhausted = str(e)
+                    console.print(f"[yellow]Budget exhausted: {e}. Stopping dispatch.[/yellow]")
+                    record_skipped(skipped_chunks, file_path, i, itertools.chain([ctx], chunk_iter))
+                    break
+
                 cards.extend(chunk_cards)
 
                 if verbose:
                     console.print(f"  [green]Generated {len(chunk_cards)} cards[/green]")
 
         except Exception as e:
+            calibration.save()
             fatal_exit(f"Failed to generate cards for {file_path}: {e}")
             return
 
+        if lazy:
+            if compression_stats is not None:
+                print_compression(file_path, compression_stats)
+            if provider_config.context_window:
+                print_adjustments(adjustments, provider_config.context_window)
+
+        calibration.save()
+
         # Add file-based tags
         extra_tag_list = []
         if extra_tags:
@@ -438,9 +1070,53 @@ def generate_cmd(
         if verbose:
             console.print(f"[green]Generated {len(cards)} cards from {file_path}[/green]")
 
+    if cache is not None:
+        # Keep the cache bounded: drop entries of deleted files and the LRU tail
+        cache.prune()
+
+    if verbose:
+        from .parser import token_cache_info
+
+        token_cache = token_cache_info()
+        console.print(
+            f"[blue]Token cache:[/blue] {token_cache.hits:,} hits, "
+            f"{token_cache.misses:,} misses ({token_cache.hit_rate:.0%})"
+        )
+
     if dry_run:
         return
 
+    if budget and budget.is_limited:
+        console.print(f"[blue]Budget usage:[/blue] {budget.summary()}")
+
+    if skipped_chunks:
+        console.print(
+            f"\n[yellow]Skipped {len(skipped_chunks)} chunk(s) after budget limit "
+            f"({budget_exhausted}):[/yellow]"
+        )
+        for skipped_path, index, total, chain in skipped_chunks:
+            chain_str = " > ".join(chain) if chain else "(root)"
+            console.print(f"  {skipped_path} [{index}/{total}] {chain_str}")
+        # First skipped chunk per file: 1 means nothing of the file was sent
+        first_skipped: dict[Path, tuple[int, int]] = {}
+        for skipped_path, index, total, _ in skipped_chunks:
+            first_skipped.setdefault(skipped_path, (index, total))
+        untouched = [str(p) for p, (index, _) in first_skipped.items() if index == 1]
+        if untouched:
+            console.print(
+                "[yellow]Re-run on these file(s) to generate their cards:[/yellow] "
+                + " ".join(untouched)
+            )
+        for skipped_path, (index, total) in first_skipped.items():
+            if index == 1:
+                continue
+            console.print(
+                f"[yellow]{skipped_path} was only partly processed ({total - index + 1} of "
+                f"{total} chunk(s) not sent). Re-running the whole file regenerates the "
+                f"cards of its first {index - 1} chunk(s), which are already in {output}, "
+                f"so importing both decks creates duplicates.[/yellow]"
+            )
+
     if not all_cards:
         console.print("[yellow]No cards generated.[/yellow]")
         return
@@ -460,7 +1136,12 @@ def generate_cmd(
         fatal_exit(f"Failed to create APKG: {e}")
         return
 
-    console.print(f"\n[green]Successfully created {output} with {len(all_cards)} cards[/green]")
+    if skipped_chunks:
+        console.print(
+            f"\n[yellow]Created partial {output} with {len(all_cards)} cards[/yellow]"
+        )
+    else:
+        console.print(f"\n[green]Successfully created {output} with {len(all_cards)} cards[/green]")
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from .loader import (
     get_provider_config,
     list_providers,
     fatal_exit,
+    get_cache_dir,
 )
 from .models import ProviderConfig, ProviderInfo
 
@@ -15,4 +16,5 @@ __all__ = [
     "get_provider_config",
     "list_providers",
     "fatal_exit",
+    "get_cache_dir",
 ]
@@ -60,6 +60,25 @@ def resolve_provider_config(
         )
 
 
+# Optional numeric provider fields shared by every auth_type
+OPTIONAL_NUMERIC_FIELDS = ("input_price", "output_price", "context_window")
+
+
+def _resolve_optional_fields(provider_name: str, config: dict[str, Any]) -> dict[str, Any]:
+    """Resolve optional numeric fields (pricing, limits) common to all auth types."""
+    resolved: dict[str, Any] = {}
+    for field in OPTIONAL_NUMERIC_FIELDS:
+        if field not in config:
+            continue
+        value = config[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ConfigError(
+                f"Provider '{provider_name}': '{field}' must be a non-negative number"
+            )
+        resolved[field] = value
+    return resolved
+
+
 def _resolve_direct_auth(provider_name: str, config: dict[str, Any]) -> ProviderConfig:
     """Resolve direct authentication config."""
     required = ["base_url", "model", "api_key"]
@@ -73,6 +92,7 @@ def _resolve_direct_auth(provider_name: str, config: dict[str, Any]) -> Provider
         base_url=config["base_url"],
         model=config["model"],
         api_key=config["api_key"],
+        **_resolve_optional_fields(provider_name, config),
     )
 
 
@@ -114,7 +134,12 @@ def _resolve_env_auth(provider_name: str, config: dict[str, Any]) -> ProviderCon
             f"(env var not set and no default)"
         )
 
-    return ProviderConfig(base_url=base_url, model=model, api_key=api_key)
+    return ProviderConfig(
+        base_url=base_url,
+        model=model,
+        api_key=api_key,
+        **_resolve_optional_fields(provider_name, config),
+    )
 
 
 def _resolve_dotenv_auth(provider_name: str, config: dict[str, Any]) -> ProviderConfig:
@@ -168,7 +193,12 @@ def _resolve_dotenv_auth(provider_name: str, config: dict[str, Any]) -> Provider
             f"(not in dotenv and no default)"
         )
 
-    return ProviderConfig(base_url=base_url, model=model, api_key=api_key)
+    return ProviderConfig(
+        base_url=base_url,
+        model=model,
+        api_key=api_key,
+        **_resolve_optional_fields(provider_name, config),
+    )
 
 
 def get_provider_config(config_path: Path, provider_name: str) -> ProviderConfig:
@@ -301,6 +331,12 @@ def list_providers(config_path: Path, show_all: bool = False) -> list[ProviderIn
     return providers
 
 
+def get_cache_dir() -> Path:
+    """Get the doc2anki cache directory ($XDG_CACHE_HOME/doc2anki)."""
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(xdg_cache_home) / "doc2anki"
+
+
 def fatal_exit(message: str) -> None:
     """Print error message and exit."""
     console.print(f"[red]Error:[/red] {message}")
@@ -10,6 +10,9 @@ class ProviderConfig(BaseModel):
     base_url: str
     model: str
     api_key: str
+    input_price: Optional[float] = None  # USD per 1M prompt tokens
+    output_price: Optional[float] = None  # USD per 1M completion tokens
+    context_window: Optional[int] = None  # Model context limit in tokens
 
 
 class DirectAuthConfig(BaseModel):
@@ -4,15 +4,24 @@ from .client import (
     generate_cards_for_chunk,
     create_client,
     LLMError,
+    LLMResponse,
 )
-from .extractor import extract_json, JSONExtractionError
+from .budget import RunBudget, BudgetExceededError
+from .window import WindowAdjustment, fit_chunks_to_window
+from .extractor import extract_json, parse_card_output, JSONExtractionError
 from .prompt import load_template, build_prompt
 
 __all__ = [
     "generate_cards_for_chunk",
     "create_client",
     "LLMError",
+    "LLMResponse",
+    "RunBudget",
+    "BudgetExceededError",
+    "WindowAdjustment",
+    "fit_chunks_to_window",
     "extract_json",
+    "parse_card_output",
     "JSONExtractionError",
     "load_template",
     "build_prompt",
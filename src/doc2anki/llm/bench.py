@@ -0,0 +1,267 @@
+"""Latency and throughput probe for LLM providers.
+
+Sends a synthetic chunk workload at the requested concurrency levels and
+measures time-to-first-token, end-to-end latency and completion throughput
+per level, so concurrency and rate limits can be set from real numbers.
+Slowdown is judged against a concurrency-1 baseline, which is always
+measured first.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence
+
+from openai import OpenAI
+
+from ..parser.chunker import count_tokens
+
+# p50 latency this many times the single-request baseline counts as throttling
+DEFAULT_SLOWDOWN_FACTOR = 2.0
+
+_SYNTHETIC_PARAGRAPH = (
+    "A hash table maps keys to values through a hash function that spreads keys "
+    "over an array of buckets. Collisions are resolved by chaining or open "
+    "addressing, and the table is resized when its load factor grows too large, "
+    "which keeps lookups close to constant time on average. "
+)
+
+_BENCH_INSTRUCTION = (
+    "Write flashcards (question and answer pairs) about the following notes.\n\n"
+)
+
+
+def synthetic_chunk(tokens: int) -> str:
+    """Build a deterministic prompt of roughly the given token count."""
+    paragraph_tokens = count_tokens(_SYNTHETIC_PARAGRAPH)
+    repeats = max(1, math.ceil(tokens / paragraph_tokens))
+    return _BENCH_INSTRUCTION + "\n\n".join([_SYNTHETIC_PARAGRAPH.strip()] * repeats)
+
+
+@dataclass
+class RequestSample:
+    """Timing of one streamed request."""
+
+    ok: bool
+    latency: float  # seconds until the stream finished (or failed)
+    ttft: Optional[float] = None  # seconds until the first content token
+    completion_tokens: int = 0
+    throttled: bool = False  # provider answered 429
+    error: str = ""
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile (0.0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class LevelResult:
+    """Aggregated samples for one concurrency level."""
+
+    concurrency: int
+    samples: list[RequestSample]
+    wall_time: float
+
+    @property
+    def succeeded(self) -> list[RequestSample]:
+        return [s for s in self.samples if s.ok]
+
+    @property
+    def throttled(self) -> int:
+        return sum(1 for s in self.samples if s.throttled)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for s in self.samples if not s.ok)
+
+    def latency(self, percent: float) -> float:
+        return _percentile([s.latency for s in self.succeeded], percent)
+
+    def ttft(self, percent: float) -> float:
+        return _percentile([s.ttft for s in self.succeeded if s.ttft is not None], percent)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Aggregate completion tokens per second across the level."""
+        tokens = sum(s.completion_tokens for s in self.succeeded)
+        return tokens / self.wall_time if self.wall_time > 0 else 0.0
+
+
+@dataclass
+class BenchReport:
+    """Results for one provider across all concurrency levels."""
+
+    provider: str
+    model: str
+    levels: list[LevelResult] = field(default_factory=list)  # requested, in run order
+    slowdown_factor: float = DEFAULT_SLOWDOWN_FACTOR
+    baseline: Optional[LevelResult] = None  # concurrency 1 (also in levels if requested)
+
+    def is_throttled(self, level: LevelResult) -> bool:
+        """Whether a level shows 429s or a p50 slowdown against concurrency 1."""
+        if level.throttled:
+            return True
+        baseline = self.baseline.latency(50) if self.baseline is not None else 0.0
+        return baseline > 0 and level.latency(50) > baseline * self.slowdown_factor
+
+    @property
+    def throttle_concurrency(self) -> Optional[int]:
+        """Lowest throttled concurrency level (None if never)."""
+        throttled = [level.concurrency for level in self.levels if self.is_throttled(level)]
+        return min(throttled, default=None)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def stream_request(
+    client: OpenAI,
+    model: str,
+    prompt: str,
+    max_tokens: int,
+    include_usage: bool = True,
+) -> RequestSample:
+    """
+    Send one streaming chat completion and time it.
+
+    Usage is requested with stream_options; completion tokens come from the
+    provider's usage chunk, or from a local count of the streamed text if
+    the provider omits it. A provider that rejects stream_options is asked
+    again without it.
+    """
+    start = time.perf_counter()
+    ttft: Optional[float] = None
+    parts: list[str] = []
+    completion_tokens: Optional[int] = None
+
+    kwargs = {}
+    if include_usage:
+        # Ask for the provider's own counts in a final usage chunk
+        kwargs["stream_options"] = {"include_usage": True}
+
+    try:
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            stream=True,
+            **kwargs,
+        )
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None):
+                completion_tokens = usage.completion_tokens
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(content)
+    except Exception as e:
+        if include_usage and "stream_options" in str(e).lower():
+            # Provider doesn't support stream_options, retry without it
+            return stream_request(client, model, prompt, max_tokens, include_usage=False)
+        return RequestSample(
+            ok=False,
+            latency=time.perf_counter() - start,
+            ttft=ttft,
+            throttled=_is_rate_limited(e),
+            error=str(e),
+        )
+
+    if completion_tokens is None:
+        completion_tokens = count_tokens("".join(parts))
+
+    return RequestSample(
+        ok=True,
+        latency=time.perf_counter() - start,
+        ttft=ttft,
+        completion_tokens=completion_tokens,
+    )
+
+
+def run_level(
+    client: OpenAI,
+    model: str,
+    prompt: str,
+    concurrency: int,
+    requests: int,
+    max_tokens: int,
+) -> LevelResult:
+    """Send `requests` requests with at most `concurrency` in flight."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(
+            executor.map(
+                lambda _: stream_request(client, model, prompt, max_tokens),
+                range(requests),
+            )
+        )
+    return LevelResult(
+        concurrency=concurrency,
+        samples=samples,
+        wall_time=time.perf_counter() - start,
+    )
+
+
+def bench_provider(
+    client: OpenAI,
+    provider: str,
+    model: str,
+    concurrency_levels: Sequence[int],
+    requests_per_level: Optional[int] = None,
+    chunk_tokens: int = 1000,
+    max_tokens: int = 256,
+    slowdown_factor: float = DEFAULT_SLOWDOWN_FACTOR,
+    stop_on_throttle: bool = True,
+    on_level: Optional[Callable[[LevelResult], None]] = None,
+) -> BenchReport:
+    """
+    Benchmark one provider at the given concurrency levels.
+
+    A concurrency-1 baseline is measured first (and reused if 1 is among
+    the levels); slowdown is judged against its p50 latency.
+
+    Args:
+        client: OpenAI-compatible client (retries should be disabled so
+                429 responses are observed)
+        provider: Provider name (for the report)
+        model: Model name
+        concurrency_levels: Concurrency levels to run, in the given order
+                            (duplicates are run once)
+        requests_per_level: Requests per level (default: 2x the concurrency)
+        chunk_tokens: Approximate prompt size in tokens
+        max_tokens: Completion tokens requested per call
+        slowdown_factor: p50 slowdown against concurrency 1 treated as throttling
+        stop_on_throttle: Stop after the first throttled level
+        on_level: Called with each level result as it completes
+
+    Returns:
+        BenchReport with per-level results
+    """
+    prompt = synthetic_chunk(chunk_tokens)
+    report = BenchReport(provider=provider, model=model, slowdown_factor=slowdown_factor)
+
+    report.baseline = run_level(client, model, prompt, 1, requests_per_level or 2, max_tokens)
+
+    for concurrency in dict.fromkeys(concurrency_levels):
+        if concurrency == 1:
+            level = report.baseline
+        else:
+            requests = requests_per_level or concurrency * 2
+            level = run_level(client, model, prompt, concurrency, requests, max_tokens)
+        report.levels.append(level)
+        if on_level is not None:
+            on_level(level)
+        if stop_on_throttle and report.is_throttled(level):
+            break
+
+    return report
@@ -0,0 +1,161 @@
+"""Run-wide token and cost budget enforcement."""
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+
+class BudgetExceededError(Exception):
+    """A request would exceed the configured run budget."""
+
+    pass
+
+
+@dataclass
+class RunBudget:
+    """
+    Hard limits on tokens and spend for a single run.
+
+    Limits are checked before each request using the pre-counted prompt
+    tokens, so a request that would cross a limit is never sent, and the
+    request's max_tokens is capped so its completion can't cross the output
+    token or cost limit either. Actual
+    usage is recorded afterwards from provider-reported token counts
+    (falling back to the local estimate when the provider omits usage).
+
+    Prices are in USD per 1M tokens, taken from the provider config.
+    """
+
+    max_input_tokens: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+    input_price: Optional[float] = None
+    output_price: Optional[float] = None
+
+    # Usage so far
+    input_tokens: int = 0
+    output_tokens: int = 0
+    requests: int = 0
+
+    def __post_init__(self) -> None:
+        if self.max_cost is not None and (
+            self.input_price is None or self.output_price is None
+        ):
+            raise ValueError(
+                "max_cost requires 'input_price' and 'output_price' "
+                "in the provider configuration"
+            )
+
+    @property
+    def is_limited(self) -> bool:
+        """Whether any limit is configured."""
+        return (
+            self.max_input_tokens is not None
+            or self.max_output_tokens is not None
+            or self.max_cost is not None
+        )
+
+    @property
+    def cost(self) -> float:
+        """Spend so far in USD (0.0 when prices are unknown)."""
+        return self._price(self.input_tokens, self.output_tokens)
+
+    def _price(self, input_tokens: int, output_tokens: int) -> float:
+        input_price = self.input_price or 0.0
+        output_price = self.output_price or 0.0
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def remaining_output_tokens(self) -> Optional[int]:
+        """Output tokens left under max_output_tokens, or None if unlimited."""
+        if self.max_output_tokens is None:
+            return None
+        return max(self.max_output_tokens - self.output_tokens, 0)
+
+    def _cost_output_tokens(self, prompt_tokens: int) -> Optional[int]:
+        """Output tokens affordable after a prompt under max_cost, or None."""
+        if self.max_cost is None or not self.output_price:
+            return None
+        # In USD per 1M tokens, which keeps whole-token prices exact
+        left = (
+            self.max_cost * 1_000_000
+            - (self.input_tokens + prompt_tokens) * (self.input_price or 0.0)
+            - self.output_tokens * self.output_price
+        )
+        return max(math.floor(left / self.output_price), 0)
+
+    def request_max_tokens(self, prompt_tokens: int, max_completion_tokens: int) -> int:
+        """
+        Completion tokens a request may ask for without crossing any limit.
+
+        Args:
+            prompt_tokens: Pre-counted tokens of the rendered prompt
+            max_completion_tokens: Completion tokens wanted
+
+        Returns:
+            max_completion_tokens capped by the remaining output tokens and
+            by the cost left after the prompt
+        """
+        limit = max_completion_tokens
+        for cap in (self.remaining_output_tokens(), self._cost_output_tokens(prompt_tokens)):
+            if cap is not None:
+                limit = min(limit, cap)
+        return limit
+
+    def check(self, prompt_tokens: int) -> None:
+        """
+        Check that a request with the given prompt size fits the budget.
+
+        Args:
+            prompt_tokens: Pre-counted tokens of the rendered prompt
+
+        Raises:
+            BudgetExceededError: If sending the request would exceed a limit
+        """
+        if (
+            self.max_input_tokens is not None
+            and self.input_tokens + prompt_tokens > self.max_input_tokens
+        ):
+            raise BudgetExceededError(
+                f"input token limit reached ({self.input_tokens:,} used, "
+                f"next request needs {prompt_tokens:,}, "
+                f"limit {self.max_input_tokens:,})"
+            )
+
+        remaining_output = self.remaining_output_tokens()
+        if remaining_output is not None and remaining_output <= 0:
+            raise BudgetExceededError(
+                f"output token limit reached ({self.output_tokens:,} used, "
+                f"limit {self.max_output_tokens:,})"
+            )
+
+        if self.max_cost is not None:
+            projected = self.cost + self._price(prompt_tokens, 0)
+            if projected > self.max_cost:
+                raise BudgetExceededError(
+                    f"cost limit reached (${self.cost:.4f} spent, "
+                    f"next request needs ${self._price(prompt_tokens, 0):.4f}, "
+                    f"limit ${self.max_cost:.4f})"
+                )
+            if self._cost_output_tokens(prompt_tokens) == 0:
+                raise BudgetExceededError(
+                    f"cost limit reached (${self.cost:.4f} spent, "
+                    f"nothing left for output after a ${self._price(prompt_tokens, 0):.4f} "
+                    f"prompt, limit ${self.max_cost:.4f})"
+                )
+
+    def record(self, input_tokens: int, output_tokens: int) -> None:
+        """Record usage of a completed request."""
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.requests += 1
+
+    def summary(self) -> str:
+        """Human-readable usage summary."""
+        parts = [
+            f"{self.requests} request(s)",
+            f"{self.input_tokens:,} input tokens",
+            f"{self.output_tokens:,} output tokens",
+        ]
+        if self.input_price is not None and self.output_price is not None:
+            parts.append(f"${self.cost:.4f}")
+        return ", ".join(parts)
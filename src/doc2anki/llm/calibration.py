@@ -0,0 +1,142 @@
+"""Per-model calibration of local token estimates against provider usage.
+
+Local counts use tiktoken's cl100k_base for every provider, which can be
+20-40% off for models with other tokenizers (DeepSeek, Qwen, GLM, ...).
+Each request records the local estimate of the prompt next to the
+provider-reported prompt_tokens. A least-squares fit through the origin
+gives a per-model factor: provider_tokens ≈ factor * local_tokens.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from ..config import get_cache_dir
+
+# Samples needed before the factor is trusted
+MIN_SAMPLES = 3
+
+# Once this many samples are held, older ones are down-weighted by half so
+# the factor follows tokenizer or template changes
+MAX_WEIGHT = 1000.0
+
+CALIBRATION_FILENAME = "token_calibration.json"
+
+# Chunk limits use the factor rounded to 1/CHUNK_FACTOR_STEPS (0.05), so a
+# new sample doesn't change how files are chunked (and invalidate the parse
+# cache) every run
+CHUNK_FACTOR_STEPS = 20
+
+
+@dataclass
+class ModelCalibration:
+    """Running least-squares sums for one model."""
+
+    samples: float = 0.0
+    sum_xy: float = 0.0  # local * reported
+    sum_xx: float = 0.0  # local * local
+
+    @property
+    def factor(self) -> float:
+        if self.samples < MIN_SAMPLES or self.sum_xx <= 0:
+            return 1.0
+        return self.sum_xy / self.sum_xx
+
+    def add(self, local_tokens: int, reported_tokens: int) -> None:
+        if self.samples >= MAX_WEIGHT:
+            self.samples /= 2
+            self.sum_xy /= 2
+            self.sum_xx /= 2
+        self.samples += 1
+        self.sum_xy += local_tokens * reported_tokens
+        self.sum_xx += local_tokens * local_tokens
+
+
+class TokenCalibration:
+    """
+    Persistent per-model correction factors for local token counts.
+
+    Usage:
+        calibration = TokenCalibration.load()
+        local_limit = calibration.to_local(model, max_tokens)
+        ...
+        calibration.record(model, local_tokens, usage.prompt_tokens)
+        calibration.save()
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or get_cache_dir() / CALIBRATION_FILENAME
+        self._models: dict[str, ModelCalibration] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "TokenCalibration":
+        """Load calibration data; a missing or corrupt file starts empty."""
+        calibration = cls(path)
+        try:
+            data = json.loads(calibration.path.read_text(encoding="utf-8"))
+            for model, values in data.get("models", {}).items():
+                calibration._models[model] = ModelCalibration(
+                    samples=float(values["samples"]),
+                    sum_xy=float(values["sum_xy"]),
+                    sum_xx=float(values["sum_xx"]),
+                )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            calibration._models.clear()
+        return calibration
+
+    def save(self) -> None:
+        """Persist calibration data (no-op if nothing changed or not writable)."""
+        if not self._dirty:
+            return
+        data = {
+            "models": {
+                model: {"samples": m.samples, "sum_xy": m.sum_xy, "sum_xx": m.sum_xx}
+                for model, m in self._models.items()
+            }
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def record(self, model: str, local_tokens: int, reported_tokens: int) -> None:
+        """Record one request's local estimate and provider-reported count."""
+        if local_tokens <= 0 or reported_tokens <= 0:
+            return
+        self._models.setdefault(model, ModelCalibration()).add(local_tokens, reported_tokens)
+        self._dirty = True
+
+    def factor(self, model: str) -> float:
+        """Provider tokens per local token for a model (1.0 if uncalibrated)."""
+        calibration = self._models.get(model)
+        return calibration.factor if calibration else 1.0
+
+    def samples(self, model: str) -> int:
+        calibration = self._models.get(model)
+        return int(calibration.samples) if calibration else 0
+
+    def to_provider(self, model: str, local_tokens: int) -> int:
+        """Convert a local token count to estimated provider tokens."""
+        return math.ceil(local_tokens * self.factor(model))
+
+    def chunk_factor(self, model: str) -> float:
+        """factor() rounded to 1/CHUNK_FACTOR_STEPS, stable across runs."""
+        steps = max(round(self.factor(model) * CHUNK_FACTOR_STEPS), 1)
+        return steps / CHUNK_FACTOR_STEPS
+
+    def to_local(self, model: str, provider_tokens: int) -> int:
+        """
+        Convert a provider token limit to the equivalent local limit.
+
+        Uses chunk_factor(), so the result only changes when the factor
+        moves by a full step.
+        """
+        return max(int(provider_tokens / self.chunk_factor(model)), 1)
@@ -1,6 +1,7 @@
 """LLM client for card generation."""
 
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, List, Union
 
@@ -9,12 +10,18 @@ from pydantic import ValidationError
 from rich.console import Console
 
 from ..config import ProviderConfig
-from ..models import CardOutput, BasicCard, ClozeCard
-from .extractor import extract_json, JSONExtractionError
+from ..models import BasicCard, ClozeCard
+from ..parser.chunker import count_tokens
+from .budget import RunBudget
+from .calibration import TokenCalibration
+from .extractor import parse_card_output, JSONExtractionError
 from .prompt import load_template, build_prompt
 
 console = Console()
 
+# Default completion budget per request
+DEFAULT_MAX_COMPLETION_TOKENS = 8192
+
 
 class LLMError(Exception):
     """LLM call error."""
@@ -22,6 +29,15 @@ class LLMError(Exception):
     pass
 
 
+@dataclass
+class LLMResponse:
+    """Response text with provider-reported token usage (if any)."""
+
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
 def create_client(provider_config: ProviderConfig) -> OpenAI:
     """Create OpenAI-compatible client."""
     return OpenAI(
@@ -34,9 +50,9 @@ def call_llm(
     client: OpenAI,
     model: str,
     prompt: str,
-    max_tokens: int = 8192,
+    max_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
     use_json_mode: bool = True,
-) -> str:
+) -> LLMResponse:
     """
     Call LLM API and get response.
 
@@ -44,10 +60,11 @@ def call_llm(
         client: OpenAI client
         model: Model name
         prompt: Prompt text
+        max_tokens: Maximum completion tokens
         use_json_mode: Whether to request JSON response format
 
     Returns:
-        Response text
+        Response text with token usage
 
     Raises:
         LLMError: If API call fails
@@ -67,13 +84,20 @@ def call_llm(
         if not response.choices:
             raise LLMError("Empty response from LLM")
 
-        return response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            text=response.choices[0].message.content or "",
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+        )
 
     except Exception as e:
         if "response_format" in str(e).lower():
             # Provider doesn't support response_format, retry without it
             if use_json_mode:
-                return call_llm(client, model, prompt, use_json_mode=False)
+                return call_llm(
+                    client, model, prompt, max_tokens=max_tokens, use_json_mode=False
+                )
         raise LLMError(f"LLM API call failed: {e}")
 
 
@@ -86,6 +110,10 @@ def generate_cards_for_chunk(
     max_retries: int = 3,
     verbose: bool = False,
     parent_chain: Optional[List[str]] = None,
+    budget: Optional[RunBudget] = None,
+    accumulated_context: str = "",
+    max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
+    calibration: Optional[TokenCalibration] = None,
 ) -> List[Union[BasicCard, ClozeCard]]:
     """
     Generate cards for a single chunk.
@@ -99,14 +127,30 @@ def generate_cards_for_chunk(
         max_retries: Max retry attempts
         verbose: Verbose output
         parent_chain: Heading hierarchy for this chunk
+        budget: Run budget checked before every request (including retries)
+        accumulated_context: Content of earlier FULL/CONTEXT_ONLY sections
+        max_completion_tokens: Completion tokens requested per call
+        calibration: Token calibration to update with provider-reported usage
+                     and to scale local prompt counts for the budget check
 
     Returns:
         List of validated cards
 
     Raises:
+        BudgetExceededError: If the next request would exceed the run budget
         SystemExit: If all retries fail
     """
-    prompt = build_prompt(global_context, chunk, template, parent_chain)
+    prompt = build_prompt(
+        global_context, chunk, template, parent_chain, accumulated_context
+    )
+    local_prompt_tokens = (
+        count_tokens(prompt) if budget is not None or calibration is not None else 0
+    )
+    prompt_tokens = (
+        calibration.to_provider(model, local_prompt_tokens)
+        if calibration is not None
+        else local_prompt_tokens
+    )
 
     # TEMP DEBUG: dump rendered prompt
     if verbose:
@@ -122,7 +166,30 @@ def generate_cards_for_chunk(
             if verbose:
                 console.print(f"  [dim]Attempt {attempt + 1}/{max_retries}...[/dim]")
 
-            response = call_llm(client, model, prompt)
+            request_max_tokens = max_completion_tokens
+            if budget is not None:
+                budget.check(prompt_tokens)
+                request_max_tokens = budget.request_max_tokens(
+                    prompt_tokens, max_completion_tokens
+                )
+
+            llm_response = call_llm(
+                client, model, prompt, max_tokens=request_max_tokens
+            )
+            response = llm_response.text
+
+            if calibration is not None and llm_response.prompt_tokens:
+                calibration.record(model, local_prompt_tokens, llm_response.prompt_tokens)
+
+            if budget is not None:
+                budget.record(
+                    llm_response.prompt_tokens
+                    if llm_response.prompt_tokens is not None
+                    else prompt_tokens,
+                    llm_response.completion_tokens
+                    if llm_response.completion_tokens is not None
+                    else count_tokens(response),
+                )
 
             if verbose:
                 console.print("\n" + "=" * 80)
@@ -130,8 +197,7 @@ def generate_cards_for_chunk(
                 console.print(response, markup=False)
                 console.print("=" * 80 + "\n")
 
-            json_data = extract_json(response)
-            output = CardOutput.model_validate(json_data)
+            output = parse_card_output(response)
 
             return list(output.cards)
 
@@ -2,7 +2,11 @@
 
 import json
 import re
-from typing import Any
+from typing import Any, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from ..models import CardOutput
 
 
 class JSONExtractionError(Exception):
@@ -11,14 +15,149 @@ class JSONExtractionError(Exception):
     pass
 
 
+# Built once at import: validates raw JSON straight into CardOutput
+CARD_OUTPUT_ADAPTER: TypeAdapter[CardOutput] = TypeAdapter(CardOutput)
+
+# Structural characters only. Single-character alternatives cannot backtrack,
+# so a scan is linear in the response length. Named groups make the scanner
+# work identically on str and bytes.
+_STRUCTURAL_RE = re.compile(r'(?P<open>\{)|(?P<close>\})|(?P<quote>")')
+_STRUCTURAL_RE_BYTES = re.compile(rb'(?P<open>\{)|(?P<close>\})|(?P<quote>")')
+
+
+def _is_escaped(text: str | bytes, index: int) -> bool:
+    """Whether the character at index is preceded by an odd run of backslashes."""
+    backslash = 92 if isinstance(text, bytes) else "\\"
+    run = 0
+    index -= 1
+    while index >= 0 and text[index] == backslash:
+        run += 1
+        index -= 1
+    return run % 2 == 1
+
+
+def iter_json_spans(text: str | bytes) -> Iterator[tuple[int, int]]:
+    """
+    Yield (start, end) spans of balanced JSON objects in document order.
+
+    Braces inside JSON strings (including escaped quotes) are ignored, so
+    HTML/CSS payloads in card fields don't confuse the scanner. Covers pure
+    JSON, ```json fenced blocks and objects embedded in prose in one pass.
+    If an opening brace is never closed (e.g. a stray "{" in prose), the
+    outermost balanced objects after it are still reported; the text is
+    never rescanned, so the cost stays linear.
+
+    Args:
+        text: LLM response text (str or UTF-8 bytes)
+
+    Returns:
+        Iterator of half-open (start, end) index pairs
+    """
+    pattern = _STRUCTURAL_RE_BYTES if isinstance(text, bytes) else _STRUCTURAL_RE
+    # One entry per open brace: its position and the balanced objects
+    # closed directly inside it, reported only if the brace never closes
+    stack: list[tuple[int, list[tuple[int, int]]]] = []
+    in_string = False
+
+    for match in pattern.finditer(text):
+        index = match.start()
+        kind = match.lastgroup
+        if in_string:
+            if kind == "quote" and not _is_escaped(text, index):
+                in_string = False
+        elif kind == "open":
+            stack.append((index, []))
+        elif kind == "close":
+            if stack:
+                start, _ = stack.pop()
+                if stack:
+                    stack[-1][1].append((start, index + 1))
+                else:
+                    yield start, index + 1
+        elif kind == "quote" and stack:
+            # Quotes outside objects belong to prose
+            in_string = True
+
+    # Unclosed braces: their enclosed objects, outermost brace first, are
+    # already in document order
+    for _, spans in stack:
+        yield from spans
+
+
+def _is_syntax_error(error: ValidationError) -> bool:
+    """Whether a ValidationError comes from malformed JSON (not the schema)."""
+    return all(e["type"] == "json_invalid" for e in error.errors())
+
+
+def _iter_candidates(text: str | bytes) -> Iterator[tuple[int, int]]:
+    """
+    Yield candidate JSON spans, cheapest first.
+
+    The outermost first-"{" to last-"}" slice covers pure JSON, a single
+    fenced block and JSON wrapped in prose with two C-level searches. Only
+    when that fails is the structural scan needed.
+    """
+    if isinstance(text, bytes):
+        first, last = text.find(b"{"), text.rfind(b"}")
+    else:
+        first, last = text.find("{"), text.rfind("}")
+    if first == -1 or last <= first:
+        return
+
+    outer = (first, last + 1)
+    yield outer
+    for span in iter_json_spans(text):
+        if span != outer:
+            yield span
+
+
+def parse_card_output(text: str | bytes) -> CardOutput:
+    """
+    Locate and validate the CardOutput JSON in an LLM response.
+
+    Each candidate span is handed to the prebuilt TypeAdapter as raw JSON, so
+    parsing and validation happen in a single pydantic-core pass without an
+    intermediate Python dict. A response that is pure JSON is validated
+    without copying.
+
+    Args:
+        text: LLM response text (str or UTF-8 bytes)
+
+    Returns:
+        Validated CardOutput
+
+    Raises:
+        ValidationError: If JSON was found but doesn't match the card schema
+        JSONExtractionError: If no JSON object can be found
+    """
+    text = text.strip()
+    schema_error: ValidationError | None = None
+
+    for start, end in _iter_candidates(text):
+        try:
+            return CARD_OUTPUT_ADAPTER.validate_json(text[start:end])
+        except ValidationError as e:
+            if _is_syntax_error(e):
+                continue
+            # Valid JSON, wrong shape: keep looking, report if nothing fits
+            if schema_error is None:
+                schema_error = e
+
+    if schema_error is not None:
+        raise schema_error
+
+    preview = text[:500].decode("utf-8", "replace") if isinstance(text, bytes) else text[:500]
+    raise JSONExtractionError(
+        f"Failed to extract JSON from response. Response preview:\n{preview}..."
+    )
+
+
 def extract_json(text: str) -> dict[str, Any]:
     """
     Extract JSON from LLM response text.
 
-    Tries in order:
-    1. Direct parse (response is pure JSON)
-    2. Extract from ```json ... ``` code block
-    3. Find content between first { and last }
+    Returns the first balanced JSON object that parses, whether the response
+    is pure JSON, a ```json ... ``` code block, or JSON embedded in prose.
 
     Args:
         text: LLM response text
@@ -31,31 +170,12 @@ def extract_json(text: str) -> dict[str, Any]:
     """
     text = text.strip()
 
-    # Try 1: Direct parse
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    # Try 2: Extract from markdown code block
-    code_block_pattern = r"```(?:json)?\s*\n?(.*?)\n?```"
-    matches = re.findall(code_block_pattern, text, re.DOTALL)
-    for match in matches:
+    for start, end in _iter_candidates(text):
         try:
-            return json.loads(match.strip())
+            return json.loads(text[start:end])
         except json.JSONDecodeError:
             continue
 
-    # Try 3: Find { ... } content
-    first_brace = text.find("{")
-    last_brace = text.rfind("}")
-
-    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-        try:
-            return json.loads(text[first_brace : last_brace + 1])
-        except json.JSONDecodeError:
-            pass
-
     raise JSONExtractionError(
         f"Failed to extract JSON from response. Response preview:\n{text[:500]}..."
     )
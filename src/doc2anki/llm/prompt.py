@@ -1,10 +1,24 @@
 """Prompt template rendering."""
 
 import importlib.resources
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-from jinja2 import Environment, FileSystemLoader, Template, BaseLoader, TemplateNotFound
+from jinja2 import (
+    BaseLoader,
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+)
+
+from ..config import get_cache_dir
 
 
 class PackageLoader(BaseLoader):
@@ -13,24 +27,77 @@ class PackageLoader(BaseLoader):
     def __init__(self, package: str, path: str = ""):
         self.package = package
         self.path = path
+        # Package resources don't change while the process runs
+        self._sources: dict[str, str] = {}
 
     def get_source(self, environment, template):
-        try:
-            package_path = f"{self.package}.{self.path}" if self.path else self.package
-            files = importlib.resources.files(package_path)
-            source = (files / template).read_text(encoding="utf-8")
-            return source, template, lambda: True
-        except (FileNotFoundError, ModuleNotFoundError) as e:
-            raise TemplateNotFound(template) from e
+        source = self._sources.get(template)
+        if source is None:
+            try:
+                package_path = f"{self.package}.{self.path}" if self.path else self.package
+                files = importlib.resources.files(package_path)
+                source = (files / template).read_text(encoding="utf-8")
+            except (FileNotFoundError, ModuleNotFoundError) as e:
+                raise TemplateNotFound(template) from e
+            self._sources[template] = source
+        return source, template, lambda: True
 
 
 DEFAULT_TEMPLATE_NAME = "generate_cards.j2"
 
+# Marker rendered in place of a per-chunk value: (probe number, slot name)
+_SLOT_MARKER = "\x00doc2anki:{}:{}\x00"
+_SLOT_RE = re.compile(r"\x00doc2anki:(\d+):(\w+)\x00")
+
+# Distinct (template, global_context, prompt shape) entries kept
+_STATIC_PARTS_CACHE_SIZE = 64
+
+
+def _bytecode_cache() -> Optional[BytecodeCache]:
+    """On-disk bytecode cache for custom templates, if the cache dir is writable."""
+    cache_dir = get_cache_dir() / "jinja"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(str(cache_dir))
+
+
+@lru_cache(maxsize=None)
+def _package_environment() -> Environment:
+    """Environment for the built-in template (one per process)."""
+    return Environment(
+        loader=PackageLoader("doc2anki", "templates"),
+        autoescape=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def _filesystem_environment(template_dir: Path) -> Environment:
+    """Environment for custom templates in a directory (one per process)."""
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=False,
+        bytecode_cache=_bytecode_cache(),
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_template_cached(template_path: Optional[Path]) -> Template:
+    if template_path:
+        env = _filesystem_environment(template_path.parent)
+        return env.get_template(template_path.name)
+    return _package_environment().get_template(DEFAULT_TEMPLATE_NAME)
+
 
 def load_template(template_path: Optional[Path] = None) -> Template:
     """
     Load Jinja2 template for card generation.
 
+    Templates are compiled once per process. Custom templates also use an
+    on-disk bytecode cache under $XDG_CACHE_HOME/doc2anki/jinja, so later
+    runs skip parsing and compiling them.
+
     Args:
         template_path: Custom template path, or None for default (from package)
 
@@ -38,22 +105,105 @@ def load_template(template_path: Optional[Path] = None) -> Template:
         Jinja2 Template object
     """
     if template_path:
-        # Custom template: use FileSystemLoader
-        template_dir = template_path.parent
-        template_name = template_path.name
-        env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=False,
-        )
-    else:
-        # Default template: load from package resources
-        env = Environment(
-            loader=PackageLoader("doc2anki", "templates"),
-            autoescape=False,
+        template_path = template_path.resolve()
+    return _load_template_cached(template_path)
+
+
+def _freeze(value: Any) -> Any:
+    """Turn template context values into a hashable cache key."""
+    if isinstance(value, dict):
+        return ("dict", tuple((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return (type(value).__name__, tuple(_freeze(v) for v in value))
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return (type(value).__name__, repr(value))
+
+
+@dataclass(frozen=True)
+class _StaticParts:
+    """Pre-rendered prompt: texts[0] + value(slots[0]) + texts[1] + ..."""
+
+    texts: tuple[str, ...]
+    slots: tuple[str, ...]
+
+    def fill(self, values: dict[str, str]) -> str:
+        out = [self.texts[0]]
+        for slot, text in zip(self.slots, self.texts[1:]):
+            out.append(values[slot])
+            out.append(text)
+        return "".join(out)
+
+
+def _slot_values(chunk: str, parent_chain: list[str], accumulated_context: str) -> dict[str, str]:
+    values = {"chunk": chunk, "context": accumulated_context}
+    for i, title in enumerate(parent_chain):
+        values[f"chain{i}"] = title
+    return values
+
+
+# (template, context key, chain length, has accumulated context) -> parts or None
+_STATIC_PARTS_CACHE: OrderedDict[tuple[Any, ...], Optional[_StaticParts]] = OrderedDict()
+
+
+def _static_parts(
+    template: Template,
+    global_context: dict[str, Any],
+    chain_length: int,
+    has_context: bool,
+) -> Optional[_StaticParts]:
+    """
+    Pre-render everything except the per-chunk values.
+
+    The template is rendered with markers in place of chunk_content, each
+    parent_chain title and accumulated_context, so one entry serves every
+    chunk with the same global_context and prompt shape (chain length,
+    whether there is accumulated context). That is only sound for a
+    template that branches on the shape alone, not on the text or length
+    of the values, which no render can prove: custom templates always get
+    None and are rendered in full.
+
+    Returns None if the template doesn't emit the values verbatim (e.g. it
+    filters them); a second render with other markers checks this.
+    """
+    if template is not _load_template_cached(None):
+        return None
+
+    key = (template, _freeze(global_context), chain_length, has_context)
+    if key in _STATIC_PARTS_CACHE:
+        _STATIC_PARTS_CACHE.move_to_end(key)
+        return _STATIC_PARTS_CACHE[key]
+
+    def render(probe: int) -> str:
+        def marker(slot: str) -> str:
+            return _SLOT_MARKER.format(probe, slot)
+
+        return template.render(
+            global_context=global_context,
+            chunk_content=marker("chunk"),
+            parent_chain=[marker(f"chain{i}") for i in range(chain_length)],
+            accumulated_context=marker("context") if has_context else "",
         )
-        template_name = DEFAULT_TEMPLATE_NAME
 
-    return env.get_template(template_name)
+    # re.split with two groups: text, probe, slot, text, probe, slot, ..., text
+    pieces = _SLOT_RE.split(render(0))
+    texts = tuple(pieces[0::3])
+    probes = pieces[1::3]
+    slots = tuple(pieces[2::3])
+    parts: Optional[_StaticParts] = None
+    if all(probe == "0" for probe in probes):
+        candidate = _StaticParts(texts, slots)
+        probe_values = {
+            slot: _SLOT_MARKER.format(1, slot)
+            for slot in _slot_values("", [""] * chain_length, "")
+        }
+        if render(1) == candidate.fill(probe_values):
+            parts = candidate
+
+    _STATIC_PARTS_CACHE[key] = parts
+    if len(_STATIC_PARTS_CACHE) > _STATIC_PARTS_CACHE_SIZE:
+        _STATIC_PARTS_CACHE.popitem(last=False)
+    return parts
 
 
 def build_prompt(
@@ -61,21 +211,37 @@ def build_prompt(
     chunk: str,
     template: Template,
     parent_chain: Optional[list[str]] = None,
+    accumulated_context: str = "",
 ) -> str:
     """
     Build prompt for LLM from template.
 
+    For the bundled template, the static parts of the prompt are rendered
+    once per global_context and prompt shape and reused; chunk_content, the
+    parent_chain titles and accumulated_context are spliced in per chunk.
+    Custom templates may depend on the values' text and are rendered in full.
+
     Args:
         global_context: Document-level context dict
         chunk: Content chunk to process
         template: Jinja2 template
         parent_chain: Heading hierarchy for context (optional)
+        accumulated_context: Content of earlier FULL/CONTEXT_ONLY sections
 
     Returns:
         Rendered prompt string
     """
-    return template.render(
-        global_context=global_context,
-        chunk_content=chunk,
-        parent_chain=parent_chain or [],
+    parent_chain = parent_chain or []
+    parts = _static_parts(
+        template, global_context, len(parent_chain), bool(accumulated_context)
     )
+
+    if parts is None:
+        return template.render(
+            global_context=global_context,
+            chunk_content=chunk,
+            parent_chain=parent_chain,
+            accumulated_context=accumulated_context,
+        )
+
+    return parts.fill(_slot_values(chunk, parent_chain, accumulated_context))
@@ -0,0 +1,280 @@
+"""Context window guard for rendered prompts.
+
+--max-tokens only bounds chunk content. The rendered prompt also carries
+the template text, document metadata and (in interactive mode) the
+accumulated context, so it is measured here before any request is sent.
+"""
+
+import math
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator, Optional
+
+from jinja2 import Template
+
+from ..parser.chunker import ChunkingError, count_tokens
+from ..pipeline.context import ChunkWithContext
+from .client import DEFAULT_MAX_COMPLETION_TOKENS
+from .prompt import build_prompt
+
+
+@dataclass
+class WindowAdjustment:
+    """One change made to fit a chunk into the context window."""
+
+    chunk_index: int  # 1-based index in the original chunk list
+    parent_chain: tuple[str, ...]
+    action: str  # "trim_context" or "split"
+    tokens_before: int
+    tokens_after: int
+    detail: str = ""
+
+    def describe(self) -> str:
+        chain = " > ".join(self.parent_chain) if self.parent_chain else "(root)"
+        return (
+            f"chunk {self.chunk_index} ({chain}): {self.detail} "
+            f"[{self.tokens_before:,} -> {self.tokens_after:,} prompt tokens]"
+        )
+
+
+def completion_reserve(context_window: int) -> int:
+    """Completion tokens to reserve for a model with this context window."""
+    return min(DEFAULT_MAX_COMPLETION_TOKENS, context_window // 4)
+
+
+class PromptMeasure:
+    """Renders and counts prompts for chunks with fixed template settings."""
+
+    def __init__(
+        self,
+        template: Template,
+        include_parent_chain: bool = True,
+        token_scale: float = 1.0,
+    ):
+        self.template = template
+        self.include_parent_chain = include_parent_chain
+        self.token_scale = token_scale
+
+    def render(self, chunk: ChunkWithContext) -> str:
+        return build_prompt(
+            dict(chunk.metadata.raw_data) if chunk.metadata.raw_data else {},
+            chunk.chunk_content,
+            self.template,
+            list(chunk.parent_chain) if self.include_parent_chain else None,
+            chunk.accumulated_context,
+        )
+
+    def tokens(self, chunk: ChunkWithContext) -> int:
+        """Estimated provider tokens of the rendered prompt."""
+        return math.ceil(count_tokens(self.render(chunk)) * self.token_scale)
+
+
+def _trim_context(
+    chunk: ChunkWithContext, measure: PromptMeasure, limit: int, tokens: int
+) -> tuple[ChunkWithContext, int, int]:
+    """
+    Drop the oldest accumulated-context sections until the prompt fits.
+
+    Sections are chunk.context_sections, so a heading is never kept
+    without its body. Chunks built without them (accumulated_context set
+    directly) are trimmed by paragraph instead.
+
+    Returns (chunk, prompt tokens, sections or paragraphs dropped).
+    """
+    by_section = bool(chunk.context_sections)
+    if by_section:
+        sections = list(chunk.context_sections)
+    else:
+        sections = chunk.accumulated_context.strip().split("\n\n")
+    dropped = 0
+
+    while tokens > limit and dropped < len(sections):
+        # Drop at least enough sections to cover the excess, then re-measure
+        excess = tokens - limit
+        removed = 0
+        while dropped < len(sections) and removed < excess:
+            removed += count_tokens(sections[dropped]) * measure.token_scale
+            dropped += 1
+        chunk = replace(
+            chunk,
+            accumulated_context="\n\n".join(sections[dropped:]),
+            context_sections=tuple(sections[dropped:]) if by_section else (),
+        )
+        tokens = measure.tokens(chunk)
+
+    return chunk, tokens, dropped
+
+
+def _split_content(content: str, content_limit: int) -> list[str]:
+    """
+    Split chunk content into pieces of at most content_limit tokens.
+
+    Splits on blank lines first, then on single lines.
+
+    Raises:
+        ChunkingError: If a single line exceeds the limit
+    """
+    pieces: list[str] = []
+    for separator in ("\n\n", "\n"):
+        parts = content.split(separator)
+        if len(parts) > 1:
+            break
+    else:
+        raise ChunkingError(
+            f"Chunk content cannot be split to fit the context window "
+            f"({count_tokens(content)} tokens, {content_limit} available):\n"
+            f"{content[:200]}..."
+        )
+
+    current: list[str] = []
+    current_tokens = 0
+    for part in parts:
+        part_tokens = count_tokens(part)
+        if part_tokens > content_limit:
+            if current:
+                pieces.append(separator.join(current))
+                current, current_tokens = [], 0
+            pieces.extend(_split_content(part, content_limit))
+            continue
+        if current and current_tokens + part_tokens > content_limit:
+            pieces.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += part_tokens
+    if current:
+        pieces.append(separator.join(current))
+
+    return [p for p in pieces if p.strip()]
+
+
+def fit_chunks_to_window(
+    chunks: list[ChunkWithContext],
+    template: Template,
+    context_window: int,
+    include_parent_chain: bool = True,
+    reserved_output_tokens: Optional[int] = None,
+    token_scale: float = 1.0,
+) -> tuple[list[ChunkWithContext], list[WindowAdjustment]]:
+    """
+    Make every rendered prompt fit the model's context window.
+
+    For each chunk whose rendered prompt plus the completion reserve exceeds
+    context_window:
+    1. Trim accumulated context, oldest sections first
+    2. If still too large, split the chunk content at paragraph/line
+       boundaries into several chunks
+
+    Args:
+        chunks: Chunks ready for prompting
+        template: Prompt template
+        context_window: Model context limit in tokens
+        include_parent_chain: Whether prompts include the heading hierarchy
+        reserved_output_tokens: Tokens kept free for the completion
+                                (default: completion_reserve(context_window))
+        token_scale: Provider tokens per local token (from TokenCalibration)
+
+    Returns:
+        Tuple of (adjusted chunks, adjustments made)
+
+    Raises:
+        ChunkingError: If a prompt cannot be made to fit
+    """
+    adjustments: list[WindowAdjustment] = []
+    result = list(
+        iter_fit_chunks_to_window(
+            chunks,
+            adjustments,
+            template=template,
+            context_window=context_window,
+            include_parent_chain=include_parent_chain,
+            reserved_output_tokens=reserved_output_tokens,
+            token_scale=token_scale,
+        )
+    )
+    return result, adjustments
+
+
+def iter_fit_chunks_to_window(
+    chunks: Iterable[ChunkWithContext],
+    adjustments: list[WindowAdjustment],
+    template: Template,
+    context_window: int,
+    include_parent_chain: bool = True,
+    reserved_output_tokens: Optional[int] = None,
+    token_scale: float = 1.0,
+) -> Iterator[ChunkWithContext]:
+    """
+    Lazy fit_chunks_to_window: adjusts each chunk as it is consumed.
+
+    Args:
+        chunks: Chunks ready for prompting, possibly a lazy iterator
+        adjustments: Receives the adjustments as they are made
+        (others as for fit_chunks_to_window)
+
+    Returns:
+        Iterator of adjusted chunks
+
+    Raises:
+        ChunkingError: If a prompt cannot be made to fit (while iterating)
+    """
+    if reserved_output_tokens is None:
+        reserved_output_tokens = completion_reserve(context_window)
+    limit = context_window - reserved_output_tokens
+    measure = PromptMeasure(template, include_parent_chain, token_scale)
+
+    for index, chunk in enumerate(chunks, 1):
+        tokens = measure.tokens(chunk)
+        if tokens <= limit:
+            yield chunk
+            continue
+
+        original_tokens = tokens
+        if chunk.accumulated_context.strip():
+            unit = "section" if chunk.context_sections else "paragraph"
+            chunk, tokens, dropped = _trim_context(chunk, measure, limit, tokens)
+            adjustments.append(
+                WindowAdjustment(
+                    chunk_index=index,
+                    parent_chain=chunk.parent_chain,
+                    action="trim_context",
+                    tokens_before=original_tokens,
+                    tokens_after=tokens,
+                    detail=f"dropped {dropped} oldest context {unit}(s)",
+                )
+            )
+            if tokens <= limit:
+                yield chunk
+                continue
+
+        overhead = measure.tokens(replace(chunk, chunk_content=""))
+        # _split_content counts local tokens
+        content_limit = int((limit - overhead) / token_scale)
+        if content_limit <= 0:
+            raise ChunkingError(
+                f"Prompt template and document context alone need {overhead} tokens, "
+                f"exceeding the {limit} tokens available in the context window "
+                f"({context_window} minus {reserved_output_tokens} for the completion)"
+            )
+
+        pieces: list[ChunkWithContext] = []
+        pending = _split_content(chunk.chunk_content, content_limit)
+        while pending:
+            piece = replace(chunk, chunk_content=pending.pop(0))
+            piece_tokens = measure.tokens(piece)
+            if piece_tokens > limit:
+                # Joining text can add a few tokens: split once more
+                content_limit = max(content_limit - (piece_tokens - limit), 1)
+                pending[:0] = _split_content(piece.chunk_content, content_limit)
+                continue
+            pieces.append(piece)
+
+        adjustments.append(
+            WindowAdjustment(
+                chunk_index=index,
+                parent_chain=chunk.parent_chain,
+                action="split",
+                tokens_before=tokens,
+                tokens_after=max(measure.tokens(p) for p in pieces),
+                detail=f"split into {len(pieces)} chunks",
+            )
+        )
+        yield from pieces
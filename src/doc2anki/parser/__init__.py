@@ -1,16 +1,73 @@
-"""Document parsing module for doc2anki."""
+"""Document parsing module for doc2anki.
 
+Format backends (tree-sitter for Markdown, the Org scanner) and the
+tokenizer are imported on first use: MarkdownParser, OrgParser, the
+chunker functions and friends are resolved lazily by __getattr__.
+"""
+
+from importlib import import_module
 from pathlib import Path
-import re
+from typing import TYPE_CHECKING, Any
 
-from .tree import HeadingNode, DocumentTree
+from .tree import HeadingNode, DocumentTree, TreeIndex
 from .metadata import DocumentMetadata
 from .builder import TreeBuilder
-from .markdown import MarkdownParser
-from .markdown import build_tree as build_markdown_tree
-from .orgmode import OrgParser
-from .orgmode import build_tree as build_org_tree
-from .chunker import chunk_document, count_tokens, ChunkingError
+from .compact import CompactNode, CompactTree, CompactTreeBuilder
+from .diff import NodeChange, TreeDiff, diff_trees
+from .pool import (
+    ENTRY_POINT_GROUP,
+    ParserSpec,
+    clear_parsers,
+    get_parser,
+    register_parser,
+    registered_extensions,
+    registered_formats,
+)
+from .sniff import format_from_extension, sniff_file, sniff_format
+
+if TYPE_CHECKING:
+    from .chunker import (
+        ChunkingError,
+        TokenCacheInfo,
+        chunk_document,
+        clear_token_cache,
+        count_tokens,
+        count_tokens_batch,
+        set_tokenizer_threads,
+        token_cache_info,
+    )
+    from .incremental import IncrementalParse
+    from .markdown import MarkdownParser
+    from .markdown import build_tree as build_markdown_tree
+    from .orgmode import OrgParser
+    from .orgmode import build_tree as build_org_tree
+
+# Public name -> (submodule, attribute), imported on first access
+_LAZY_ATTRIBUTES = {
+    "MarkdownParser": (".markdown", "MarkdownParser"),
+    "build_markdown_tree": (".markdown", "build_tree"),
+    "IncrementalParse": (".incremental", "IncrementalParse"),
+    "OrgParser": (".orgmode", "OrgParser"),
+    "build_org_tree": (".orgmode", "build_tree"),
+    "chunk_document": (".chunker", "chunk_document"),
+    "count_tokens": (".chunker", "count_tokens"),
+    "count_tokens_batch": (".chunker", "count_tokens_batch"),
+    "set_tokenizer_threads": (".chunker", "set_tokenizer_threads"),
+    "ChunkingError": (".chunker", "ChunkingError"),
+    "TokenCacheInfo": (".chunker", "TokenCacheInfo"),
+    "token_cache_info": (".chunker", "token_cache_info"),
+    "clear_token_cache": (".chunker", "clear_token_cache"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module, __name__), attribute)
+    globals()[name] = value
+    return value
 
 
 def build_document_tree(source: str | Path, format: str | None = None) -> DocumentTree:
@@ -19,7 +76,7 @@ def build_document_tree(source: str | Path, format: str | None = None) -> Docume
 
     Args:
         source: Document content string or Path to file
-        format: Document format ("markdown" or "org").
+        format: Document format ("markdown", "org" or a plugin format).
                 If None, auto-detect from file extension or content.
 
     Returns:
@@ -28,42 +85,49 @@ def build_document_tree(source: str | Path, format: str | None = None) -> Docume
     Raises:
         ValueError: If format is not supported or cannot be detected
     """
-    # Determine format
-    if format is None:
-        if isinstance(source, Path):
-            suffix = source.suffix.lower()
-            if suffix == ".md":
-                format = "markdown"
-            elif suffix == ".org":
-                format = "org"
-            else:
-                # Try to detect from content
-                content = source.read_text(encoding="utf-8")
-                format = detect_format(content)
-        else:
-            format = detect_format(source)
-
-    # Parse based on format
-    if format in ("markdown", "md"):
-        parser = MarkdownParser()
-        return parser.parse(source)
-    elif format in ("org", "orgmode"):
-        parser = OrgParser()
-        return parser.parse(source)
-    else:
-        raise ValueError(f"Unsupported format: {format}. Supported: markdown, org")
+    # Parse with this thread's cached parser
+    return get_parser(_resolve_format(source, format)).parse(source)
+
+
+def build_compact_tree(source: str | Path, format: str | None = None) -> CompactTree:
+    """
+    Build a CompactTree from document content or file.
+
+    Same parsing as build_document_tree, but the result keeps all content
+    in one shared buffer with flat per-node arrays, for very large documents.
+
+    Args:
+        source: Document content string or Path to file
+        format: Document format ("markdown", "org" or a plugin format).
+                If None, auto-detect from file extension or content.
+
+    Returns:
+        CompactTree whose nodes are read-only HeadingNode-like views
+
+    Raises:
+        ValueError: If format is not supported or cannot be detected
+    """
+    return get_parser(_resolve_format(source, format)).parse_compact(source)
+
+
+def _resolve_format(source: str | Path, format: str | None) -> str:
+    """Explicit format, else from the file extension, else from the content."""
+    if format is not None:
+        return format
+    if isinstance(source, Path):
+        # Unknown extension: sniff the first few KB only
+        return sniff_file(source)
+    return sniff_format(source)
 
 
 def detect_format(content: str) -> str:
     """
     Detect document format from content.
 
-    Returns "markdown" or "org" based on heading patterns.
+    Returns "markdown" or "org" based on the headings near the start of
+    the content (see sniff_format).
     """
-    md_headings = len(re.findall(r"^#{1,6}\s+.+$", content, re.MULTILINE))
-    org_headings = len(re.findall(r"^\*+\s+.+$", content, re.MULTILINE))
-
-    return "org" if org_headings > md_headings else "markdown"
+    return sniff_format(content)
 
 
 __all__ = [
@@ -72,14 +136,38 @@ __all__ = [
     "DocumentTree",
     "DocumentMetadata",
     "TreeBuilder",
+    "TreeIndex",
+    "CompactTree",
+    "CompactNode",
+    "CompactTreeBuilder",
     # Parsers
     "MarkdownParser",
+    "IncrementalParse",
     "OrgParser",
+    "get_parser",
+    "clear_parsers",
+    "ParserSpec",
+    "register_parser",
+    "registered_formats",
+    "registered_extensions",
+    "ENTRY_POINT_GROUP",
     # Functions
     "build_document_tree",
+    "build_compact_tree",
+    "diff_trees",
+    "TreeDiff",
+    "NodeChange",
     "detect_format",
+    "sniff_format",
+    "sniff_file",
+    "format_from_extension",
     # Chunking
     "chunk_document",
     "count_tokens",
+    "count_tokens_batch",
+    "set_tokenizer_threads",
     "ChunkingError",
+    "TokenCacheInfo",
+    "token_cache_info",
+    "clear_token_cache",
 ]
@@ -25,7 +25,12 @@ class MutableNode:
 
     def freeze(self, parent_titles: tuple[str, ...] = ()) -> "HeadingNode":
         """
-        Convert to immutable HeadingNode (recursive).
+        Convert to immutable HeadingNode (including all descendants).
+
+        Children are frozen before their parents using an explicit stack,
+        so deep trees don't hit the recursion limit. Each node's
+        content_hash and Merkle subtree_hash are computed on the way, from
+        the already frozen children.
 
         Args:
             parent_titles: Tuple of ancestor heading titles
@@ -36,18 +41,27 @@ class MutableNode:
         # Import here to avoid circular dependency
         from .tree import HeadingNode
 
-        frozen_children = tuple(
-            child.freeze(parent_titles=(*parent_titles, self.title))
-            for child in self.children
-        )
-
-        return HeadingNode(
-            level=self.level,
-            title=self.title,
-            content=self.content,
-            children=frozen_children,
-            parent_titles=parent_titles,
-        )
+        # Frames: (node, its parent_titles, remaining children, frozen children)
+        stack = [(self, parent_titles, iter(self.children), [])]
+        while True:
+            node, titles, pending, frozen_children = stack[-1]
+            child = next(pending, None)
+            if child is not None:
+                stack.append((child, (*titles, node.title), iter(child.children), []))
+                continue
+
+            stack.pop()
+            frozen = HeadingNode(
+                level=node.level,
+                title=node.title,
+                content=node.content,
+                children=tuple(frozen_children),
+                parent_titles=titles,
+            )
+            frozen.subtree_hash  # children are hashed already: O(own text)
+            if not stack:
+                return frozen
+            stack[-1][3].append(frozen)
 
 
 class TreeBuilder:
@@ -136,9 +150,12 @@ class TreeBuilder:
 
         frozen_children = tuple(node.freeze() for node in self._root_children)
 
-        return DocumentTree(
+        tree = DocumentTree(
             children=frozen_children,
             preamble="\n".join(self._preamble_lines).strip(),
             metadata=self._metadata,
             source_format=self._source_format,
         )
+        # Level/path/ordinal lookups are O(1) from here on
+        tree.index
+        return tree
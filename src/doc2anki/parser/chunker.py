@@ -1,20 +1,232 @@
-"""Document chunking with token counting."""
+"""Document chunking with token counting.
 
+Token counts are shared across the pipeline through a bounded LRU cache
+keyed by a digest of the text: the chunker, compression stats, verbose
+output and the interactive summary all count the same sections, and each
+text is only tokenized once per process. count_tokens_batch counts many
+texts in one call, tokenizing the misses on a thread pool.
+"""
+
+import hashlib
+import os
 import re
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Optional, Sequence
 
-import tiktoken
 from rich.console import Console
 
+from .sniff import sniff_format
+
 console = Console()
 
-# Use cl100k_base encoding (compatible with GPT-4, Claude, etc.)
-_encoder = tiktoken.get_encoding("cl100k_base")
+
+@cache
+def _get_encoder() -> Any:
+    """The cl100k_base encoding (compatible with GPT-4, Claude, etc.), loaded on first use."""
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+# Distinct texts whose token counts are kept (a few MB of digests)
+TOKEN_CACHE_SIZE = 65536
+
+# Upper bound on tokenizer threads when counting batches
+MAX_TOKENIZER_THREADS = 8
+
+# Batches with fewer characters to tokenize are counted in the calling thread
+PARALLEL_MIN_CHARS = 256 * 1024
+
+# Tokenizer threads for count_tokens_batch; 0 = one per available CPU
+_tokenizer_threads = 0
+
+
+def set_tokenizer_threads(threads: int) -> None:
+    """
+    Set how many threads count_tokens_batch uses by default.
+
+    Worker processes set this to 1, since the processes already occupy
+    every CPU.
+
+    Args:
+        threads: Thread count (0 = one per available CPU, at most
+                 MAX_TOKENIZER_THREADS)
+    """
+    global _tokenizer_threads
+    _tokenizer_threads = threads
+
+
+def _default_threads() -> int:
+    if _tokenizer_threads > 0:
+        return _tokenizer_threads
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return min(cpus, MAX_TOKENIZER_THREADS)
+
+
+def _digest(text: str) -> bytes:
+    # Digest rather than the text itself, so cached sections aren't kept alive
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _encode_length(text: str) -> int:
+    # encode_ordinary: special-token markup in a document is just text
+    return len(_get_encoder().encode_ordinary(text))
+
+
+def _encode_lengths(texts: list[str]) -> list[int]:
+    return [_encode_length(text) for text in texts]
+
+
+def _encode_lengths_parallel(texts: list[str], threads: int) -> list[int]:
+    """
+    Token counts of texts, tokenized on a thread pool.
+
+    tiktoken releases the GIL while encoding. Each task counts a slice of
+    texts and keeps only the lengths, so at most one token list per thread
+    is alive at a time (encode_ordinary_batch would hold all of them).
+    """
+    if threads <= 1 or len(texts) <= 1 or sum(map(len, texts)) < PARALLEL_MIN_CHARS:
+        return _encode_lengths(texts)
+
+    _get_encoder()  # Load once, not in every thread
+    # A few slices per thread, so one long text doesn't leave the others idle
+    step = max(1, -(-len(texts) // (threads * 4)))
+    slices = [texts[i : i + step] for i in range(0, len(texts), step)]
+    with ThreadPoolExecutor(threads, thread_name_prefix="tokenizer") as executor:
+        return [tokens for lengths in executor.map(_encode_lengths, slices) for tokens in lengths]
+
+
+@dataclass(frozen=True)
+class TokenCacheInfo:
+    """Token cache statistics for this process."""
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _TokenCache:
+    """Thread-safe LRU of text digest -> token count."""
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.counts: OrderedDict[bytes, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _lookup(self, key: bytes) -> Optional[int]:
+        """Cached count (caller holds the lock)."""
+        tokens = self.counts.get(key)
+        if tokens is None:
+            self.misses += 1
+        else:
+            self.counts.move_to_end(key)
+            self.hits += 1
+        return tokens
+
+    def _store(self, key: bytes, tokens: int) -> None:
+        """Insert a count, evicting the least recently used (caller holds the lock)."""
+        self.counts[key] = tokens
+        if len(self.counts) > self.maxsize:
+            self.counts.popitem(last=False)
+
+    def count(self, text: str) -> int:
+        key = _digest(text)
+        with self.lock:
+            tokens = self._lookup(key)
+        if tokens is not None:
+            return tokens
+
+        # Tokenize outside the lock; a concurrent miss on the same text is harmless
+        tokens = _encode_length(text)
+        with self.lock:
+            self._store(key, tokens)
+        return tokens
+
+    def count_batch(self, texts: list[str], threads: int) -> list[int]:
+        keys = [_digest(text) for text in texts]
+        counts: list[Optional[int]] = [None] * len(texts)
+        missing: dict[bytes, list[int]] = {}  # key -> positions, each text tokenized once
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in missing:
+                    missing[key].append(i)
+                    self.hits += 1
+                    continue
+                counts[i] = self._lookup(key)
+                if counts[i] is None:
+                    missing[key] = [i]
+
+        if missing:
+            lengths = _encode_lengths_parallel(
+                [texts[positions[0]] for positions in missing.values()], threads
+            )
+            with self.lock:
+                for (key, positions), tokens in zip(missing.items(), lengths):
+                    self._store(key, tokens)
+                    for i in positions:
+                        counts[i] = tokens
+        return counts  # type: ignore[return-value]
+
+    def info(self) -> TokenCacheInfo:
+        with self.lock:
+            return TokenCacheInfo(self.hits, self.misses, len(self.counts), self.maxsize)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.counts.clear()
+            self.hits = self.misses = 0
+
+
+_token_cache = _TokenCache()
 
 
 def count_tokens(text: str) -> int:
-    """Count tokens in text using tiktoken."""
-    return len(_encoder.encode(text))
+    """Count tokens in text using tiktoken (cached by content)."""
+    return _token_cache.count(text)
+
+
+def count_tokens_batch(texts: Sequence[str], threads: Optional[int] = None) -> list[int]:
+    """
+    Count tokens of many texts at once, tokenizing cache misses in parallel.
+
+    Equivalent to [count_tokens(t) for t in texts], but duplicates are
+    tokenized once and, for large batches, the misses are spread over a
+    thread pool. Use it for all blocks of a document or of a directory.
+
+    Args:
+        texts: Texts to count
+        threads: Tokenizer threads (None = set_tokenizer_threads default)
+
+    Returns:
+        Token count of each text, in order
+    """
+    return _token_cache.count_batch(list(texts), threads or _default_threads())
+
+
+def token_cache_info() -> TokenCacheInfo:
+    """Hits, misses and size of this process's token cache."""
+    return _token_cache.info()
+
+
+def clear_token_cache() -> None:
+    """Empty the token cache and reset its statistics."""
+    _token_cache.clear()
 
 
 class ChunkingError(Exception):
@@ -23,7 +235,9 @@ class ChunkingError(Exception):
     pass
 
 
-def chunk_document(content: str, max_tokens: int = 3000) -> list[str]:
+def chunk_document(
+    content: str, max_tokens: int = 3000, format: Optional[str] = None
+) -> list[str]:
     """
     Chunk document content respecting token limits.
 
@@ -35,6 +249,7 @@ def chunk_document(content: str, max_tokens: int = 3000) -> list[str]:
     Args:
         content: Document content (without context block)
         max_tokens: Maximum tokens per chunk
+        format: "markdown" or "org"; sniffed once from content if None
 
     Returns:
         List of content chunks, each under max_tokens
@@ -49,8 +264,12 @@ def chunk_document(content: str, max_tokens: int = 3000) -> list[str]:
     if count_tokens(content) <= max_tokens:
         return [content]
 
+    # Detect the format once; recursive calls reuse it
+    if format is None:
+        format = sniff_format(content)
+
     # Try to split by headings (works for both Markdown and Org)
-    chunks = split_by_headings(content)
+    chunks = split_by_headings(content, format)
 
     if len(chunks) == 1 and chunks[0] == content:
         # Could not split further - this is an atomic block that's too large
@@ -68,27 +287,25 @@ def chunk_document(content: str, max_tokens: int = 3000) -> list[str]:
             result.append(chunk)
         else:
             # Try to recursively split this chunk
-            sub_chunks = chunk_document(chunk, max_tokens)
+            sub_chunks = chunk_document(chunk, max_tokens, format)
             result.extend(sub_chunks)
 
     return result
 
 
-def split_by_headings(content: str) -> list[str]:
+def split_by_headings(content: str, format: Optional[str] = None) -> list[str]:
     """
     Split content by the top-level headings found.
 
     Works for both Markdown (# ## ###) and Org-mode (* ** ***).
-    Detects format automatically.
+    Detects format from the start of the content if not given.
     """
-    # Detect if it's Markdown or Org-mode by checking heading patterns
-    md_headings = re.findall(r"^#{1,6}\s+.+$", content, re.MULTILINE)
-    org_headings = re.findall(r"^\*+\s+.+$", content, re.MULTILINE)
+    if format is None:
+        format = sniff_format(content)
 
-    if len(md_headings) >= len(org_headings):
-        return split_markdown_by_headings(content)
-    else:
+    if format in ("org", "orgmode"):
         return split_org_by_headings(content)
+    return split_markdown_by_headings(content)
 
 
 def split_markdown_by_headings(content: str) -> list[str]:
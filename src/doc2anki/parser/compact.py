@@ -0,0 +1,404 @@
+"""Compact, array-backed document tree for very large documents.
+
+DocumentTree stores a content string and a parent_titles tuple per
+HeadingNode. CompactTree keeps every section's content in one shared text
+buffer and describes nodes with flat arrays in document order: level,
+interned title id, (start, end) offsets into the buffer, parent index and
+the index one past the node's last descendant. Paths, children and
+full_content are resolved on demand through CompactNode views, which
+expose the read-only HeadingNode API.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from .metadata import DocumentMetadata
+from .tree import DocumentTree, HeadingNode, _merkle_hash, _sha256
+
+# Levels are stored as unsigned 16-bit integers
+_MAX_LEVEL = 0xFFFF
+
+
+def _count_own_tokens(node: CompactNode) -> int:
+    from .chunker import count_tokens
+
+    return count_tokens(node.own_text)
+
+
+def _count_subtree_tokens(node: CompactNode) -> int:
+    from .chunker import count_tokens
+
+    return count_tokens(node.full_content)
+
+
+class CompactNode:
+    """Read-only HeadingNode view of one CompactTree node."""
+
+    __slots__ = ("_tree", "_index")
+
+    def __init__(self, tree: CompactTree, index: int):
+        self._tree = tree
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        """Position of the node in document order."""
+        return self._index
+
+    @property
+    def level(self) -> int:
+        return self._tree.levels[self._index]
+
+    @property
+    def title(self) -> str:
+        return self._tree.titles[self._tree.title_ids[self._index]]
+
+    @property
+    def content(self) -> str:
+        tree = self._tree
+        return tree.text[tree.starts[self._index] : tree.ends[self._index]]
+
+    @property
+    def children(self) -> tuple[CompactNode, ...]:
+        return tuple(CompactNode(self._tree, i) for i in self._tree.child_indexes(self._index))
+
+    @property
+    def parent(self) -> Optional[CompactNode]:
+        parent = self._tree.parents[self._index]
+        return CompactNode(self._tree, parent) if parent >= 0 else None
+
+    @property
+    def parent_titles(self) -> tuple[str, ...]:
+        tree = self._tree
+        titles: list[str] = []
+        parent = tree.parents[self._index]
+        while parent >= 0:
+            titles.append(tree.titles[tree.title_ids[parent]])
+            parent = tree.parents[parent]
+        return tuple(reversed(titles))
+
+    @property
+    def path(self) -> tuple[str, ...]:
+        """Heading hierarchy as immutable tuple of titles."""
+        return (*self.parent_titles, self.title)
+
+    @property
+    def depth(self) -> int:
+        """Depth in tree (0 for top-level nodes)."""
+        depth = 0
+        parent = self._tree.parents[self._index]
+        while parent >= 0:
+            depth += 1
+            parent = self._tree.parents[parent]
+        return depth
+
+    @property
+    def full_content(self) -> str:
+        """Heading line, content and all descendants (same format as HeadingNode)."""
+        tree = self._tree
+        key = ("full_content", self._index)
+        cached = tree._memo.get(key)
+        if cached is None:
+            # Descendants are contiguous in document order
+            cached = tree._memo[key] = "\n\n".join(
+                tree._own_text(i) for i in range(self._index, tree.subtree_ends[self._index])
+            )
+        return cached
+
+    @property
+    def own_text(self) -> str:
+        """Heading line and direct content only."""
+        return self._tree._own_text(self._index)
+
+    @property
+    def own_tokens(self) -> int:
+        """Token count of own_text."""
+        return self._tree._memoised("own_tokens", self._index, _count_own_tokens)
+
+    @property
+    def subtree_tokens(self) -> int:
+        """Token count of full_content."""
+        return self._tree._memoised("subtree_tokens", self._index, _count_subtree_tokens)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of own_text."""
+        return self._tree._memoised("content_hash", self._index, lambda n: _sha256(n.own_text))
+
+    @property
+    def subtree_hash(self) -> str:
+        """Merkle hash of the subtree (same value as HeadingNode.subtree_hash)."""
+        return self._tree._subtree_hash(self._index)
+
+    def iter_descendants(self) -> Iterator[CompactNode]:
+        """Iterate over all descendant nodes (depth-first)."""
+        tree = self._tree
+        for i in range(self._index + 1, tree.subtree_ends[self._index]):
+            yield CompactNode(tree, i)
+
+    def to_heading_node(self) -> HeadingNode:
+        """Materialise this subtree as HeadingNodes."""
+        return self._tree._heading_node(self._index, self.parent_titles)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactNode):
+            return NotImplemented
+        return self._tree is other._tree and self._index == other._index
+
+    def __hash__(self) -> int:
+        return hash((id(self._tree), self._index))
+
+    def __repr__(self) -> str:
+        children = sum(1 for _ in self._tree.child_indexes(self._index))
+        return f"CompactNode(level={self.level}, title={self.title!r}, children={children})"
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompactTree:
+    """
+    Flat representation of a parsed document.
+
+    Node i (document order) has level levels[i], title
+    titles[title_ids[i]], content text[starts[i]:ends[i]], parent
+    parents[i] (-1 at top level), and descendants i+1 .. subtree_ends[i]-1.
+    Offsets are character offsets into text. Derived per-node values
+    (texts, token counts, hashes) are memoised in a side table keyed by
+    (name, index).
+    """
+
+    text: str
+    levels: array
+    title_ids: array
+    titles: tuple[str, ...]
+    starts: array
+    ends: array
+    parents: array
+    subtree_ends: array
+    preamble: str = ""
+    metadata: DocumentMetadata = field(default_factory=DocumentMetadata.empty)
+    source_format: str = "markdown"
+    _memo: dict[tuple[str, int], Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def node(self, index: int) -> CompactNode:
+        """View of the node at a document-order index."""
+        if not 0 <= index < len(self.levels):
+            raise IndexError(index)
+        return CompactNode(self, index)
+
+    def child_indexes(self, index: int = -1) -> Iterator[int]:
+        """Indexes of a node's children (index -1: the top-level nodes)."""
+        i = index + 1
+        end = self.subtree_ends[index] if index >= 0 else len(self.levels)
+        while i < end:
+            yield i
+            i = self.subtree_ends[i]
+
+    @property
+    def children(self) -> tuple[CompactNode, ...]:
+        return tuple(CompactNode(self, i) for i in self.child_indexes())
+
+    def get_nodes_at_level(self, level: int) -> tuple[CompactNode, ...]:
+        """All nodes at a heading level, in document order."""
+        return tuple(CompactNode(self, i) for i, lv in enumerate(self.levels) if lv == level)
+
+    def get_all_levels(self) -> frozenset[int]:
+        """Get all heading levels present in the document."""
+        return frozenset(self.levels)
+
+    @property
+    def max_level(self) -> int:
+        return max(self.levels) if self.levels else 0
+
+    @property
+    def min_level(self) -> int:
+        return min(self.levels) if self.levels else 0
+
+    def iter_all_nodes(self) -> Iterator[CompactNode]:
+        """Iterate over all nodes in depth-first order."""
+        for i in range(len(self.levels)):
+            yield CompactNode(self, i)
+
+    def _own_text(self, index: int) -> str:
+        key = ("own_text", index)
+        cached = self._memo.get(key)
+        if cached is None:
+            heading = f"{'#' * self.levels[index]} {self.titles[self.title_ids[index]]}"
+            content = self.text[self.starts[index] : self.ends[index]].strip()
+            cached = self._memo[key] = f"{heading}\n\n{content}" if content else heading
+        return cached
+
+    def _memoised(self, name: str, index: int, compute: Any) -> Any:
+        key = (name, index)
+        if key not in self._memo:
+            self._memo[key] = compute(CompactNode(self, index))
+        return self._memo[key]
+
+    def _subtree_hash(self, index: int) -> str:
+        key = ("subtree_hash", index)
+        if key not in self._memo:
+            # Reverse document order hashes every child before its parent
+            for i in range(self.subtree_ends[index] - 1, index - 1, -1):
+                if ("subtree_hash", i) not in self._memo:
+                    own = CompactNode(self, i).content_hash
+                    self._memo[("subtree_hash", i)] = _merkle_hash(
+                        own, (self._memo[("subtree_hash", c)] for c in self.child_indexes(i))
+                    )
+        return self._memo[key]
+
+    def _heading_node(self, index: int, parent_titles: tuple[str, ...]) -> HeadingNode:
+        """Materialise the subtree at index, children before parents (no recursion)."""
+        end = self.subtree_ends[index]
+        # Frozen children collected per open node, in document order
+        children: dict[int, list[HeadingNode]] = {}
+        titles: dict[int, tuple[str, ...]] = {index: parent_titles}
+
+        for i in range(index + 1, end):
+            parent = self.parents[i]
+            titles[i] = (*titles[parent], self.titles[self.title_ids[parent]])
+
+        # Reverse document order visits every child before its parent
+        for i in range(end - 1, index - 1, -1):
+            node = HeadingNode(
+                level=self.levels[i],
+                title=self.titles[self.title_ids[i]],
+                content=self.text[self.starts[i] : self.ends[i]],
+                children=tuple(reversed(children.pop(i, []))),
+                parent_titles=titles[i],
+            )
+            if i == index:
+                return node
+            children.setdefault(self.parents[i], []).append(node)
+        raise AssertionError("unreachable")
+
+    def to_document_tree(self) -> DocumentTree:
+        """Materialise as an ordinary DocumentTree."""
+        return DocumentTree(
+            children=tuple(self._heading_node(i, ()) for i in self.child_indexes()),
+            preamble=self.preamble,
+            metadata=self.metadata,
+            source_format=self.source_format,
+        )
+
+    @classmethod
+    def from_tree(cls, tree: DocumentTree) -> CompactTree:
+        """Convert a DocumentTree."""
+        builder = CompactTreeBuilder(source_format=tree.source_format)
+        builder.set_metadata(tree.metadata)
+        builder.set_preamble(tree.preamble)
+        for node in tree.iter_all_nodes():
+            builder.add_heading(node.level, node.title)
+            builder.add_content(node.content)
+        return builder.build()
+
+    def __repr__(self) -> str:
+        return f"CompactTree(nodes={len(self.levels)}, levels={set(self.get_all_levels())})"
+
+
+class CompactTreeBuilder:
+    """
+    TreeBuilder counterpart that produces a CompactTree.
+
+    Same interface as TreeBuilder, so parsers can feed either. Content is
+    appended to the shared buffer as soon as the next heading starts; no
+    per-node objects are kept.
+    """
+
+    def __init__(self, source_format: str = "markdown"):
+        self._source_format = source_format
+        self._preamble_lines: list[str] = []
+        self._metadata: DocumentMetadata = DocumentMetadata.empty()
+
+        self._text: list[str] = []
+        self._offset = 0
+        # Org headlines can have any number of stars
+        self._levels = array("H")
+        self._title_ids = array("L")
+        self._title_table: dict[str, int] = {}
+        self._starts = array("Q")
+        self._ends = array("Q")
+        self._parents = array("l")
+        self._subtree_ends = array("L")
+
+        self._stack: list[int] = []  # indexes of the open headings
+        self._current_content: list[str] = []
+        self._found_first_heading = False
+
+    def set_preamble(self, preamble: str) -> CompactTreeBuilder:
+        """Set document preamble."""
+        self._preamble_lines = [preamble]
+        return self
+
+    def set_metadata(self, metadata: DocumentMetadata) -> CompactTreeBuilder:
+        """Set document metadata."""
+        self._metadata = metadata
+        return self
+
+    def add_heading(self, level: int, title: str) -> CompactTreeBuilder:
+        """Add a heading, establishing proper hierarchy."""
+        if level > _MAX_LEVEL:
+            raise ValueError(
+                f"Heading level {level} exceeds the supported maximum of {_MAX_LEVEL}"
+            )
+        self._flush_content()
+        self._found_first_heading = True
+        index = len(self._levels)
+
+        while self._stack and self._levels[self._stack[-1]] >= level:
+            self._subtree_ends[self._stack.pop()] = index
+
+        title_id = self._title_table.setdefault(title, len(self._title_table))
+        self._levels.append(level)
+        self._title_ids.append(title_id)
+        self._starts.append(self._offset)
+        self._ends.append(self._offset)
+        self._parents.append(self._stack[-1] if self._stack else -1)
+        self._subtree_ends.append(index + 1)
+        self._stack.append(index)
+        return self
+
+    def add_content(self, content: str) -> CompactTreeBuilder:
+        """Add content to current section."""
+        if self._found_first_heading:
+            self._current_content.append(content)
+        else:
+            self._preamble_lines.append(content)
+        return self
+
+    def _flush_content(self) -> None:
+        if self._stack and self._current_content:
+            content = "\n".join(self._current_content).strip()
+            index = self._stack[-1]
+            self._text.append(content)
+            self._starts[index] = self._offset
+            self._offset += len(content)
+            self._ends[index] = self._offset
+        self._current_content = []
+
+    def build(self) -> CompactTree:
+        """Build the CompactTree."""
+        self._flush_content()
+        end = len(self._levels)
+        while self._stack:
+            self._subtree_ends[self._stack.pop()] = end
+
+        return CompactTree(
+            text="".join(self._text),
+            levels=self._levels,
+            title_ids=self._title_ids,
+            titles=tuple(self._title_table),
+            starts=self._starts,
+            ends=self._ends,
+            parents=self._parents,
+            subtree_ends=self._subtree_ends,
+            preamble="\n".join(self._preamble_lines).strip(),
+            metadata=self._metadata,
+            source_format=self._source_format,
+        )
@@ -0,0 +1,212 @@
+"""Structural diff between two versions of a document.
+
+Nodes are matched by heading path first, then by content hash:
+
+- same path, same subtree_hash: unchanged, descendants are not visited
+- same path, different content_hash: modified
+- different path, same subtree_hash: moved (reported once for the subtree)
+- different path, same content_hash: moved
+- anything left over: inserted (new tree) or deleted (old tree)
+
+Every node is visited at most once per tree and lookups are dict based,
+so the diff is linear in the number of nodes (times path length).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from .tree import DocumentTree, HeadingNode
+
+INSERTED = "inserted"
+DELETED = "deleted"
+MOVED = "moved"
+MODIFIED = "modified"
+
+
+@dataclass(frozen=True, slots=True)
+class NodeChange:
+    """One changed heading node (old is None if inserted, new is None if deleted)."""
+
+    kind: str
+    old: Optional[HeadingNode]
+    new: Optional[HeadingNode]
+
+    @property
+    def path(self) -> tuple[str, ...]:
+        """Path in the new tree (old tree for deletions)."""
+        node = self.new if self.new is not None else self.old
+        assert node is not None
+        return node.path
+
+
+@dataclass(frozen=True, slots=True)
+class TreeDiff:
+    """
+    Changes between two DocumentTrees.
+
+    Changes to the new tree come in its document order, followed by the
+    deletions in the old tree's document order.
+    """
+
+    changes: tuple[NodeChange, ...]
+    unchanged_subtrees: tuple[HeadingNode, ...]  # new-tree roots of identical subtrees
+    preamble_changed: bool = False
+    metadata_changed: bool = False
+
+    def _of_kind(self, kind: str) -> tuple[NodeChange, ...]:
+        return tuple(change for change in self.changes if change.kind == kind)
+
+    @property
+    def inserted(self) -> tuple[NodeChange, ...]:
+        return self._of_kind(INSERTED)
+
+    @property
+    def deleted(self) -> tuple[NodeChange, ...]:
+        return self._of_kind(DELETED)
+
+    @property
+    def moved(self) -> tuple[NodeChange, ...]:
+        return self._of_kind(MOVED)
+
+    @property
+    def modified(self) -> tuple[NodeChange, ...]:
+        return self._of_kind(MODIFIED)
+
+    @property
+    def changed_paths(self) -> tuple[tuple[str, ...], ...]:
+        """
+        New-tree paths whose sections need regenerating.
+
+        Inserted, modified and moved nodes (a moved subtree contributes
+        every node in it, since each heading path changed).
+        """
+        paths: list[tuple[str, ...]] = []
+        for change in self.changes:
+            if change.new is None:
+                continue
+            paths.append(change.new.path)
+            if change.kind == MOVED:
+                paths.extend(node.path for node in change.new.iter_descendants())
+        return tuple(paths)
+
+    def __bool__(self) -> bool:
+        return bool(self.changes) or self.preamble_changed or self.metadata_changed
+
+
+def _walk(nodes: tuple[HeadingNode, ...], skip: set[int]) -> Iterator[HeadingNode]:
+    """
+    Pre-order walk that skips nodes whose id is in skip.
+
+    The consumer may add the node it was just given to skip, to prune its
+    descendants.
+    """
+    stack = [iter(nodes)]
+    while stack:
+        for node in stack[-1]:
+            if id(node) in skip:
+                continue
+            yield node
+            if node.children and id(node) not in skip:
+                stack.append(iter(node.children))
+                break
+        else:
+            stack.pop()
+
+
+def _mark_subtree(node: HeadingNode, into: set[int]) -> None:
+    into.add(id(node))
+    into.update(id(child) for child in node.iter_descendants())
+
+
+def diff_trees(old: DocumentTree, new: DocumentTree) -> TreeDiff:
+    """
+    Compare two versions of a document.
+
+    Args:
+        old: Previous version
+        new: Current version
+
+    Returns:
+        TreeDiff with inserted, deleted, moved and modified nodes
+    """
+    # Old nodes by path, duplicates in document order
+    old_by_path: dict[tuple[str, ...], deque[HeadingNode]] = defaultdict(deque)
+    for node in old.iter_all_nodes():
+        old_by_path[node.path].append(node)
+
+    # Old nodes accounted for; subtree roots here hide their descendants
+    matched_old: set[int] = set()
+    skip_new: set[int] = set()
+    unchanged: list[HeadingNode] = []
+    changes: dict[int, NodeChange] = {}  # id(new node) -> change
+    unmatched_new: list[HeadingNode] = []
+
+    def take(pool: dict, key: object) -> Optional[HeadingNode]:
+        """First node of pool[key] that isn't matched yet."""
+        candidates = pool.get(key)
+        while candidates:
+            node = candidates.popleft()
+            if id(node) not in matched_old:
+                return node
+        return None
+
+    # Pass 1: match by path
+    for node in _walk(new.children, skip_new):
+        previous = take(old_by_path, node.path)
+        if previous is None:
+            unmatched_new.append(node)
+            continue
+        if previous.same_subtree(node):
+            _mark_subtree(previous, matched_old)
+            skip_new.add(id(node))
+            unchanged.append(node)
+            continue
+        matched_old.add(id(previous))
+        if previous.content_hash != node.content_hash:
+            changes[id(node)] = NodeChange(MODIFIED, previous, node)
+
+    # Pass 2: pool the old nodes nobody matched by path
+    by_subtree: dict[str, deque[HeadingNode]] = defaultdict(deque)
+    by_content: dict[str, deque[HeadingNode]] = defaultdict(deque)
+    leftover_old: list[HeadingNode] = []
+    for node in old.iter_all_nodes():
+        if id(node) in matched_old:
+            continue
+        leftover_old.append(node)
+        by_subtree[node.subtree_hash].append(node)
+        by_content[node.content_hash].append(node)
+
+    # Pass 3: match the rest by content (new pre-order, whole subtrees first)
+    moved_new: set[int] = set()
+    for node in unmatched_new:
+        if id(node) in moved_new:
+            continue
+        previous = take(by_subtree, node.subtree_hash)
+        if previous is not None:
+            _mark_subtree(previous, matched_old)
+            _mark_subtree(node, moved_new)
+            changes[id(node)] = NodeChange(MOVED, previous, node)
+            continue
+        previous = take(by_content, node.content_hash)
+        if previous is not None:
+            matched_old.add(id(previous))
+            changes[id(node)] = NodeChange(MOVED, previous, node)
+        else:
+            changes[id(node)] = NodeChange(INSERTED, None, node)
+
+    ordered = [
+        changes[id(node)] for node in _walk(new.children, skip_new) if id(node) in changes
+    ]
+    ordered.extend(
+        NodeChange(DELETED, node, None) for node in leftover_old if id(node) not in matched_old
+    )
+
+    return TreeDiff(
+        changes=tuple(ordered),
+        unchanged_subtrees=tuple(unchanged),
+        preamble_changed=old.preamble != new.preamble,
+        metadata_changed=old.metadata != new.metadata,
+    )
@@ -0,0 +1,320 @@
+"""Incremental re-parsing of Markdown documents.
+
+tree-sitter-markdown nests every heading's section in a `section` node:
+the heading, its own content blocks, then the sections of deeper headings.
+That matches the HeadingNode hierarchy, so after an edit only the sections
+that overlap the changed byte range need to be rebuilt. Everything else is
+carried over from the previous DocumentTree.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from tree_sitter import Node, Tree
+
+from .metadata import DocumentMetadata
+from .tree import DocumentTree, HeadingNode
+
+if TYPE_CHECKING:
+    from .markdown import MarkdownParser
+
+
+# Block size for the common prefix/suffix scan
+_DIFF_BLOCK = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class SectionSpan:
+    """Byte range of a HeadingNode's section in the parsed body."""
+
+    start: int
+    end: int
+    node: HeadingNode
+    children: tuple[SectionSpan, ...] = ()
+
+    def shifted(self, delta: int) -> SectionSpan:
+        if delta == 0:
+            return self
+        return SectionSpan(
+            start=self.start + delta,
+            end=self.end + delta,
+            node=self.node,
+            children=tuple(child.shifted(delta) for child in self.children),
+        )
+
+    def iter_spans(self) -> Iterator[SectionSpan]:
+        yield self
+        for child in self.children:
+            yield from child.iter_spans()
+
+
+@dataclass
+class IncrementalParse:
+    """
+    Result of MarkdownParser.parse_incremental.
+
+    Pass it back as `previous` when parsing the next version of the same
+    document.
+    """
+
+    document: DocumentTree
+    content: str
+
+    # Nodes carried over from / rebuilt since the previous parse
+    reused_nodes: int = 0
+    rebuilt_nodes: int = 0
+
+    # Parser state for the next edit
+    body: bytes = field(default=b"", repr=False)
+    tree: Optional[Tree] = field(default=None, repr=False)
+
+    # None when the document has a shape the section splice doesn't model
+    # (e.g. setext headings); such documents are always fully rebuilt
+    sections: Optional[tuple[SectionSpan, ...]] = field(default=None, repr=False)
+
+
+class _Unsupported(Exception):
+    """The AST doesn't map 1:1 onto HeadingNode sections."""
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    limit = min(len(a), len(b))
+    i = 0
+    # Compare whole blocks first (memcmp), then bytes within the mismatch
+    while i + _DIFF_BLOCK <= limit and a[i : i + _DIFF_BLOCK] == b[i : i + _DIFF_BLOCK]:
+        i += _DIFF_BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    i = 0
+    la, lb = len(a), len(b)
+    while i + _DIFF_BLOCK <= limit and (
+        a[la - i - _DIFF_BLOCK : la - i] == b[lb - i - _DIFF_BLOCK : lb - i]
+    ):
+        i += _DIFF_BLOCK
+    while i < limit and a[la - i - 1] == b[lb - i - 1]:
+        i += 1
+    return i
+
+
+def diff_range(old: bytes, new: bytes) -> tuple[int, int, int]:
+    """
+    Single edit turning old into new.
+
+    Returns:
+        (start_byte, old_end_byte, new_end_byte)
+    """
+    start = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - start)
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def _point(data: bytes, offset: int) -> tuple[int, int]:
+    """(row, column) of a byte offset, as Tree.edit expects."""
+    # Plain tuples: constructing tree_sitter.Point directly is not safe on
+    # every py-tree-sitter release
+    row = data.count(b"\n", 0, offset)
+    column = offset - (data.rfind(b"\n", 0, offset) + 1)
+    return (row, column)
+
+
+class _Splice:
+    """Rebuilds the sections of a new AST, reusing unchanged old ones."""
+
+    def __init__(
+        self,
+        parser: MarkdownParser,
+        body: bytes,
+        old_sections: tuple[SectionSpan, ...],
+        edit: tuple[int, int, int],
+        changed: tuple[int, int],
+    ):
+        self.parser = parser
+        self.body = body
+        self.edit_start, self.edit_old_end, self.edit_new_end = edit
+        self.delta = self.edit_new_end - self.edit_old_end
+        self.changed_start, self.changed_end = changed
+        self.old_by_start = {
+            span.start: span for root in old_sections for span in root.iter_spans()
+        }
+        self.reused = 0
+        self.rebuilt = 0
+
+    def _to_old(self, position: int) -> Optional[int]:
+        """Map a new byte offset to the old body (None inside the edit)."""
+        if position < self.edit_start:
+            return position
+        if position >= self.edit_new_end:
+            return position - self.delta
+        return None
+
+    def _unchanged(self, node: Node) -> Optional[SectionSpan]:
+        """Old span for a section that lies outside the changed region."""
+        if node.start_byte <= self.changed_end and node.end_byte >= self.changed_start:
+            return None
+        old_start = self._to_old(node.start_byte)
+        if old_start is None:
+            return None
+        old = self.old_by_start.get(old_start)
+        if old is None or old.end - old.start != node.end_byte - node.start_byte:
+            return None
+        return old.shifted(node.start_byte - old.start)
+
+    def own_events(self, node: Node) -> tuple[list[Node], list[tuple[str, int, str]]]:
+        """Split a section into child sections and the events of its own blocks."""
+        sections: list[Node] = []
+        events: list[tuple[str, int, str]] = []
+        for child in node.children:
+            if child.type == "section":
+                sections.append(child)
+            elif child.type == "setext_heading":
+                # Setext headings don't open a section node
+                raise _Unsupported(child.type)
+            elif sections:
+                # Content after a subsection would belong to that subsection
+                raise _Unsupported(child.type)
+            else:
+                events.extend(self.parser._iter_events(child, self.body))
+        return sections, events
+
+    def section(self, node: Node, parent_titles: tuple[str, ...]) -> SectionSpan:
+        old = self._unchanged(node)
+        if old is not None and old.node.parent_titles == parent_titles:
+            self.reused += sum(1 for _ in old.iter_spans())
+            return old
+
+        sections, events = self.own_events(node)
+        if not events or events[0][0] != "heading":
+            raise _Unsupported("section without heading")
+        if any(kind == "heading" for kind, _, _ in events[1:]):
+            raise _Unsupported("several headings in one section")
+
+        _, level, title = events[0]
+        blocks = [text for _, _, text in events[1:]]
+        content = "\n".join(blocks).strip() if blocks else ""
+
+        child_titles = (*parent_titles, title)
+        children = tuple(self.section(child, child_titles) for child in sections)
+        child_nodes = tuple(child.node for child in children)
+
+        self.rebuilt += 1
+        previous = self._previous_at(node.start_byte)
+        if (
+            previous is not None
+            and (previous.level, previous.title, previous.content, previous.parent_titles)
+            == (level, title, content, parent_titles)
+        ):
+            heading = previous if previous.children == child_nodes else previous.with_children(
+                child_nodes
+            )
+        else:
+            heading = HeadingNode(
+                level=level,
+                title=title,
+                content=content,
+                children=child_nodes,
+                parent_titles=parent_titles,
+            )
+        return SectionSpan(node.start_byte, node.end_byte, heading, children)
+
+    def _previous_at(self, start: int) -> Optional[HeadingNode]:
+        old_start = self._to_old(start)
+        if old_start is None:
+            return None
+        old = self.old_by_start.get(old_start)
+        return old.node if old is not None else None
+
+    def document(
+        self, root: Node, metadata: DocumentMetadata
+    ) -> tuple[DocumentTree, tuple[SectionSpan, ...]]:
+        preamble: list[str] = []
+        spans: list[SectionSpan] = []
+
+        for index, child in enumerate(root.children):
+            if child.type != "section":
+                raise _Unsupported(child.type)
+            if index == 0:
+                sections, events = self.own_events(child)
+                if not events or events[0][0] != "heading":
+                    # Leading heading-less section: the preamble
+                    if any(kind == "heading" for kind, _, _ in events):
+                        raise _Unsupported("heading inside the preamble")
+                    preamble.extend(text for _, _, text in events)
+                    spans.extend(self.section(section, ()) for section in sections)
+                    continue
+            spans.append(self.section(child, ()))
+
+        document = DocumentTree(
+            children=tuple(span.node for span in spans),
+            preamble="\n".join(preamble).strip(),
+            metadata=metadata,
+            source_format="markdown",
+        )
+        return document, tuple(spans)
+
+
+def reparse(
+    parser: MarkdownParser, content: str, previous: Optional[IncrementalParse]
+) -> IncrementalParse:
+    """
+    Parse content, incrementally when the previous parse is given.
+
+    See MarkdownParser.parse_incremental.
+    """
+    metadata, body_text = parser._extract_frontmatter(content)
+    body = body_text.encode("utf-8")
+
+    if previous is None or previous.tree is None:
+        tree = parser._parser.parse(body)
+        edit = (0, 0, len(body))
+        changed = (0, len(body))
+        old_sections: tuple[SectionSpan, ...] = ()
+    else:
+        edit = diff_range(previous.body, body)
+        start, old_end, new_end = edit
+        # Edit a copy so the previous result stays valid
+        old_tree = previous.tree.copy()
+        old_tree.edit(
+            start_byte=start,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=_point(previous.body, start),
+            old_end_point=_point(previous.body, old_end),
+            new_end_point=_point(body, new_end),
+        )
+        tree = parser._parser.parse(body, old_tree)
+
+        changed_start, changed_end = start, new_end
+        for changed_range in old_tree.changed_ranges(tree):
+            changed_start = min(changed_start, changed_range.start_byte)
+            changed_end = max(changed_end, changed_range.end_byte)
+        changed = (changed_start, changed_end)
+        old_sections = previous.sections or ()
+
+    splice = _Splice(parser, body, old_sections, edit, changed)
+    try:
+        document, sections = splice.document(tree.root_node, metadata)
+    except _Unsupported:
+        document = parser._build_tree(tree.root_node, body, metadata)
+        return IncrementalParse(
+            document=document,
+            content=content,
+            rebuilt_nodes=sum(1 for _ in document.iter_all_nodes()),
+            body=body,
+            tree=tree,
+        )
+
+    return IncrementalParse(
+        document=document,
+        content=content,
+        reused_nodes=splice.reused,
+        rebuilt_nodes=splice.rebuilt,
+        body=body,
+        tree=tree,
+        sections=sections,
+    )
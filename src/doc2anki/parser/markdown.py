@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import mmap
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterator, Optional
 
 import tree_sitter_markdown
 from tree_sitter import Language, Parser, Node
@@ -10,6 +13,37 @@ from tree_sitter import Language, Parser, Node
 from .tree import DocumentTree
 from .metadata import DocumentMetadata
 from .builder import TreeBuilder
+from .compact import CompactTree, CompactTreeBuilder
+from .incremental import IncrementalParse, reparse
+
+
+ATX_MARKER_LEVELS = {
+    "atx_h1_marker": 1,
+    "atx_h2_marker": 2,
+    "atx_h3_marker": 3,
+    "atx_h4_marker": 4,
+    "atx_h5_marker": 5,
+    "atx_h6_marker": 6,
+}
+
+CONTENT_NODE_TYPES = frozenset(
+    {
+        "paragraph",
+        "fenced_code_block",
+        "indented_code_block",
+        "block_quote",
+        "list",
+        "html_block",
+        "thematic_break",
+        "table",
+    }
+)
+
+
+@lru_cache(maxsize=1)
+def markdown_language() -> Language:
+    """The tree-sitter Markdown grammar (immutable, shared by all parsers)."""
+    return Language(tree_sitter_markdown.language())
 
 
 class MarkdownParser:
@@ -18,10 +52,13 @@ class MarkdownParser:
 
     Uses tree-sitter's AST for reliable heading extraction.
     Extracts YAML frontmatter for document metadata.
+
+    A tree-sitter Parser is not thread-safe: use parser.pool.get_parser()
+    to reuse one instance per thread.
     """
 
     def __init__(self):
-        self._language = Language(tree_sitter_markdown.language())
+        self._language = markdown_language()
         self._parser = Parser(self._language)
 
     def parse(self, source: str | Path) -> DocumentTree:
@@ -34,19 +71,72 @@ class MarkdownParser:
         Returns:
             Immutable DocumentTree
         """
+        return self._parse(source, TreeBuilder(source_format="markdown"))
+
+    def parse_compact(self, source: str | Path) -> CompactTree:
+        """
+        Parse Markdown content or file to a CompactTree.
+
+        Args:
+            source: Markdown string or Path to .md file
+
+        Returns:
+            CompactTree (flat arrays over one shared content buffer)
+        """
+        return self._parse(source, CompactTreeBuilder(source_format="markdown"))
+
+    def _parse(
+        self, source: str | Path, builder: TreeBuilder | CompactTreeBuilder
+    ) -> DocumentTree | CompactTree:
         if isinstance(source, Path):
-            content = source.read_text(encoding="utf-8")
-        else:
-            content = source
+            return self._parse_file(source, builder)
 
         # Extract frontmatter first
-        metadata, body = self._extract_frontmatter(content)
+        metadata, body = self._extract_frontmatter(source)
+        return self._parse_body(body.encode("utf-8"), metadata, builder)
 
+    def _parse_file(
+        self, path: Path, builder: TreeBuilder | CompactTreeBuilder
+    ) -> DocumentTree | CompactTree:
+        """
+        Parse a file through a read-only memory map.
+
+        The frontmatter boundary is found on the raw bytes, tree-sitter
+        reads the body straight from the mapping, and only the headings and
+        content blocks that end up in the tree are decoded. The file is
+        never held as one str.
+        """
+        with path.open("rb") as handle:
+            if path.stat().st_size == 0:
+                return self._parse_body(b"", DocumentMetadata.empty(), builder)
+
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped.find(b"\r") != -1:
+                    # read_text() translates CR/CRLF line endings; keep that
+                    # behaviour for such files by parsing the decoded text
+                    return self._parse(path.read_text(encoding="utf-8"), builder)
+
+                frontmatter, body_start = _split_frontmatter(mapped)
+                metadata = (
+                    DocumentMetadata.from_yaml(frontmatter, source_format="markdown")
+                    if frontmatter is not None
+                    else DocumentMetadata.empty()
+                )
+                # The view must be released before the mapping is closed
+                with memoryview(mapped) as view, view[body_start:] as body:
+                    return self._parse_body(body, metadata, builder)
+
+    def _parse_body(
+        self,
+        body: bytes | memoryview,
+        metadata: DocumentMetadata,
+        builder: TreeBuilder | CompactTreeBuilder,
+    ) -> DocumentTree | CompactTree:
         # Parse with tree-sitter
-        tree = self._parser.parse(body.encode("utf-8"))
+        tree = self._parser.parse(body)
 
         # Build document tree
-        return self._build_tree(tree.root_node, body, metadata)
+        return self._build_tree(tree.root_node, body, metadata, builder)
 
     def _extract_frontmatter(self, content: str) -> tuple[DocumentMetadata, str]:
         """
@@ -75,64 +165,68 @@ class MarkdownParser:
         frontmatter_text = "\n".join(frontmatter_lines)
 
         # Parse as YAML
-        try:
-            import yaml
-
-            data = yaml.safe_load(frontmatter_text)
-            if isinstance(data, dict):
-                metadata = DocumentMetadata.from_dict(data, source_format="markdown")
-            else:
-                metadata = DocumentMetadata.empty()
-        except Exception:
-            metadata = DocumentMetadata.empty()
+        metadata = DocumentMetadata.from_yaml(frontmatter_text, source_format="markdown")
 
         # Return remaining content
         body = "\n".join(lines[end_idx + 1 :])
         return metadata, body
 
     def _build_tree(
-        self, root: Node, source: str, metadata: DocumentMetadata
-    ) -> DocumentTree:
-        """Build DocumentTree from tree-sitter AST."""
-        builder = TreeBuilder(source_format="markdown")
+        self,
+        root: Node,
+        body: bytes | memoryview,
+        metadata: DocumentMetadata,
+        builder: TreeBuilder | CompactTreeBuilder | None = None,
+    ) -> DocumentTree | CompactTree:
+        """
+        Build DocumentTree (or the builder's tree type) from tree-sitter AST.
+
+        body is the UTF-8 source the AST was parsed from.
+        """
+        if builder is None:
+            builder = TreeBuilder(source_format="markdown")
         builder.set_metadata(metadata)
 
-        source_bytes = source.encode("utf-8")
+        for kind, level, text in self._iter_events(root, body):
+            if kind == "heading":
+                builder.add_heading(level, text)
+            else:
+                builder.add_content(text)
+
+        return builder.build()
+
+    def _iter_events(
+        self, node: Node, source_bytes: bytes | memoryview
+    ) -> Iterator[tuple[str, int, str]]:
+        """
+        Walk an AST node in document order.
+
+        Yields ("heading", level, title) for headings and ("content", 0, text)
+        for content blocks. Uses an explicit stack, so nesting depth is not
+        limited by the recursion limit.
+        """
 
         def get_text(node: Node) -> str:
             """Extract text for a node."""
-            return source_bytes[node.start_byte : node.end_byte].decode("utf-8")
+            return str(source_bytes[node.start_byte : node.end_byte], "utf-8")
 
-        def process_children(node: Node) -> None:
-            """Process all children of a node."""
-            for child in node.children:
-                process_node(child)
+        stack = [node]
+        while stack:
+            node = stack.pop()
 
-        def process_node(node: Node) -> None:
-            """Process AST node."""
             if node.type == "atx_heading":
                 # ATX heading: # Title, ## Title, etc.
                 level = 0
                 title = ""
 
                 for child in node.children:
-                    if child.type == "atx_h1_marker":
-                        level = 1
-                    elif child.type == "atx_h2_marker":
-                        level = 2
-                    elif child.type == "atx_h3_marker":
-                        level = 3
-                    elif child.type == "atx_h4_marker":
-                        level = 4
-                    elif child.type == "atx_h5_marker":
-                        level = 5
-                    elif child.type == "atx_h6_marker":
-                        level = 6
+                    if child.type in ATX_MARKER_LEVELS:
+                        level = ATX_MARKER_LEVELS[child.type]
                     elif child.type in ("heading_content", "inline"):
                         title = get_text(child).strip()
 
                 if level > 0:
-                    builder.add_heading(level, title)
+                    yield "heading", level, title
 
             elif node.type == "setext_heading":
                 # Setext heading: Title\n===== or Title\n-----
@@ -148,32 +242,68 @@ class MarkdownParser:
                         title = get_text(child).strip()
 
                 if level > 0 and title:
-                    builder.add_heading(level, title)
-
-            elif node.type in (
-                "paragraph",
-                "fenced_code_block",
-                "indented_code_block",
-                "block_quote",
-                "list",
-                "html_block",
-                "thematic_break",
-                "table",
-            ):
-                # Content blocks
-                text = get_text(node)
-                builder.add_content(text)
+                    yield "heading", level, title
 
-            elif node.type in ("document", "section"):
-                # Container nodes - process children
-                process_children(node)
+            elif node.type in CONTENT_NODE_TYPES:
+                # Content blocks
+                yield "content", 0, get_text(node)
 
             else:
-                # Unknown node type - try processing children
-                process_children(node)
+                # Container nodes (document, section) and unknown node types:
+                # process children, first child on top
+                stack.extend(reversed(node.children))
 
-        process_node(root)
-        return builder.build()
+    def parse_incremental(
+        self, content: str, previous: Optional[IncrementalParse] = None
+    ) -> IncrementalParse:
+        """
+        Parse Markdown content, reusing the result of a previous parse.
+
+        The edit between previous.content and content is applied to the
+        previous tree-sitter Tree, which is then reparsed incrementally.
+        Only heading sections touched by the edit are rebuilt; unchanged
+        HeadingNode subtrees are reused as-is, and unchanged ancestors of
+        changed nodes are shared through HeadingNode.with_children.
+
+        Args:
+            content: New Markdown content (including frontmatter)
+            previous: Result of the previous parse of this document, or None
+
+        Returns:
+            IncrementalParse holding the DocumentTree and state for the next edit
+        """
+        return reparse(self, content, previous)
+
+
+def _is_delimiter(line: bytes | memoryview) -> bool:
+    # Same test as the str path: line.strip() == "---"
+    return b"---" in line and str(line, "utf-8", "replace").strip() == "---"
+
+
+def _split_frontmatter(data: mmap.mmap) -> tuple[Optional[str], int]:
+    """
+    Locate YAML frontmatter in raw bytes (see MarkdownParser._extract_frontmatter).
+
+    Returns:
+        (frontmatter text or None, byte offset where the body starts)
+    """
+    first_end = data.find(b"\n")
+    if first_end == -1 or not _is_delimiter(data[:first_end]):
+        return None, 0
+
+    start = position = first_end + 1
+    size = len(data)
+    while position <= size:
+        line_end = data.find(b"\n", position)
+        if line_end == -1:
+            line_end = size
+        if _is_delimiter(data[position:line_end]):
+            frontmatter = data[start : max(start, position - 1)].decode("utf-8")
+            return frontmatter, min(line_end + 1, size)
+        position = line_end + 1
+
+    # No closing delimiter: not frontmatter
+    return None, 0
 
 
 def build_tree(content: str) -> DocumentTree:
@@ -186,5 +316,6 @@ def build_tree(content: str) -> DocumentTree:
     Returns:
         Immutable DocumentTree
     """
-    parser = MarkdownParser()
-    return parser.parse(content)
+    from .pool import get_parser
+
+    return get_parser("markdown").parse(content)
@@ -42,6 +42,19 @@ class DocumentMetadata:
         """Create empty metadata."""
         return cls()
 
+    @classmethod
+    def from_yaml(cls, text: str, source_format: str) -> DocumentMetadata:
+        """Create metadata from YAML text (empty if it isn't a YAML mapping)."""
+        try:
+            import yaml
+
+            data = yaml.safe_load(text)
+            if isinstance(data, dict):
+                return cls.from_dict(data, source_format=source_format)
+        except Exception:
+            pass
+        return cls.empty()
+
     @classmethod
     def from_dict(cls, data: Mapping[str, Any], source_format: str) -> DocumentMetadata:
         """Create metadata from a dictionary."""
@@ -1,82 +1,164 @@
-"""Org-mode document parser using orgparse."""
+"""Org-mode document parser.
+
+OrgParser is a built-in, line-oriented scanner: one read and one pass over
+the lines, feeding TreeBuilder directly. It reproduces the DocumentTree that
+an orgparse-based parser builds (heading cleanup, planning/CLOCK lines,
+property drawers, state-change log lines, link descriptions, #+KEYWORD
+metadata), with one deliberate difference: lines starting with stars
+inside #+BEGIN_/#+END_ blocks are content, not headings. #+TODO:
+declarations are file-wide, as in Org: OrgParser collects them before
+scanning, so they also apply to headings above them. That reference
+parser lives in tests/orgparse_reference.py as the conformance oracle.
+"""
 
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Any
 import re
-
-import orgparse
-from orgparse.node import OrgNode, OrgRootNode
+from pathlib import Path
+from typing import Any, Iterable, Optional
 
 from .tree import DocumentTree
 from .metadata import DocumentMetadata
 from .builder import TreeBuilder
+from .compact import CompactTree, CompactTreeBuilder
+from .stream import SectionRecord
 
 
-class OrgParser:
-    """
-    Org-mode parser using orgparse library.
+# Line patterns (mirroring orgparse)
+_NODE_HEADER_RE = re.compile(r"^\*+ ")
+_HEADING_STARS_RE = re.compile(r"^(\*+)\s+(.*?)\s*$")
+_HEADING_TAGS_RE = re.compile(r"(.*?)\s*:([\w@:]+):\s*$")
+_HEADING_PRIORITY_RE = re.compile(r"^\s*\[#([A-Z0-9])\] ?(.*)$")
+_KEYWORD_RE = re.compile(r"^#\+(\w+):(.*)$")
+_SPECIAL_COMMENT_RE = re.compile(r"^\s*#\+([^:]*):(.*)$")
+_PLANNING_RE = re.compile(
+    r"^(?!#).*(?:(?:SCHEDULED|DEADLINE):\s+<\d{4}-\d{2}-\d{2}[^>]*>"
+    r"|CLOSED:\s+\[\d{4}-\d{2}-\d{2}[^\]]*\])"
+)
+_CLOCK_RE = re.compile(r"^(?!#).*CLOCK:\s+\[(\d+)\-(\d+)\-(\d+)[^\]\d]*(\d+)\:(\d+)\]")
+_REPEATED_TASK_RE = re.compile(r'\s*-\s+State\s+"[^"]+"\s+from\s+"[^"]+"\s+\[[^\]]+\]')
+_PROPERTY_RE = re.compile(r"^\s*:(.*?):\s*(.*?)\s*$")
+_LINK_RE = re.compile(r"\[\[(?P<desc0>[^\]]+)\]\]|\[\[[^\]]+\]\[(?P<desc1>[^\]]+)\]\]")
+_BLOCK_BEGIN_RE = re.compile(r"^\s*#\+BEGIN_(\S+)", re.IGNORECASE)
 
-    Extracts:
-    - Document structure (headings, content)
-    - File-level #+PROPERTY declarations
-    - Node-level :PROPERTIES: drawers
+DEFAULT_TODO_KEYS = ("TODO", "DONE")
+_TODO_COMMENTS = frozenset({"TODO", "SEQ_TODO", "TYP_TODO"})
+
+# Property drawer state: orgparse only strips the first drawer of a section
+_DRAWER_NONE, _DRAWER_OPEN, _DRAWER_DONE = 0, 1, 2
+
+
+def to_plain_text(text: str) -> str:
+    """Replace [[link]] and [[link][description]] with their visible text."""
+    return _LINK_RE.sub(lambda m: m.group("desc0") or m.group("desc1"), text)
+
+
+def parse_org_heading(text: str, todo_keys: tuple[str, ...] = DEFAULT_TODO_KEYS) -> str:
+    """Heading title without TODO keyword, priority cookie and tags."""
+    tags = _HEADING_TAGS_RE.search(text)
+    if tags:
+        text = tags.group(1)
+    for keyword in todo_keys:
+        if text == keyword:
+            text = ""
+            break
+        if text.startswith(keyword + " "):
+            text = text[len(keyword) + 1 :]
+            break
+    priority = _HEADING_PRIORITY_RE.search(text)
+    if priority:
+        text = priority.group(2)
+    return to_plain_text(text)
+
+
+def _parse_todo_sequence(value: str) -> tuple[list[str], list[str]]:
+    """Keywords of a #+TODO: line, e.g. "TODO NEXT(n) | DONE"."""
+    todos, _, dones = value.partition("|")
+    return (
+        [word.split("(", 1)[0] for word in todos.split()],
+        [word.split("(", 1)[0] for word in dones.split()],
+    )
+
+
+def _todo_declaration(line: str) -> Optional[tuple[list[str], list[str]]]:
+    """(todo, done) keywords if line is a #+TODO:/SEQ_TODO:/TYP_TODO: line."""
+    comment = _SPECIAL_COMMENT_RE.match(line)
+    if comment and comment.group(1).upper() in _TODO_COMMENTS:
+        return _parse_todo_sequence(comment.group(2).strip())
+    return None
+
+
+def scan_todo_keys(lines: Iterable[str]) -> Optional[tuple[str, ...]]:
     """
+    TODO keywords declared anywhere in a document.
 
-    def parse(self, source: str | Path) -> DocumentTree:
-        """
-        Parse Org-mode content or file to DocumentTree.
+    Args:
+        lines: Document lines
 
-        Args:
-            source: Org-mode string or Path to .org file
+    Returns:
+        Declared todo keywords followed by done keywords, or None if there
+        are no declarations (DEFAULT_TODO_KEYS apply)
+    """
+    todos: list[str] = []
+    dones: list[str] = []
+    declared = False
+    for line in lines:
+        if "#+" not in line:
+            continue
+        declaration = _todo_declaration(line)
+        if declaration is not None:
+            todos.extend(declaration[0])
+            dones.extend(declaration[1])
+            declared = True
+    return tuple(todos + dones) if declared else None
 
-        Returns:
-            Immutable DocumentTree
-        """
-        if isinstance(source, Path):
-            root = orgparse.load(str(source))
-            content = source.read_text(encoding="utf-8")
-        else:
-            root = orgparse.loads(source)
-            content = source
 
-        # Extract file-level metadata
-        metadata = self._extract_metadata(root, content)
+class OrgScanner:
+    """
+    Incremental Org-mode section scanner (feed lines, get sections).
 
-        # Build document tree
-        return self._build_tree(root, metadata)
+    Used by OrgParser for whole documents and by parser.stream for
+    streaming. With todo_keys (from scan_todo_keys), headings use those
+    keywords; otherwise a streaming scan can't look ahead, and #+TODO:
+    declarations apply only to the headings after them.
+    """
 
-    def _extract_metadata(
-        self, root: OrgRootNode, content: str
-    ) -> DocumentMetadata:
-        """
-        Extract document-level metadata.
+    def __init__(self, todo_keys: Optional[tuple[str, ...]] = None) -> None:
+        self.keywords: dict[str, str] = {}
+        self.root_properties: dict[str, Any] = {}
+        self._todos: list[str] = []
+        self._dones: list[str] = []
+        self._todo_keys = DEFAULT_TODO_KEYS if todo_keys is None else todo_keys
+        self._todo_keys_fixed = todo_keys is not None
+        self._pending_keyword: Optional[str] = None
+        self._pending_space = False
 
-        Sources:
-        - #+TITLE, #+AUTHOR, #+DATE etc. (file-level keywords)
-        - Properties from root node if any
-        """
-        raw_data: dict[str, Any] = {}
+        self._level = 0
+        self._title = ""
+        self._lines: list[str] = []
+        self._first_body_line = False
+        self._drawer = _DRAWER_NONE
+        self.started = False  # first heading seen
 
-        # Extract #+KEYWORD declarations from content
-        keyword_pattern = r"^#\+(\w+):\s*(.+)$"
-        for match in re.finditer(keyword_pattern, content, re.MULTILINE):
-            key = match.group(1).lower()
-            value = match.group(2).strip()
-            raw_data[key] = value
+        # Open #+BEGIN_ block: its name, raw lines and the state before it,
+        # so an unterminated block can be rescanned as ordinary lines
+        self._block = ""
+        self._block_lines: list[str] = []
+        self._block_state: Optional[tuple[int, bool, int, dict[str, Any]]] = None
 
-        # Extract root node properties (if any)
-        if hasattr(root, "properties") and root.properties:
-            for key, value in root.properties.items():
-                raw_data[key.lower()] = value
+    def metadata(self) -> DocumentMetadata:
+        """Metadata from #+KEYWORD lines and the file-level property drawer."""
+        raw_data: dict[str, Any] = dict(self.keywords)
+        if self._pending_keyword is not None and self._pending_space:
+            # "#+KEY: " with nothing after it before the end of input
+            raw_data[self._pending_keyword] = ""
+        for key, value in self.root_properties.items():
+            raw_data[key.lower()] = value
 
-        # Parse filetags
         tags: tuple[str, ...] = ()
         if "filetags" in raw_data:
-            filetags = raw_data["filetags"]
             # Org filetags format: :tag1:tag2:tag3:
-            tags = tuple(t for t in filetags.split(":") if t)
+            tags = tuple(t for t in raw_data["filetags"].split(":") if t)
 
         return DocumentMetadata(
             title=raw_data.get("title"),
@@ -87,47 +169,200 @@ class OrgParser:
             source_format="org",
         )
 
-    def _build_tree(
-        self, root: OrgRootNode, metadata: DocumentMetadata
-    ) -> DocumentTree:
-        """Build DocumentTree from orgparse AST."""
-        builder = TreeBuilder(source_format="org")
-        builder.set_metadata(metadata)
-
-        # Handle preamble (content before first heading)
-        # orgparse stores this in root.body
-        if hasattr(root, "body") and root.body:
-            # Filter out #+KEYWORD lines from preamble
-            preamble_lines = []
-            for line in root.body.split("\n"):
-                if not line.strip().startswith("#+"):
-                    preamble_lines.append(line)
-            preamble = "\n".join(preamble_lines).strip()
-            if preamble:
-                builder.set_preamble(preamble)
-
-        def process_node(node: OrgNode) -> None:
-            """Process orgparse node recursively."""
-            # orgparse node levels are 1-indexed
-            level = node.level
-
-            if level > 0:  # Skip root node (level 0)
-                builder.add_heading(level, node.heading)
-
-                # Add node body content
-                if node.body:
-                    builder.add_content(node.body.strip())
-
-            # Process children
-            for child in node.children:
-                process_node(child)
-
-        # Process all children of root
-        for child in root.children:
-            process_node(child)
+    def feed(self, line: str) -> Optional[SectionRecord]:
+        """Consume one line; return the finished section if a heading starts."""
+        line = line.rstrip("\n")
+        self._scan_keywords(line)
+        return self._scan_structure(line)
+
+    def _scan_keywords(self, line: str) -> None:
+        # "#+KEY: value" anywhere in the file. An empty value takes the next
+        # non-blank line, as the original multi-line regex did.
+        if self._pending_keyword is not None:
+            if line.strip():
+                self.keywords[self._pending_keyword] = line.strip()
+                self._pending_keyword = None
+            elif line:
+                self._pending_space = True
+            return
+
+        keyword = _KEYWORD_RE.match(line)
+        if keyword:
+            key, value = keyword.group(1).lower(), keyword.group(2)
+            if value.strip():
+                self.keywords[key] = value.strip()
+            else:
+                self._pending_keyword, self._pending_space = key, bool(value)
+
+        if self._todo_keys_fixed:
+            return
+        declaration = _todo_declaration(line)
+        if declaration is not None:
+            self._todos.extend(declaration[0])
+            self._dones.extend(declaration[1])
+            # Declared keywords replace the defaults
+            self._todo_keys = tuple(self._todos + self._dones)
+
+    def _scan_structure(self, line: str) -> Optional[SectionRecord]:
+        if self._block:
+            self._block_lines.append(line)
+            if re.match(rf"^\s*#\+END_{re.escape(self._block)}(?:\s|$)", line, re.IGNORECASE):
+                self._block = ""
+                self._block_lines = []
+                self._block_state = None
+            self._body_line(line)
+            return None
+
+        if _NODE_HEADER_RE.match(line):
+            finished = self._flush()
+            heading = _HEADING_STARS_RE.match(line)
+            assert heading is not None
+            self._level = len(heading.group(1))
+            self._title = parse_org_heading(heading.group(2), self._todo_keys)
+            self._first_body_line = True
+            self._drawer = _DRAWER_NONE
+            self.started = True
+            return finished
+
+        block = _BLOCK_BEGIN_RE.match(line)
+        if block:
+            self._block = block.group(1)
+            self._block_lines = [line]
+            self._block_state = (
+                len(self._lines),
+                self._first_body_line,
+                self._drawer,
+                dict(self.root_properties),
+            )
 
+        self._body_line(line)
+        return None
+
+    def _body_line(self, line: str) -> None:
+        """Filter one line of the current section's body."""
+        if self._level > 0:
+            if self._first_body_line:
+                self._first_body_line = False
+                if _PLANNING_RE.search(line):
+                    return
+            if _CLOCK_RE.search(line):
+                return
+
+        if self._drawer == _DRAWER_OPEN:
+            if ":END:" in line:
+                self._drawer = _DRAWER_DONE
+            elif self._level == 0:
+                prop = _PROPERTY_RE.search(line)
+                if prop:
+                    self.root_properties[prop.group(1)] = prop.group(2)
+            return
+        if self._drawer == _DRAWER_NONE and ":PROPERTIES:" in line:
+            self._drawer = _DRAWER_OPEN
+            return
+
+        if self._level > 0 and _REPEATED_TASK_RE.search(line):
+            return
+
+        self._lines.append(line)
+
+    def _flush(self) -> Optional[SectionRecord]:
+        body = to_plain_text("\n".join(self._lines))
+        self._lines = []
+        if self._level == 0:
+            # Keyword lines aren't part of the preamble text
+            preamble = "\n".join(
+                line for line in body.split("\n") if not line.strip().startswith("#+")
+            ).strip()
+            return SectionRecord(0, "", preamble) if preamble else None
+        return SectionRecord(self._level, self._title, body.strip())
+
+    def finish(self) -> list[SectionRecord]:
+        """Flush the remaining sections at end of input."""
+        records: list[SectionRecord] = []
+        while self._block_state is not None:
+            # Unterminated block: not a block after all, rescan its lines
+            lines, state = self._block_lines, self._block_state
+            del self._lines[state[0] :]
+            self._first_body_line, self._drawer = state[1], state[2]
+            self.root_properties = state[3]
+            self._block, self._block_lines, self._block_state = "", [], None
+
+            self._body_line(lines[0])
+            for line in lines[1:]:
+                record = self._scan_structure(line)
+                if record is not None:
+                    records.append(record)
+
+        last = self._flush()
+        if last is not None:
+            records.append(last)
+        return records
+
+
+class OrgParser:
+    """
+    Native Org-mode parser.
+
+    Extracts:
+    - Document structure (headings, content)
+    - File-level #+KEYWORD declarations
+    - The file-level :PROPERTIES: drawer
+    """
+
+    def parse(self, source: str | Path) -> DocumentTree:
+        """
+        Parse Org-mode content or file to DocumentTree.
+
+        Args:
+            source: Org-mode string or Path to .org file
+
+        Returns:
+            Immutable DocumentTree
+        """
+        return self._parse(source, TreeBuilder(source_format="org"))
+
+    def parse_compact(self, source: str | Path) -> CompactTree:
+        """
+        Parse Org-mode content or file to a CompactTree.
+
+        Args:
+            source: Org-mode string or Path to .org file
+
+        Returns:
+            CompactTree (flat arrays over one shared content buffer)
+        """
+        return self._parse(source, CompactTreeBuilder(source_format="org"))
+
+    def _parse(
+        self, source: str | Path, builder: TreeBuilder | CompactTreeBuilder
+    ) -> DocumentTree | CompactTree:
+        if isinstance(source, Path):
+            # Same line splitting as orgparse.load (newlines only)
+            lines = source.read_text(encoding="utf-8").split("\n")
+        else:
+            lines = source.splitlines()
+
+        # In-buffer settings are file-wide: collect #+TODO: lines first
+        scanner = OrgScanner(scan_todo_keys(lines))
+        for line in lines:
+            record = scanner.feed(line)
+            if record is not None:
+                self._add_record(builder, record)
+        for record in scanner.finish():
+            self._add_record(builder, record)
+
+        builder.set_metadata(scanner.metadata())
         return builder.build()
 
+    @staticmethod
+    def _add_record(builder: TreeBuilder | CompactTreeBuilder, record: SectionRecord) -> None:
+        if record.level == 0:
+            builder.set_preamble(record.content)
+            return
+        builder.add_heading(record.level, record.title)
+        if record.content:
+            builder.add_content(record.content)
+
 
 def build_tree(content: str) -> DocumentTree:
     """
@@ -139,5 +374,6 @@ def build_tree(content: str) -> DocumentTree:
     Returns:
         Immutable DocumentTree
     """
-    parser = OrgParser()
-    return parser.parse(content)
+    from .pool import get_parser
+
+    return get_parser("org").parse(content)
@@ -0,0 +1,204 @@
+"""Parser registry and per-thread parser instances.
+
+Each document format is described by a ParserSpec: its canonical name,
+aliases, file extensions and a "module:attribute" factory. The backend
+module is imported only when a parser for that format is first requested,
+so importing doc2anki.parser doesn't load tree-sitter.
+
+Third-party formats register through the "doc2anki.parsers" entry point
+group; each entry point must resolve to a ParserSpec. Entry points are
+only scanned when a format or extension isn't built in (or when all
+extensions are listed), so plugins cost nothing for Markdown and Org runs.
+
+Creating a MarkdownParser builds a tree-sitter Parser, which for vaults of
+many short notes costs about as much as the parse itself. tree-sitter
+Parsers must not be shared between threads, so each thread keeps its own
+instance per format.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import warnings
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Callable, Optional, Protocol, Union
+
+from .tree import DocumentTree
+
+ENTRY_POINT_GROUP = "doc2anki.parsers"
+
+
+class DocumentParser(Protocol):
+    """Interface of a format backend (parse_compact is optional)."""
+
+    def parse(self, source: str | Path) -> DocumentTree: ...
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    """
+    Registration of a document format.
+
+    Args:
+        format: Canonical format name (e.g. "markdown")
+        factory: Parser class or zero-argument callable, or its
+                 "module:attribute" path to import on first use
+        extensions: File suffixes, lowercase with the dot (e.g. ".md")
+        aliases: Other accepted format names (e.g. "md")
+    """
+
+    format: str
+    factory: Union[str, Callable[[], Any]]
+    extensions: tuple[str, ...] = ()
+    aliases: tuple[str, ...] = ()
+
+    def create(self) -> DocumentParser:
+        """Import the backend if needed and create a parser."""
+        factory = self.factory
+        if isinstance(factory, str):
+            module, _, attribute = factory.partition(":")
+            factory = getattr(importlib.import_module(module), attribute)
+        return factory()
+
+
+BUILTIN_PARSERS = (
+    ParserSpec(
+        "markdown",
+        "doc2anki.parser.markdown:MarkdownParser",
+        extensions=(".md", ".markdown"),
+        aliases=("md",),
+    ),
+    ParserSpec(
+        "org",
+        "doc2anki.parser.orgmode:OrgParser",
+        extensions=(".org", ".org_archive"),
+        aliases=("orgmode",),
+    ),
+)
+
+
+class _Registry:
+    """Format specs by name, alias and extension."""
+
+    def __init__(self, specs: tuple[ParserSpec, ...] = BUILTIN_PARSERS):
+        self.specs: dict[str, ParserSpec] = {}
+        self.names: dict[str, str] = {}  # format or alias -> format
+        self.extensions: dict[str, str] = {}  # suffix -> format
+        self.plugins_loaded = False
+        self.lock = threading.Lock()
+        for spec in specs:
+            self.add(spec)
+
+    def add(self, spec: ParserSpec) -> None:
+        self.specs[spec.format] = spec
+        for name in (spec.format, *spec.aliases):
+            self.names[name] = spec.format
+        for extension in spec.extensions:
+            self.extensions[extension.lower()] = spec.format
+
+    def load_plugins(self) -> None:
+        with self.lock:
+            if self.plugins_loaded:
+                return
+            self.plugins_loaded = True
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                try:
+                    spec = entry_point.load()
+                except Exception as e:
+                    warnings.warn(f"Skipping parser plugin {entry_point.name!r}: {e}")
+                    continue
+                if not isinstance(spec, ParserSpec):
+                    warnings.warn(
+                        f"Skipping parser plugin {entry_point.name!r}: not a ParserSpec"
+                    )
+                    continue
+                # Built-in and explicitly registered formats win
+                if spec.format not in self.specs:
+                    self.add(spec)
+
+
+_registry = _Registry()
+
+
+def register_parser(spec: ParserSpec) -> None:
+    """Register (or replace) a document format."""
+    _registry.add(spec)
+
+
+def resolve_format(name: str) -> Optional[str]:
+    """Canonical format for a format name or alias, or None if unknown."""
+    format = _registry.names.get(name)
+    if format is None and not _registry.plugins_loaded:
+        _registry.load_plugins()
+        format = _registry.names.get(name)
+    return format
+
+
+def format_for_extension(suffix: str) -> Optional[str]:
+    """Format registered for a file suffix (e.g. ".md"), or None."""
+    suffix = suffix.lower()
+    format = _registry.extensions.get(suffix)
+    if format is None and suffix and not _registry.plugins_loaded:
+        _registry.load_plugins()
+        format = _registry.extensions.get(suffix)
+    return format
+
+
+def registered_extensions() -> tuple[str, ...]:
+    """All registered file suffixes, including those of plugins."""
+    _registry.load_plugins()
+    return tuple(_registry.extensions)
+
+
+def registered_formats() -> tuple[str, ...]:
+    """All registered canonical format names, including plugins."""
+    _registry.load_plugins()
+    return tuple(_registry.specs)
+
+
+_local = threading.local()
+
+
+def _thread_parsers() -> dict[str, DocumentParser]:
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    return parsers
+
+
+def get_parser(format: str) -> DocumentParser:
+    """
+    Get this thread's parser for a document format, creating it on first use.
+
+    Args:
+        format: "markdown"/"md", "org"/"orgmode" or a plugin format
+
+    Returns:
+        Parser instance owned by the calling thread
+
+    Raises:
+        ValueError: If format is not supported
+    """
+    parsers = _thread_parsers()
+    parser = parsers.get(format)
+    if parser is not None:
+        return parser
+
+    canonical = resolve_format(format)
+    if canonical is None:
+        supported = ", ".join(registered_formats())
+        raise ValueError(f"Unsupported format: {format}. Supported: {supported}")
+
+    parser = parsers.get(canonical)
+    if parser is None:
+        parser = _registry.specs[canonical].create()
+    parsers[canonical] = parsers[format] = parser
+    return parser
+
+
+def clear_parsers() -> None:
+    """Drop the calling thread's cached parsers."""
+    _thread_parsers().clear()
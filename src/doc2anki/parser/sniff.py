@@ -0,0 +1,73 @@
+"""Format detection from file extensions and bounded content prefixes.
+
+Extensions come from the parser registry (parser.pool), including plugin
+formats. Content sniffing only distinguishes Markdown from Org.
+
+Heading counts over the whole document decide nothing that the first few
+kilobytes don't already: notes are written in one syntax throughout. The
+sniffer therefore looks at no more than SNIFF_CHARS characters and stops
+as soon as one syntax leads by a decisive margin.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Optional
+
+from .pool import format_for_extension
+
+# Characters of content examined at most
+SNIFF_CHARS = 64 * 1024
+
+# Heading lead at which the scan stops early
+DECISIVE_MARGIN = 16
+
+# group 1: Markdown ATX heading, group 2: Org headline
+_HEADING_RE = re.compile(r"^(?:(#{1,6})|(\*+))[ \t]+\S", re.MULTILINE)
+
+
+def format_from_extension(path: Path) -> Optional[str]:
+    """Format registered for the file's extension, or None."""
+    return format_for_extension(path.suffix)
+
+
+def sniff_format(content: str, limit: int = SNIFF_CHARS) -> str:
+    """
+    Detect document format from the headings near the start of content.
+
+    Args:
+        content: Document text (only the first `limit` characters are read)
+        limit: Maximum number of characters to examine
+
+    Returns:
+        "org" if Org headlines outnumber Markdown headings, else "markdown"
+    """
+    md_headings = org_headings = 0
+    for match in _HEADING_RE.finditer(content, 0, limit):
+        if match.group(1):
+            md_headings += 1
+        else:
+            org_headings += 1
+        if abs(md_headings - org_headings) >= DECISIVE_MARGIN:
+            break
+
+    return "org" if org_headings > md_headings else "markdown"
+
+
+def sniff_file(path: Path, limit: int = SNIFF_CHARS) -> str:
+    """
+    Detect a file's format from its extension, else from its first characters.
+
+    Args:
+        path: File to inspect
+        limit: Maximum number of characters to read when sniffing content
+
+    Returns:
+        Registered format of the extension, else "markdown" or "org"
+    """
+    format = format_from_extension(path)
+    if format is not None:
+        return format
+    with path.open(encoding="utf-8", errors="replace") as handle:
+        return sniff_format(handle.read(limit), limit)
@@ -0,0 +1,236 @@
+"""Line-oriented section scanners for streaming very large documents.
+
+The tree parsers need the whole file in memory and build the full
+DocumentTree before chunking can start. These scanners read one line at a
+time and emit each section (a heading and its direct content) as soon as
+the next heading starts, so memory is bounded by the largest section.
+
+They follow the tree parsers' rules at line level: fenced code and
+#+BEGIN_/#+END_ blocks are never split, Markdown ATX and setext headings
+are recognised. Org sections come from the same OrgScanner that OrgParser
+uses, except that #+TODO: declarations only apply to the headings after
+them (OrgParser collects them from the whole file first). Markdown
+headings and section boundaries match the tree parser; whitespace between
+blocks inside a section may differ slightly.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+from .metadata import DocumentMetadata
+
+
+@dataclass(frozen=True, slots=True)
+class SectionRecord:
+    """One heading and its direct content (level 0: the preamble)."""
+
+    level: int
+    title: str
+    content: str
+
+
+# --- Markdown ---------------------------------------------------------------
+
+_MD_ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?[ \t]*$")
+_MD_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_MD_SETEXT_H1_RE = re.compile(r"^ {0,3}=+[ \t]*$")
+_MD_SETEXT_H2_RE = re.compile(r"^ {0,3}-+[ \t]*$")
+# Paragraph starts that can't become a setext heading title
+_MD_NON_PARAGRAPH_RE = re.compile(r"^ {0,3}([-+*>]|\d+[.)]|\||<| {4})")
+
+
+def _closes_fence(line: str, fence: str) -> bool:
+    """Whether line closes a code fence opened with `fence`."""
+    stripped = line.strip()
+    return len(stripped) >= len(fence) and stripped == fence[0] * len(stripped)
+
+
+class MarkdownScanner:
+    """Incremental Markdown section scanner (feed lines, get sections)."""
+
+    def __init__(self) -> None:
+        self._metadata = DocumentMetadata.empty()
+        self._frontmatter: Optional[list[str]] = None
+        self._first_line = True
+
+        self._level = 0
+        self._title = ""
+        self._lines: list[str] = []
+        self._fence = ""
+        self._paragraph_start: Optional[int] = None
+        self.started = False  # first heading seen
+
+    def metadata(self) -> DocumentMetadata:
+        return self._metadata
+
+    def feed(self, line: str) -> Optional[SectionRecord]:
+        """Consume one line; return the finished section if a heading starts."""
+        line = line.rstrip("\n")
+
+        if self._first_line:
+            self._first_line = False
+            if line.strip() == "---":
+                self._frontmatter = [line]
+                return None
+
+        if self._frontmatter is not None:
+            if line.strip() == "---":
+                self._metadata = DocumentMetadata.from_yaml(
+                    "\n".join(self._frontmatter[1:]), source_format="markdown"
+                )
+                self._frontmatter = None
+                return None
+            self._frontmatter.append(line)
+            return None
+
+        return self._feed_body(line)
+
+    def _feed_body(self, line: str) -> Optional[SectionRecord]:
+        if self._fence:
+            self._lines.append(line)
+            if _closes_fence(line, self._fence):
+                self._fence = ""
+            return None
+
+        fence = _MD_FENCE_RE.match(line)
+        if fence:
+            self._fence = fence.group(1)
+            self._lines.append(line)
+            self._paragraph_start = None
+            return None
+
+        atx = _MD_ATX_RE.match(line)
+        if atx:
+            return self._start_section(len(atx.group(1)), (atx.group(2) or "").strip())
+
+        if not line.strip():
+            self._paragraph_start = None
+            self._lines.append(line)
+            return None
+
+        if self._paragraph_start is not None:
+            setext_level = (
+                1 if _MD_SETEXT_H1_RE.match(line) else 2 if _MD_SETEXT_H2_RE.match(line) else 0
+            )
+            first = self._lines[self._paragraph_start]
+            if setext_level and not _MD_NON_PARAGRAPH_RE.match(first):
+                title = "\n".join(self._lines[self._paragraph_start :]).strip()
+                del self._lines[self._paragraph_start :]
+                return self._start_section(setext_level, title)
+        else:
+            self._paragraph_start = len(self._lines)
+
+        self._lines.append(line)
+        return None
+
+    def _start_section(self, level: int, title: str) -> Optional[SectionRecord]:
+        finished = self._flush()
+        self._level, self._title = level, title
+        self.started = True
+        return finished
+
+    def _flush(self) -> Optional[SectionRecord]:
+        self._paragraph_start = None
+        content = _collapse_blank_lines(self._lines)
+        self._lines = []
+        if self._level == 0 and not content:
+            return None
+        return SectionRecord(self._level, self._title, content)
+
+    def finish(self) -> list[SectionRecord]:
+        """Flush the remaining sections at end of input."""
+        records: list[SectionRecord] = []
+        if self._frontmatter is not None:
+            # No closing delimiter: it wasn't frontmatter
+            lines, self._frontmatter = self._frontmatter, None
+            records.extend(record for record in map(self._feed_body, lines) if record)
+        last = self._flush()
+        if last is not None:
+            records.append(last)
+        return records
+
+
+def _collapse_blank_lines(lines: list[str]) -> str:
+    """Join lines with single blank lines between blocks (fenced code kept as-is)."""
+    result: list[str] = []
+    fence = ""
+    blank = False
+    for line in lines:
+        if fence:
+            result.append(line)
+            if _closes_fence(line, fence):
+                fence = ""
+            continue
+        fence_match = _MD_FENCE_RE.match(line)
+        if fence_match:
+            fence = fence_match.group(1)
+        if not line.strip():
+            blank = True
+            continue
+        if blank and result:
+            result.append("")
+        blank = False
+        result.append(line)
+    return "\n".join(result).strip()
+
+
+def _make_scanner(format: str) -> Any:
+    if format in ("markdown", "md"):
+        return MarkdownScanner()
+    if format in ("org", "orgmode"):
+        # Import here to avoid circular dependency (orgmode uses SectionRecord)
+        from .orgmode import OrgScanner
+
+        return OrgScanner()
+    raise ValueError(f"Unsupported format: {format}. Supported: markdown, org")
+
+
+def stream_sections(
+    lines: Iterable[str], format: str
+) -> tuple[DocumentMetadata, Iterator[SectionRecord]]:
+    """
+    Scan a document lazily, one section at a time.
+
+    Lines up to the first heading are read eagerly so that document
+    metadata (Markdown frontmatter, Org #+KEYWORDs and file properties) is
+    known before the first section is returned. Org keywords that appear
+    after the first heading don't affect the returned metadata.
+
+    Args:
+        lines: Line iterable, e.g. an open text file
+        format: "markdown"/"md" or "org"/"orgmode"
+
+    Returns:
+        Tuple of (metadata, iterator of SectionRecord in document order)
+
+    Raises:
+        ValueError: If format is not supported
+    """
+    scanner = _make_scanner(format)
+
+    line_iter = iter(lines)
+    pending: list[SectionRecord] = []
+    for line in line_iter:
+        record = scanner.feed(line)
+        if record is not None:
+            pending.append(record)
+        if scanner.started:
+            break
+    else:
+        pending.extend(scanner.finish())
+        return scanner.metadata(), iter(pending)
+
+    metadata = scanner.metadata()
+
+    def generate() -> Iterator[SectionRecord]:
+        yield from pending
+        for line in line_iter:
+            record = scanner.feed(line)
+            if record is not None:
+                yield record
+        yield from scanner.finish()
+
+    return metadata, generate()
@@ -2,12 +2,78 @@
 
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass, field
-from typing import Iterator
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from .metadata import DocumentMetadata
 
 
+def _iter_depth_first(nodes: tuple[HeadingNode, ...]) -> Iterator[HeadingNode]:
+    """
+    Pre-order walk over nodes and their descendants.
+
+    Keeps a stack of child iterators instead of nesting generators, so each
+    node costs O(1) regardless of depth and the recursion limit never applies.
+    """
+    stack = [iter(nodes)]
+    while stack:
+        for node in stack[-1]:
+            yield node
+            if node.children:
+                stack.append(iter(node.children))
+                break
+        else:
+            stack.pop()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _merkle_hash(content_hash: str, child_hashes: Iterable[str]) -> str:
+    """SHA-256 over a node's own-text hash followed by its children's subtree hashes."""
+    # All inputs are 64-char hex digests, so plain concatenation is unambiguous
+    digest = hashlib.sha256(content_hash.encode("ascii"))
+    for child_hash in child_hashes:
+        digest.update(child_hash.encode("ascii"))
+    return digest.hexdigest()
+
+
+def _join_full_content(node: HeadingNode) -> str:
+    parts = [f"{'#' * node.level} {node.title}"]
+    if node.content.strip():
+        parts.append(node.content.strip())
+    parts.extend(child._memo["full_content"] for child in node.children)
+    return "\n\n".join(parts)
+
+
+def _combine_subtree_hash(node: HeadingNode) -> str:
+    return _merkle_hash(node.content_hash, (child._memo["subtree_hash"] for child in node.children))
+
+
+def _memoise_bottom_up(
+    root: HeadingNode, key: str, combine: Callable[[HeadingNode], Any]
+) -> Any:
+    """
+    Fill memo[key] for root and its uncached descendants, children first.
+
+    combine(node) may read memo[key] of every child.
+    """
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if key in node._memo:
+            continue
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+            continue
+        node._memo[key] = combine(node)
+
+    return root._memo[key]
+
+
 @dataclass(frozen=True, slots=True)
 class HeadingNode:
     """
@@ -17,6 +83,11 @@ class HeadingNode:
     - level, title, content are primitives/strings
     - children is a tuple (immutable sequence)
     - parent_titles provides hierarchy without mutable parent reference
+
+    Derived values (full_content, own_text, token counts, hashes) are
+    computed on first access and memoised in the _memo slot, which is not
+    part of equality, hashing or repr. TreeBuilder fills in the hashes
+    while freezing, so trees from the parsers have them from the start.
     """
 
     level: int
@@ -24,6 +95,9 @@ class HeadingNode:
     content: str = ""
     children: tuple[HeadingNode, ...] = ()
     parent_titles: tuple[str, ...] = ()
+    _memo: dict[str, Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     @property
     def path(self) -> tuple[str, ...]:
@@ -40,24 +114,14 @@ class HeadingNode:
         """
         Get content including all descendants.
 
-        Returns the heading line, content, and recursively all children.
-        Computed on-demand, not stored.
+        Returns the heading line, content, and all descendants in document
+        order. Computed once; the subtree texts of all descendants are
+        memoised on the way, so asking every node costs O(total) overall.
         """
-        parts = []
-
-        # Heading line (Markdown format for display)
-        heading_marker = "#" * self.level
-        parts.append(f"{heading_marker} {self.title}")
-
-        # Direct content
-        if self.content.strip():
-            parts.append(self.content.strip())
-
-        # Children content
-        for child in self.children:
-            parts.append(child.full_content)
-
-        return "\n\n".join(parts)
+        cached = self._memo.get("full_content")
+        if cached is None:
+            cached = _memoise_bottom_up(self, "full_content", _join_full_content)
+        return cached
 
     @property
     def own_text(self) -> str:
@@ -71,23 +135,80 @@ class HeadingNode:
 
         Format is consistent with full_content's heading line style.
         """
-        parts = []
+        cached = self._memo.get("own_text")
+        if cached is None:
+            parts = []
+
+            # Heading line (Markdown format)
+            heading_marker = "#" * self.level
+            parts.append(f"{heading_marker} {self.title}")
+
+            # Direct content only (no children)
+            if self.content.strip():
+                parts.append(self.content.strip())
+
+            cached = self._memo["own_text"] = "\n\n".join(parts)
+        return cached
+
+    @property
+    def own_tokens(self) -> int:
+        """Token count of own_text."""
+        cached = self._memo.get("own_tokens")
+        if cached is None:
+            from .chunker import count_tokens
+
+            cached = self._memo["own_tokens"] = count_tokens(self.own_text)
+        return cached
 
-        # Heading line (Markdown format)
-        heading_marker = "#" * self.level
-        parts.append(f"{heading_marker} {self.title}")
+    @property
+    def subtree_tokens(self) -> int:
+        """Token count of full_content."""
+        cached = self._memo.get("subtree_tokens")
+        if cached is None:
+            from .chunker import count_tokens
+
+            cached = self._memo["subtree_tokens"] = count_tokens(self.full_content)
+        return cached
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of own_text."""
+        cached = self._memo.get("content_hash")
+        if cached is None:
+            cached = self._memo["content_hash"] = _sha256(self.own_text)
+        return cached
+
+    @property
+    def subtree_hash(self) -> str:
+        """
+        Merkle hash of the subtree: content_hash plus the children's subtree_hash.
+
+        Equal for two subtrees exactly when their own texts and shapes are
+        equal (parent_titles don't take part), so comparing it is an O(1)
+        subtree equality check and a stable cache key.
+        """
+        cached = self._memo.get("subtree_hash")
+        if cached is None:
+            cached = _memoise_bottom_up(self, "subtree_hash", _combine_subtree_hash)
+        return cached
 
-        # Direct content only (no children)
-        if self.content.strip():
-            parts.append(self.content.strip())
+    def same_subtree(self, other: HeadingNode) -> bool:
+        """Whether other has the same text and shape (compares subtree_hash)."""
+        return self is other or self.subtree_hash == other.subtree_hash
 
-        return "\n\n".join(parts)
+    def __getstate__(self) -> tuple:
+        # Memoised values are cheap to recompute; keep pickles (e.g. results
+        # from parse worker processes) small
+        return (self.level, self.title, self.content, self.children, self.parent_titles)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(_HEADING_NODE_FIELDS, state):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_memo", {})
 
     def iter_descendants(self) -> Iterator[HeadingNode]:
         """Iterate over all descendant nodes (depth-first)."""
-        for child in self.children:
-            yield child
-            yield from child.iter_descendants()
+        return _iter_depth_first(self.children)
 
     def with_children(self, children: tuple[HeadingNode, ...]) -> HeadingNode:
         """Create a new node with updated children (structural sharing)."""
@@ -103,6 +224,52 @@ class HeadingNode:
         return f"HeadingNode(level={self.level}, title={self.title!r}, children={len(self.children)})"
 
 
+_HEADING_NODE_FIELDS = ("level", "title", "content", "children", "parent_titles")
+
+
+@dataclass(frozen=True, slots=True)
+class TreeIndex:
+    """
+    Lookup tables for one DocumentTree, built in a single pre-order walk.
+
+    A node's ordinal is its position in document (pre-order) order.
+    """
+
+    nodes: tuple[HeadingNode, ...]  # ordinal -> node
+    parents: tuple[int, ...]  # ordinal -> parent ordinal (-1 for top level)
+    ordinals: dict[int, int]  # id(node) -> ordinal
+    by_level: dict[int, tuple[HeadingNode, ...]]  # level -> nodes, document order
+    by_path: dict[tuple[str, ...], HeadingNode]  # path -> first node with that path
+    levels: frozenset[int]
+
+    @classmethod
+    def build(cls, children: tuple[HeadingNode, ...]) -> TreeIndex:
+        nodes: list[HeadingNode] = []
+        parents: list[int] = []
+        by_level: dict[int, list[HeadingNode]] = {}
+        by_path: dict[tuple[str, ...], HeadingNode] = {}
+
+        # (node, parent ordinal); reversed so the first child is popped first
+        stack = [(child, -1) for child in reversed(children)]
+        while stack:
+            node, parent = stack.pop()
+            ordinal = len(nodes)
+            nodes.append(node)
+            parents.append(parent)
+            by_level.setdefault(node.level, []).append(node)
+            by_path.setdefault(node.path, node)
+            stack.extend((child, ordinal) for child in reversed(node.children))
+
+        return cls(
+            nodes=tuple(nodes),
+            parents=tuple(parents),
+            ordinals={id(node): i for i, node in enumerate(nodes)},
+            by_level={level: tuple(group) for level, group in by_level.items()},
+            by_path=by_path,
+            levels=frozenset(by_level),
+        )
+
+
 @dataclass(frozen=True, slots=True)
 class DocumentTree:
     """
@@ -111,13 +278,36 @@ class DocumentTree:
     Supports:
     - Structural sharing for efficient transformations
     - Thread-safe concurrent access
-    - Potential undo/redo via tree diffing
+    - Structural diffing between versions (see diff_trees)
+
+    Level, path, ordinal and parent lookups go through a TreeIndex that
+    TreeBuilder.build() creates up front (other trees build it on first use).
     """
 
     children: tuple[HeadingNode, ...] = ()
     preamble: str = ""
     metadata: DocumentMetadata = field(default_factory=DocumentMetadata.empty)
     source_format: str = "markdown"
+    _index: Optional[TreeIndex] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def index(self) -> TreeIndex:
+        """Lookup tables for this tree (built once, then reused)."""
+        if self._index is None:
+            object.__setattr__(self, "_index", TreeIndex.build(self.children))
+        assert self._index is not None
+        return self._index
+
+    def __getstate__(self) -> tuple:
+        # The index is rebuilt on demand; don't pickle it
+        return (self.children, self.preamble, self.metadata, self.source_format)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(_DOCUMENT_TREE_FIELDS, state):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_index", None)
 
     def get_nodes_at_level(self, level: int) -> tuple[HeadingNode, ...]:
         """
@@ -129,28 +319,11 @@ class DocumentTree:
         Returns:
             Tuple of HeadingNode objects at that level
         """
-        result: list[HeadingNode] = []
-
-        def collect(nodes: tuple[HeadingNode, ...]) -> None:
-            for node in nodes:
-                if node.level == level:
-                    result.append(node)
-                collect(node.children)
-
-        collect(self.children)
-        return tuple(result)
+        return self.index.by_level.get(level, ())
 
     def get_all_levels(self) -> frozenset[int]:
         """Get all heading levels present in the document (immutable)."""
-        levels: set[int] = set()
-
-        def collect(nodes: tuple[HeadingNode, ...]) -> None:
-            for node in nodes:
-                levels.add(node.level)
-                collect(node.children)
-
-        collect(self.children)
-        return frozenset(levels)
+        return self.index.levels
 
     @property
     def max_level(self) -> int:
@@ -164,11 +337,59 @@ class DocumentTree:
         levels = self.get_all_levels()
         return min(levels) if levels else 0
 
+    @property
+    def node_count(self) -> int:
+        """Number of heading nodes in the document."""
+        return len(self.index.nodes)
+
+    def get_node(self, ordinal: int) -> HeadingNode:
+        """
+        Get a node by its position in document order.
+
+        Raises:
+            IndexError: If ordinal is out of range
+        """
+        if ordinal < 0:
+            raise IndexError(ordinal)
+        return self.index.nodes[ordinal]
+
+    def get_node_by_path(self, path: tuple[str, ...]) -> Optional[HeadingNode]:
+        """
+        Get the node with this heading path (the first one if titles repeat).
+
+        Args:
+            path: Titles from the top-level heading down
+
+        Returns:
+            HeadingNode, or None if no node has that path
+        """
+        return self.index.by_path.get(tuple(path))
+
+    def get_ordinal(self, node: HeadingNode) -> int:
+        """
+        Position of a node of this tree in document order.
+
+        Raises:
+            KeyError: If the node is not part of this tree
+        """
+        ordinal = self.index.ordinals.get(id(node))
+        if ordinal is None or self.index.nodes[ordinal] is not node:
+            raise KeyError(node)
+        return ordinal
+
+    def get_parent(self, node: HeadingNode) -> Optional[HeadingNode]:
+        """Parent of a node of this tree (None for top-level nodes)."""
+        parent = self.index.parents[self.get_ordinal(node)]
+        return self.index.nodes[parent] if parent >= 0 else None
+
     def iter_all_nodes(self) -> Iterator[HeadingNode]:
         """Iterate over all nodes in depth-first order."""
-        for child in self.children:
-            yield child
-            yield from child.iter_descendants()
+        if self._index is not None:
+            return iter(self._index.nodes)
+        return _iter_depth_first(self.children)
 
     def __repr__(self) -> str:
         return f"DocumentTree(children={len(self.children)}, levels={set(self.get_all_levels())})"
+
+
+_DOCUMENT_TREE_FIELDS = ("children", "preamble", "metadata", "source_format")
@@ -1,14 +1,37 @@
 """Chunking pipeline module for doc2anki."""
 
+from .cache import ParseCache
 from .classifier import ChunkType, ClassifiedNode
+from .compress import (
+    CompressionOptions,
+    CompressionStats,
+    compress_chunks,
+    iter_compressed_chunks,
+)
 from .context import ChunkWithContext
 from .interactive import run_interactive_session
-from .processor import process_pipeline
+from .processor import iter_greedy_chunks, process_pipeline
+from .parallel import ParsedFile, parse_files
+from .scan import FileStats, ScanTotals, scan_files
+from .stream import stream_content_blocks, stream_file_chunks
 
 __all__ = [
     "ChunkType",
     "ClassifiedNode",
     "ChunkWithContext",
+    "CompressionOptions",
+    "CompressionStats",
+    "compress_chunks",
+    "iter_compressed_chunks",
+    "iter_greedy_chunks",
     "process_pipeline",
+    "ParseCache",
+    "ParsedFile",
+    "parse_files",
     "run_interactive_session",
+    "FileStats",
+    "ScanTotals",
+    "scan_files",
+    "stream_content_blocks",
+    "stream_file_chunks",
 ]
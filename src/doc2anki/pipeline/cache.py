@@ -0,0 +1,212 @@
+"""On-disk cache of parse and chunk results.
+
+Each cached file gets one entry per set of chunking options, stored as two
+pickles back to back: a small header (path, mtime, size, content hash,
+parser version, options) and the ParsedFile payload. A lookup reads only
+the header unless it matches. Files whose mtime and size are unchanged are
+trusted without reading them; otherwise the content hash decides, so a
+touched but unmodified file is still a hit.
+
+The cache is bounded: prune() (run by generate after each run) drops
+entries whose input file no longer exists and then the least recently
+used ones beyond PARSE_CACHE_MAX_ENTRIES. Deleting the directory is
+always safe.
+"""
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..config import get_cache_dir
+
+if TYPE_CHECKING:
+    from .parallel import ParsedFile, _Job
+
+# Bump when parser or chunker output changes without a package release
+PARSE_CACHE_FORMAT = 2
+
+PARSE_CACHE_DIRNAME = "parse"
+
+# Entries kept by prune(), most recently used first
+PARSE_CACHE_MAX_ENTRIES = 4096
+
+
+@cache
+def _parser_version() -> str:
+    try:
+        package_version = version("doc2anki")
+    except PackageNotFoundError:
+        package_version = "unknown"
+    return f"{package_version}/{PARSE_CACHE_FORMAT}"
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hex digest of a file's bytes."""
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+@dataclass(frozen=True)
+class SourceState:
+    """
+    Input file state recorded in a cache entry.
+
+    Taken before the file is parsed, so that an edit during the parse
+    leaves the entry describing the older content, which the next lookup
+    rejects.
+    """
+
+    mtime_ns: int
+    size: int
+    sha256: str
+
+    @classmethod
+    def of(cls, path: Path) -> "SourceState":
+        # Stat first: a write after it changes the mtime, so the next lookup re-hashes
+        stat = path.stat()
+        return cls(stat.st_mtime_ns, stat.st_size, file_digest(path))
+
+
+@dataclass(frozen=True)
+class ParseCache:
+    """
+    Parse cache directory shared by the worker processes.
+
+    Args:
+        directory: Cache directory (default: $XDG_CACHE_HOME/doc2anki/parse)
+        rebuild: Ignore existing entries and overwrite them
+    """
+
+    directory: Path
+    rebuild: bool = False
+
+    @classmethod
+    def default(cls, rebuild: bool = False) -> "ParseCache":
+        return cls(get_cache_dir() / PARSE_CACHE_DIRNAME, rebuild)
+
+    def _entry_path(self, job: "_Job") -> Path:
+        key = "\0".join(
+            (
+                str(job.path.resolve()),
+                str(job.max_tokens),
+                str(job.include_parent_chain),
+                str(job.chunk),
+                str(job.stream),
+            )
+        )
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.bin"
+
+    def load(self, job: "_Job") -> Optional["ParsedFile"]:
+        """Cached result for a job, or None on a miss (or in rebuild mode)."""
+        if self.rebuild:
+            return None
+        entry = self._entry_path(job)
+        try:
+            stat = job.path.stat()
+            handle = entry.open("rb")
+        except OSError:
+            return None
+        digest: Optional[str] = None
+        try:
+            with handle:
+                header: dict[str, Any] = pickle.load(handle)
+                if header.get("version") != _parser_version():
+                    return None
+                if header["size"] != stat.st_size:
+                    return None
+                if header["mtime_ns"] != stat.st_mtime_ns:
+                    digest = file_digest(job.path)
+                    if header["sha256"] != digest:
+                        return None
+                result = pickle.load(handle)
+        except Exception:
+            # Truncated, corrupt or stale (e.g. a class was renamed since):
+            # a miss, and the entry is dropped so it isn't unpickled again
+            entry.unlink(missing_ok=True)
+            return None
+        # The path may have been spelled differently when the entry was written
+        result.path = job.path
+        try:
+            os.utime(entry)  # Entry mtime is its last use, for prune()
+        except OSError:
+            pass
+        if digest is not None:
+            # Same content, new mtime: refresh so the next lookup skips hashing
+            self.store(job, result, SourceState(stat.st_mtime_ns, stat.st_size, digest))
+        return result
+
+    def store(self, job: "_Job", result: "ParsedFile", source: SourceState) -> None:
+        """
+        Write a successful result (no-op if the directory isn't writable).
+
+        Args:
+            job: Job the result belongs to
+            result: Parse result
+            source: State of the input file from before it was parsed
+        """
+        if result.error is not None:
+            return
+        entry = self._entry_path(job)
+        header = {
+            "version": _parser_version(),
+            # Absolute: prune() may run from any working directory
+            "path": str(job.path.resolve()),
+            "mtime_ns": source.mtime_ns,
+            "size": source.size,
+            "sha256": source.sha256,
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("wb") as handle:
+                pickle.dump(header, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(result, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry)
+        except OSError:
+            pass
+
+    def prune(self, max_entries: int = PARSE_CACHE_MAX_ENTRIES) -> int:
+        """
+        Delete unusable entries and keep at most max_entries.
+
+        Entries whose input file no longer exists or whose header can't be
+        read (or was written by another parser version) go first, then the
+        least recently used beyond max_entries.
+
+        Args:
+            max_entries: Entries to keep
+
+        Returns:
+            Number of entries deleted
+        """
+        try:
+            entries = list(self.directory.glob("*.bin"))
+        except OSError:
+            return 0
+
+        removed = 0
+        kept: list[tuple[int, Path]] = []  # (last use, entry)
+        for entry in entries:
+            try:
+                with entry.open("rb") as handle:
+                    header = pickle.load(handle)
+                alive = header["version"] == _parser_version() and Path(header["path"]).exists()
+                last_used = entry.stat().st_mtime_ns
+            except Exception:
+                alive = False
+            if alive:
+                kept.append((last_used, entry))
+                continue
+            entry.unlink(missing_ok=True)
+            removed += 1
+
+        kept.sort(reverse=True)
+        for _, entry in kept[max_entries:]:
+            entry.unlink(missing_ok=True)
+            removed += 1
+        return removed
@@ -0,0 +1,314 @@
+"""Pre-send compression of chunk text.
+
+Strips or shortens markup that costs input tokens without carrying meaning
+for card generation. Code (fenced blocks, Org src/example blocks, inline
+code) and math (display and inline) are never touched.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from doc2anki.parser.chunker import count_tokens, count_tokens_batch
+
+from .context import ChunkWithContext
+
+
+# Rule names accepted by CompressionOptions.from_rules / --compress-rules
+COMPRESSION_RULES = (
+    "html_comments",
+    "data_uris",
+    "long_urls",
+    "org_drawers",
+    "blank_lines",
+    "tables",
+)
+
+
+@dataclass(frozen=True)
+class CompressionOptions:
+    """Which compression rules to apply."""
+
+    html_comments: bool = True
+    data_uris: bool = True
+    long_urls: bool = True
+    org_drawers: bool = True
+    blank_lines: bool = True
+    tables: bool = True
+
+    # URLs longer than this are shortened to scheme://host/…
+    max_url_length: int = 60
+
+    # Tables longer than this keep the header and the first rows only
+    max_table_rows: int = 20
+
+    def __post_init__(self) -> None:
+        if self.max_table_rows < 0:
+            raise ValueError(f"max_table_rows must be >= 0, got {self.max_table_rows}")
+
+    @classmethod
+    def from_rules(
+        cls,
+        rules: Iterable[str],
+        max_url_length: int = 60,
+        max_table_rows: int = 20,
+    ) -> "CompressionOptions":
+        """
+        Create options enabling only the named rules ("all" enables every rule).
+
+        Raises:
+            ValueError: If a rule name is unknown or max_table_rows is negative
+        """
+        names = {r.strip().lower() for r in rules if r.strip()}
+        if "all" in names:
+            names = set(COMPRESSION_RULES)
+
+        unknown = names - set(COMPRESSION_RULES)
+        if unknown:
+            raise ValueError(
+                f"Unknown compression rule(s): {', '.join(sorted(unknown))}. "
+                f"Available: {', '.join(COMPRESSION_RULES)}"
+            )
+
+        return cls(
+            max_url_length=max_url_length,
+            max_table_rows=max_table_rows,
+            **{rule: rule in names for rule in COMPRESSION_RULES},
+        )
+
+
+@dataclass
+class CompressionStats:
+    """Token counts before and after compression."""
+
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def ratio_saved(self) -> float:
+        """Fraction of input tokens saved (0.0-1.0)."""
+        return self.tokens_saved / self.tokens_before if self.tokens_before else 0.0
+
+
+# Block-level protected regions (opening line pattern, closing line pattern)
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_ORG_BLOCK_BEGIN_RE = re.compile(r"^\s*#\+BEGIN_(SRC|EXAMPLE|EXPORT|LATEX|VERSE)\b", re.IGNORECASE)
+_ORG_BLOCK_END_RE = re.compile(r"^\s*#\+END_(SRC|EXAMPLE|EXPORT|LATEX|VERSE)\b", re.IGNORECASE)
+_LATEX_BEGIN_RE = re.compile(r"^\s*\\begin\{")
+_LATEX_END_RE = re.compile(r"^\s*\\end\{")
+_DISPLAY_MATH_RE = re.compile(r"^\s*(\$\$|\\\[)\s*$")
+_DISPLAY_MATH_END_RE = re.compile(r"^\s*(\$\$|\\\])\s*$")
+
+# Inline protected spans: `code`, $$math$$, $math$, \(math\)
+_INLINE_PROTECTED_RE = re.compile(r"(`[^`\n]+`|\$\$[^$]+\$\$|\$[^$\n]+\$|\\\(.+?\\\))")
+
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_DATA_URI_RE = re.compile(r"data:([\w.+-]+/[\w.+-]+)?(;[\w-]+=[\w-]+)*;base64,[A-Za-z0-9+/=]+")
+_URL_RE = re.compile(r"(https?)://([^/\s)\]>\"']+)[^\s)\]>\"']*")
+_DRAWER_BEGIN_RE = re.compile(r"^\s*:[A-Za-z][\w-]*:\s*$")
+_DRAWER_END_RE = re.compile(r"^\s*:END:\s*$", re.IGNORECASE)
+_TABLE_ROW_RE = re.compile(r"^\s*\|")
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+\n")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_TABLE_RULE_RE = re.compile(r"^\s*\|?[\s:|+-]*-[\s:|+-]*\|?\s*$")
+
+
+def _split_blocks(text: str) -> list[tuple[bool, list[str]]]:
+    """Split text into (protected, lines) runs by block-level code/math regions."""
+    runs: list[tuple[bool, list[str]]] = []
+    current: list[str] = []
+    end_re: re.Pattern[str] | None = None
+    fence = ""
+
+    def flush(protected: bool) -> None:
+        nonlocal current
+        if current:
+            runs.append((protected, current))
+        current = []
+
+    for line in text.split("\n"):
+        if end_re is None and not fence:
+            fence_match = _FENCE_RE.match(line)
+            if fence_match:
+                flush(False)
+                fence = fence_match.group(1)
+                current.append(line)
+                continue
+            for begin, end in (
+                (_ORG_BLOCK_BEGIN_RE, _ORG_BLOCK_END_RE),
+                (_LATEX_BEGIN_RE, _LATEX_END_RE),
+                (_DISPLAY_MATH_RE, _DISPLAY_MATH_END_RE),
+            ):
+                if begin.match(line):
+                    flush(False)
+                    end_re = end
+                    current.append(line)
+                    break
+            else:
+                current.append(line)
+            continue
+
+        # Inside a protected region
+        current.append(line)
+        if fence and line.strip().startswith(fence) and len(current) > 1:
+            fence = ""
+            flush(True)
+        elif end_re is not None and len(current) > 1 and end_re.match(line):
+            end_re = None
+            flush(True)
+
+    # Unterminated region stays protected
+    flush(bool(fence) or end_re is not None)
+    return runs
+
+
+def _shorten_url(match: re.Match[str], max_length: int) -> str:
+    url = match.group(0)
+    if len(url) <= max_length:
+        return url
+    return f"{match.group(1)}://{match.group(2)}/…"
+
+
+def _compress_inline(text: str, options: CompressionOptions) -> str:
+    """Apply span-level rules outside inline code/math."""
+    pieces = _INLINE_PROTECTED_RE.split(text)
+    for i in range(0, len(pieces), 2):
+        piece = pieces[i]
+        if options.data_uris:
+            piece = _DATA_URI_RE.sub(
+                lambda m: f"data:{m.group(1) or ''};base64,…", piece
+            )
+        if options.long_urls:
+            piece = _URL_RE.sub(lambda m: _shorten_url(m, options.max_url_length), piece)
+        pieces[i] = piece
+    return "".join(pieces)
+
+
+def _drop_drawers(lines: list[str]) -> list[str]:
+    result: list[str] = []
+    drawer: list[str] = []
+    for line in lines:
+        if drawer:
+            drawer.append(line)
+            if _DRAWER_END_RE.match(line):
+                drawer = []
+            continue
+        if _DRAWER_BEGIN_RE.match(line) and not _DRAWER_END_RE.match(line):
+            drawer = [line]
+            continue
+        result.append(line)
+    # Unterminated drawer: not a drawer after all, keep it
+    result.extend(drawer)
+    return result
+
+
+def _truncate_tables(lines: list[str], max_rows: int) -> list[str]:
+    result: list[str] = []
+    table: list[str] = []
+
+    def flush() -> None:
+        if len(table) > max_rows:
+            # Keep header (and its rule line) plus the first data rows
+            header = 2 if len(table) > 1 and _TABLE_RULE_RE.match(table[1]) else 1
+            kept = table[: header + max_rows]
+            omitted = len(table) - len(kept)
+            result.extend(kept)
+            if omitted > 0:
+                result.append(f"| … ({omitted} more rows) |")
+        else:
+            result.extend(table)
+        table.clear()
+
+    for line in lines:
+        if _TABLE_ROW_RE.match(line):
+            table.append(line)
+        else:
+            flush()
+            result.append(line)
+    flush()
+    return result
+
+
+def _compress_lines(lines: list[str], options: CompressionOptions) -> list[str]:
+    if options.org_drawers:
+        lines = _drop_drawers(lines)
+    if options.tables:
+        lines = _truncate_tables(lines, options.max_table_rows)
+    return [_compress_inline(line, options) for line in lines]
+
+
+def compress_text(text: str, options: CompressionOptions) -> str:
+    """
+    Compress chunk text for sending to the LLM.
+
+    Args:
+        text: Chunk content
+        options: Enabled rules
+
+    Returns:
+        Compressed text with code and math left intact
+    """
+    parts: list[str] = []
+    for protected, lines in _split_blocks(text):
+        if protected:
+            parts.append("\n".join(lines))
+            continue
+        run = "\n".join(_compress_lines(lines, options))
+        if options.html_comments:
+            # Comments may span lines, so strip them from the whole run
+            run = _HTML_COMMENT_RE.sub("", run)
+        if options.blank_lines:
+            run = _TRAILING_SPACE_RE.sub("\n", run)
+            run = _BLANK_LINES_RE.sub("\n\n", run)
+        parts.append(run)
+
+    return "\n".join(parts).strip()
+
+
+def compress_chunks(
+    chunks: list[ChunkWithContext],
+    options: CompressionOptions,
+) -> CompressionStats:
+    """
+    Compress the content of each chunk in place.
+
+    Args:
+        chunks: Chunks from process_pipeline
+        options: Enabled rules
+
+    Returns:
+        Token counts before and after compression
+    """
+    stats = CompressionStats()
+    stats.tokens_before = sum(count_tokens_batch([chunk.chunk_content for chunk in chunks]))
+    for chunk in chunks:
+        chunk.chunk_content = compress_text(chunk.chunk_content, options)
+    stats.tokens_after = sum(count_tokens_batch([chunk.chunk_content for chunk in chunks]))
+    return stats
+
+
+def iter_compressed_chunks(
+    chunks: Iterable[ChunkWithContext],
+    options: CompressionOptions,
+    stats: CompressionStats,
+) -> Iterator[ChunkWithContext]:
+    """
+    Compress chunks one at a time as they are consumed (for --stream).
+
+    Args:
+        chunks: Chunks, possibly a lazy iterator
+        options: Enabled rules
+        stats: Updated with the token counts of each chunk as it passes
+
+    Returns:
+        Iterator of the compressed chunks
+    """
+    for chunk in chunks:
+        stats.tokens_before += count_tokens(chunk.chunk_content)
+        chunk.chunk_content = compress_text(chunk.chunk_content, options)
+        stats.tokens_after += count_tokens(chunk.chunk_content)
+        yield chunk
@@ -19,6 +19,10 @@ class ChunkWithContext:
     # Accumulated context from previous FULL/CONTEXT_ONLY chunks
     accumulated_context: str = ""
 
+    # The sections accumulated_context was joined from (one per node), so
+    # it can be trimmed a whole section at a time
+    context_sections: tuple[str, ...] = ()
+
     # Heading hierarchy for this chunk (immutable tuple)
     parent_chain: tuple[str, ...] = ()
 
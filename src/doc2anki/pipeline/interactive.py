@@ -7,8 +7,8 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.syntax import Syntax
 
+from doc2anki.parser.chunker import count_tokens_batch
 from doc2anki.parser.tree import DocumentTree, HeadingNode
-from doc2anki.parser.chunker import count_tokens
 
 from .classifier import ChunkType, ClassifiedNode
 
@@ -69,7 +69,7 @@ class InteractiveSession:
 
         node = self.nodes[self.current_index]
         # Use own_text for independent classification semantics
-        tokens = count_tokens(node.own_text)
+        tokens = node.own_tokens
 
         self.classified[self.current_index].chunk_type = chunk_type
 
@@ -133,9 +133,10 @@ def display_section_summary(
 
     oversized: list[tuple[str, int]] = []
 
-    for i, node in enumerate(nodes, 1):
-        # Use own_text for independent classification semantics
-        tokens = count_tokens(node.own_text)
+    # Use own_text for independent classification semantics; counting all
+    # sections in one batch also warms the cache for the prompts that follow
+    section_tokens = count_tokens_batch([node.own_text for node in nodes])
+    for i, (node, tokens) in enumerate(zip(nodes, section_tokens), 1):
         breadcrumb = " > ".join(node.path)
 
         if tokens > max_tokens:
@@ -196,7 +197,7 @@ def prompt_classification(
         return "done"
 
     # Use own_text for independent classification semantics
-    tokens = count_tokens(node.own_text)
+    tokens = node.own_tokens
     idx = session.current_index + 1
     total = session.total
 
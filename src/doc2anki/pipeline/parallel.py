@@ -0,0 +1,198 @@
+"""Parallel parsing and chunking of input files.
+
+Parsing and chunking are CPU-bound pure Python, so files are spread over
+worker processes. Results come back as picklable DocumentTree and
+ChunkWithContext objects, in input order.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+from doc2anki.parser import (
+    DocumentTree,
+    build_document_tree,
+    count_tokens,
+    get_parser,
+    set_tokenizer_threads,
+)
+from doc2anki.parser.metadata import DocumentMetadata
+
+from .cache import ParseCache, SourceState
+from .context import ChunkWithContext
+from .processor import process_pipeline
+from .stream import stream_file_chunks
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class ParsedFile:
+    """Parse (and optionally chunk) result for one input file."""
+
+    path: Path
+    tree: Optional[DocumentTree] = None  # None in streaming mode
+    metadata: DocumentMetadata = field(default_factory=DocumentMetadata.empty)
+    # A lazy iterator with parse_files(lazy=True), read as it is consumed
+    chunks: list[ChunkWithContext] | Iterator[ChunkWithContext] = field(default_factory=list)
+
+    # Set on failure: stage is "parse" or "pipeline"
+    error: Optional[str] = None
+    error_stage: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _Job:
+    path: Path
+    max_tokens: int
+    include_parent_chain: bool
+    chunk: bool
+    stream: bool = False
+    cache: Optional[ParseCache] = None
+    lazy: bool = False
+
+
+def _init_worker() -> None:
+    """Warm the tokenizer and parsers once per worker process."""
+    # The processes already use every CPU
+    set_tokenizer_threads(1)
+    count_tokens("warm up")
+    get_parser("markdown")
+    get_parser("org")
+
+
+def _run_job(job: _Job) -> ParsedFile:
+    # Caching streamed chunks would hold (and pickle) the whole document
+    if job.cache is None or job.stream:
+        return _parse_job(job)
+
+    result = job.cache.load(job)
+    if result is None:
+        try:
+            source = SourceState.of(job.path)
+        except OSError:
+            # Unreadable input: let the parse report the error
+            return _parse_job(job)
+        result = _parse_job(job)
+        job.cache.store(job, result, source)
+    return result
+
+
+def _parse_job(job: _Job) -> ParsedFile:
+    result = ParsedFile(path=job.path)
+
+    if job.stream:
+        try:
+            result.metadata, chunks = stream_file_chunks(job.path, job.max_tokens)
+            result.chunks = chunks if job.lazy else list(chunks)
+        except Exception as e:
+            result.error, result.error_stage = str(e), "parse"
+        return result
+
+    try:
+        result.tree = build_document_tree(job.path)
+    except Exception as e:
+        result.error, result.error_stage = str(e), "parse"
+        return result
+    result.metadata = result.tree.metadata
+
+    if job.chunk:
+        try:
+            result.chunks = process_pipeline(
+                tree=result.tree,
+                max_tokens=job.max_tokens,
+                include_parent_chain=job.include_parent_chain,
+            )
+        except Exception as e:
+            result.error, result.error_stage = str(e), "pipeline"
+
+    return result
+
+
+def default_jobs() -> int:
+    """Number of worker processes for --jobs 0 (one per available CPU)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse_files(
+    files: list[Path],
+    max_tokens: int = 3000,
+    include_parent_chain: bool = True,
+    jobs: int = 1,
+    chunk: bool = True,
+    stream: bool = False,
+    cache: Optional[ParseCache] = None,
+    lazy: bool = False,
+) -> Iterator[ParsedFile]:
+    """
+    Parse and chunk files, in parallel when jobs > 1.
+
+    Errors are captured per file instead of raised, so the caller decides
+    whether to stop. Results are yielded in the order of files.
+
+    Args:
+        files: Input files
+        max_tokens: Maximum tokens per chunk
+        include_parent_chain: Whether to include heading hierarchy
+        jobs: Worker processes (1 = in this process, 0 = one per CPU)
+        chunk: Also run process_pipeline (False: parse trees only, e.g. for
+               interactive classification)
+        stream: Chunk with the streaming scanners instead of building a
+                DocumentTree (ParsedFile.tree stays None); never cached
+        cache: Reuse results for unchanged files from this on-disk cache
+        lazy: With stream, leave ParsedFile.chunks as an iterator that reads
+              the file as it is consumed, so memory stays bounded by the
+              current chunk. Runs in this process; errors while iterating
+              are raised by the iterator, not captured.
+
+    Returns:
+        Iterator of ParsedFile in input order
+    """
+    lazy = lazy and stream
+    if lazy:
+        # Iterators can't leave a worker process
+        jobs = 1
+    job_list = [
+        _Job(path, max_tokens, include_parent_chain, chunk, stream, cache, lazy) for path in files
+    ]
+    return map_in_workers(_run_job, job_list, jobs)
+
+
+def map_in_workers(function: Callable[[T], R], items: list[T], jobs: int) -> Iterator[R]:
+    """
+    Apply a picklable function to items across worker processes, in order.
+
+    Args:
+        function: Module-level function (must be picklable)
+        items: Arguments, one call each
+        jobs: Worker processes (1 = in this process, 0 = one per CPU)
+
+    Returns:
+        Iterator of results in the order of items
+    """
+    if jobs == 0:
+        jobs = default_jobs()
+
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    jobs = min(jobs, len(items))
+    # Batch small files so pickling overhead doesn't dominate
+    chunksize = max(1, len(items) // (jobs * 8))
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+    finished = False
+    try:
+        yield from executor.map(function, items, chunksize=chunksize)
+        finished = True
+    finally:
+        # A consumer that stops early (e.g. fatal_exit on a parse error)
+        # doesn't wait for the queued or running items
+        executor.shutdown(wait=finished, cancel_futures=not finished)
@@ -1,10 +1,10 @@
 """Pipeline processor for document chunking and processing."""
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
 
-from doc2anki.parser.tree import DocumentTree, HeadingNode
-from doc2anki.parser.chunker import count_tokens
+from doc2anki.parser.tree import DocumentTree
+from doc2anki.parser.chunker import count_tokens, count_tokens_batch
 from doc2anki.parser.metadata import DocumentMetadata
 
 from .classifier import ChunkType, ClassifiedNode
@@ -19,6 +19,8 @@ class ContentBlock:
     heading: str  # heading 行，preamble 为空
     content: str  # 直接内容（不含子节点）
     path: tuple[str, ...]  # 祖先路径
+    # to_text() 的 token 数（来自节点的缓存值；None 表示需要现算）
+    tokens: Optional[int] = field(default=None, compare=False)
 
     def to_text(self) -> str:
         """转换为文本"""
@@ -57,8 +59,8 @@ def flatten_tree(tree: DocumentTree) -> list[ContentBlock]:
             )
         )
 
-    # 2. 递归展平所有节点
-    def flatten_node(node: HeadingNode) -> None:
+    # 2. 按深度优先顺序展平所有节点（显式栈，不受递归深度限制）
+    for node in tree.iter_all_nodes():
         heading_line = "#" * node.level + " " + node.title
         blocks.append(
             ContentBlock(
@@ -68,84 +70,104 @@ def flatten_tree(tree: DocumentTree) -> list[ContentBlock]:
                 path=node.path,
             )
         )
-        # 递归子节点
-        for child in node.children:
-            flatten_node(child)
-
-    for child in tree.children:
-        flatten_node(child)
 
+    # 3. 所有块一次批量计数（to_text() == own_text，结果进入共享缓存）
+    count_block_tokens(blocks)
     return blocks
 
 
-def greedy_chunk(
-    blocks: list[ContentBlock],
+def count_block_tokens(blocks: list[ContentBlock], threads: Optional[int] = None) -> None:
+    """
+    批量填充 tokens 为 None 的块。
+
+    blocks 可以来自多个文档（例如整个目录），一次调用即可并行计数。
+
+    Args:
+        blocks: ContentBlocks to count
+        threads: Tokenizer threads (None = default)
+    """
+    pending = [block for block in blocks if block.tokens is None]
+    counts = count_tokens_batch([block.to_text() for block in pending], threads)
+    for block, tokens in zip(pending, counts):
+        block.tokens = tokens
+
+
+def iter_greedy_chunks(
+    blocks: Iterable[ContentBlock],
     max_tokens: int,
     metadata: DocumentMetadata,
-) -> list[ChunkWithContext]:
+) -> Iterator[ChunkWithContext]:
     """
-    贪婪合并内容块直到接近 max_tokens。
+    贪婪合并内容块，逐个产出 chunk（惰性）。
 
-    策略：
-    - 从头开始累积
-    - 当下一个块会超过 max_tokens 时，切分
-    - 每个 chunk 尽可能大
+    blocks 可以是任意可迭代对象（包括流式解析的生成器），
+    内存只与当前 chunk 的大小相关。
 
     Args:
-        blocks: List of ContentBlock to merge
+        blocks: ContentBlocks in document order
         max_tokens: Maximum tokens per chunk
         metadata: Document metadata
 
     Returns:
-        List of ChunkWithContext objects
+        Iterator of ChunkWithContext objects
     """
-    if not blocks:
-        return []
-
-    result: list[ChunkWithContext] = []
-    current_blocks: list[ContentBlock] = []
+    current_texts: list[str] = []
+    current_path: tuple[str, ...] = ()
     current_tokens = 0
 
+    def make_chunk() -> ChunkWithContext:
+        return ChunkWithContext(
+            metadata=metadata,
+            accumulated_context="",
+            parent_chain=current_path,
+            chunk_content="\n\n".join(current_texts),
+        )
+
     for block in blocks:
         block_text = block.to_text()
-        block_tokens = count_tokens(block_text)
+        block_tokens = block.tokens if block.tokens is not None else count_tokens(block_text)
 
         # 检查是否需要切分
-        if current_blocks and current_tokens + block_tokens > max_tokens:
-            # 保存当前 chunk
-            chunk_content = "\n\n".join(b.to_text() for b in current_blocks)
-            # 使用第一个非空 path 或第一个 block 的 path
-            first_path = next((b.path for b in current_blocks if b.path), ())
-            result.append(
-                ChunkWithContext(
-                    metadata=metadata,
-                    accumulated_context="",
-                    parent_chain=first_path,
-                    chunk_content=chunk_content,
-                )
-            )
+        if current_texts and current_tokens + block_tokens > max_tokens:
+            yield make_chunk()
             # 重置
-            current_blocks = []
+            current_texts = []
+            current_path = ()
             current_tokens = 0
 
-        # 添加当前 block
-        current_blocks.append(block)
+        # 添加当前 block；使用第一个非空 path
+        current_texts.append(block_text)
+        if not current_path and block.path:
+            current_path = block.path
         current_tokens += block_tokens
 
     # 保存最后一个 chunk
-    if current_blocks:
-        chunk_content = "\n\n".join(b.to_text() for b in current_blocks)
-        first_path = next((b.path for b in current_blocks if b.path), ())
-        result.append(
-            ChunkWithContext(
-                metadata=metadata,
-                accumulated_context="",
-                parent_chain=first_path,
-                chunk_content=chunk_content,
-            )
-        )
+    if current_texts:
+        yield make_chunk()
 
-    return result
+
+def greedy_chunk(
+    blocks: Iterable[ContentBlock],
+    max_tokens: int,
+    metadata: DocumentMetadata,
+) -> list[ChunkWithContext]:
+    """
+    贪婪合并内容块直到接近 max_tokens。
+
+    策略：
+    - 从头开始累积
+    - 当下一个块会超过 max_tokens 时，切分
+    - 每个 chunk 尽可能大
+
+    Args:
+        blocks: ContentBlocks to merge
+        max_tokens: Maximum tokens per chunk
+        metadata: Document metadata
+
+    Returns:
+        List of ChunkWithContext objects
+    """
+    return list(iter_greedy_chunks(blocks, max_tokens, metadata))
 
 
 def classify_nodes(
@@ -196,6 +218,7 @@ def _process_with_classified_nodes(
     # Build ContentBlocks from CARD/FULL nodes (using own_text semantics)
     card_blocks: list[ContentBlock] = []
     context_content = ""
+    context_sections: list[str] = []
 
     for cn in classified_nodes:
         if cn.chunk_type == ChunkType.SKIP:
@@ -210,12 +233,15 @@ def _process_with_classified_nodes(
                     heading="#" * cn.node.level + " " + cn.node.title,
                     content=cn.node.content,  # Direct content only
                     path=cn.node.path if include_parent_chain else (),
+                    tokens=cn.node.own_tokens,  # Counted once per node
                 )
             )
 
         # Accumulate context using own_text (not full_content)
         if cn.should_add_to_context:
             context_content += f"\n\n{cn.node.own_text}"
+            if cn.node.own_text.strip():
+                context_sections.append(cn.node.own_text.strip())
 
     if not card_blocks:
         return []
@@ -227,6 +253,7 @@ def _process_with_classified_nodes(
     if context_content.strip():
         for chunk in result:
             chunk.accumulated_context = context_content.strip()
+            chunk.context_sections = tuple(context_sections)
 
     return result
 
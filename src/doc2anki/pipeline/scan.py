@@ -0,0 +1,155 @@
+"""Corpus inventory: per-file statistics without calling the LLM.
+
+Each worker parses one file and reduces it to a small FileStats record
+(format, frontmatter keys, heading count and depth, token total,
+projected chunk count, oversized sections), so only the numbers cross the
+process boundary, not trees or chunks.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from doc2anki.parser import build_document_tree
+
+from .parallel import map_in_workers
+from .processor import flatten_tree, iter_greedy_chunks
+
+
+@dataclass(frozen=True)
+class OversizedSection:
+    """A section whose own text alone exceeds max_tokens (cannot be split further)."""
+
+    path: tuple[str, ...]  # () for the preamble
+    tokens: int
+
+
+@dataclass
+class FileStats:
+    """Inventory of one input file."""
+
+    path: Path
+    format: str = ""
+    frontmatter_keys: tuple[str, ...] = ()
+    headings: int = 0
+    depth: int = 0  # deepest heading nesting (1 = top-level headings only)
+    tokens: int = 0
+    chunks: int = 0  # projected at max_tokens
+    oversized: tuple[OversizedSection, ...] = ()
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "format": self.format,
+            "frontmatter_keys": list(self.frontmatter_keys),
+            "headings": self.headings,
+            "depth": self.depth,
+            "tokens": self.tokens,
+            "chunks": self.chunks,
+            "oversized": [
+                {"path": list(section.path), "tokens": section.tokens}
+                for section in self.oversized
+            ],
+            "error": self.error,
+        }
+
+
+@dataclass
+class ScanTotals:
+    """Sums over all scanned files."""
+
+    files: int = 0
+    failed: int = 0
+    headings: int = 0
+    tokens: int = 0
+    chunks: int = 0
+    oversized: int = 0
+    formats: dict[str, int] = field(default_factory=dict)
+
+    def add(self, stats: FileStats) -> None:
+        self.files += 1
+        if stats.error is not None:
+            self.failed += 1
+            return
+        self.headings += stats.headings
+        self.tokens += stats.tokens
+        self.chunks += stats.chunks
+        self.oversized += len(stats.oversized)
+        self.formats[stats.format] = self.formats.get(stats.format, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "headings": self.headings,
+            "tokens": self.tokens,
+            "chunks": self.chunks,
+            "oversized": self.oversized,
+            "formats": dict(self.formats),
+        }
+
+
+def scan_file(path: Path, max_tokens: int = 3000) -> FileStats:
+    """
+    Parse one file and collect its statistics.
+
+    Chunks are projected with the same flatten + greedy merge as
+    process_pipeline; flatten_tree counts all blocks in one batch.
+
+    Args:
+        path: Input file
+        max_tokens: Chunk size to project against
+
+    Returns:
+        FileStats (with error set if the file could not be parsed)
+    """
+    try:
+        tree = build_document_tree(path)
+    except Exception as e:
+        return FileStats(path=path, error=str(e))
+
+    blocks = flatten_tree(tree)
+    tokens = 0
+    oversized: list[OversizedSection] = []
+    for block in blocks:
+        assert block.tokens is not None  # Counted in one batch by flatten_tree
+        tokens += block.tokens
+        if block.tokens > max_tokens:
+            oversized.append(OversizedSection(block.path, block.tokens))
+
+    return FileStats(
+        path=path,
+        format=tree.source_format,
+        frontmatter_keys=tuple(tree.metadata.raw_data),
+        headings=tree.node_count,
+        depth=max((node.depth + 1 for node in tree.iter_all_nodes()), default=0),
+        tokens=tokens,
+        chunks=sum(1 for _ in iter_greedy_chunks(blocks, max_tokens, tree.metadata)),
+        oversized=tuple(oversized),
+    )
+
+
+@dataclass(frozen=True)
+class _ScanJob:
+    path: Path
+    max_tokens: int
+
+
+def _run_scan(job: _ScanJob) -> FileStats:
+    return scan_file(job.path, job.max_tokens)
+
+
+def scan_files(files: list[Path], max_tokens: int = 3000, jobs: int = 0) -> Iterator[FileStats]:
+    """
+    Collect FileStats for many files, in parallel.
+
+    Args:
+        files: Input files
+        max_tokens: Chunk size to project against
+        jobs: Worker processes (1 = in this process, 0 = one per CPU)
+
+    Returns:
+        Iterator of FileStats in the order of files
+    """
+    return map_in_workers(_run_scan, [_ScanJob(path, max_tokens) for path in files], jobs)
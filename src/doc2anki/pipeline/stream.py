@@ -0,0 +1,99 @@
+"""Streaming pipeline: file handle -> ContentBlocks -> chunks, lazily.
+
+For documents too large to hold as a DocumentTree. Sections are read one
+at a time with the line scanners from parser.stream and merged by
+iter_greedy_chunks, so memory stays bounded by the current chunk.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+
+from doc2anki.parser.metadata import DocumentMetadata
+from doc2anki.parser.sniff import sniff_file
+from doc2anki.parser.stream import SectionRecord, stream_sections
+
+from .context import ChunkWithContext
+from .processor import ContentBlock, iter_greedy_chunks
+
+
+def iter_content_blocks(records: Iterable[SectionRecord]) -> Iterator[ContentBlock]:
+    """
+    Turn section records into ContentBlocks with their ancestor paths.
+
+    Produces the same sequence as flatten_tree on the equivalent tree.
+    """
+    # (level, title) of the open headings
+    stack: list[tuple[int, str]] = []
+
+    for record in records:
+        if record.level == 0:
+            if record.content.strip():
+                yield ContentBlock(level=0, heading="", content=record.content.strip(), path=())
+            continue
+
+        while stack and stack[-1][0] >= record.level:
+            stack.pop()
+        stack.append((record.level, record.title))
+
+        yield ContentBlock(
+            level=record.level,
+            heading="#" * record.level + " " + record.title,
+            content=record.content,
+            path=tuple(title for _, title in stack),
+        )
+
+
+def stream_content_blocks(
+    handle: TextIO, format: str
+) -> tuple[DocumentMetadata, Iterator[ContentBlock]]:
+    """
+    Read ContentBlocks incrementally from an open text file.
+
+    Args:
+        handle: Text file handle (read line by line)
+        format: "markdown" or "org"
+
+    Returns:
+        Tuple of (document metadata, lazy ContentBlock iterator)
+    """
+    metadata, records = stream_sections(handle, format)
+    return metadata, iter_content_blocks(records)
+
+
+def stream_file_chunks(
+    path: Path,
+    max_tokens: int = 3000,
+    format: Optional[str] = None,
+) -> tuple[DocumentMetadata, Iterator[ChunkWithContext]]:
+    """
+    Chunk a file without building its DocumentTree.
+
+    The file stays open until the returned iterator is exhausted or closed.
+
+    Args:
+        path: Input file
+        max_tokens: Maximum tokens per chunk
+        format: "markdown" or "org" (default: from the file extension,
+                else sniffed from the start of the file)
+
+    Returns:
+        Tuple of (document metadata, lazy ChunkWithContext iterator)
+
+    Raises:
+        ValueError: If format is not supported
+    """
+    if format is None:
+        format = sniff_file(path)
+
+    handle = path.open(encoding="utf-8")
+    try:
+        metadata, blocks = stream_content_blocks(handle, format)
+    except Exception:
+        handle.close()
+        raise
+
+    def generate() -> Iterator[ChunkWithContext]:
+        with handle:
+            yield from iter_greedy_chunks(blocks, max_tokens, metadata)
+
+    return metadata, generate()
@@ -0,0 +1,636 @@
+"""Tests for the LLM layer (no network access)."""
+
+import pytest
+
+from doc2anki.llm.budget import RunBudget, BudgetExceededError
+
+
+class TestRunBudget:
+    """Tests for run-wide budget enforcement."""
+
+    def test_unlimited_budget(self):
+        budget = RunBudget()
+
+        assert not budget.is_limited
+        budget.check(10_000_000)
+
+    def test_input_limit_checked_before_request(self):
+        budget = RunBudget(max_input_tokens=1000)
+        budget.check(600)
+        budget.record(600, 100)
+
+        with pytest.raises(BudgetExceededError):
+            budget.check(600)
+
+        # A smaller request still fits
+        budget.check(400)
+
+    def test_output_limit(self):
+        budget = RunBudget(max_output_tokens=500)
+        budget.record(100, 300)
+
+        assert budget.remaining_output_tokens() == 200
+        budget.check(100)
+
+        budget.record(100, 200)
+        with pytest.raises(BudgetExceededError):
+            budget.check(100)
+
+    def test_cost_limit(self):
+        budget = RunBudget(max_cost=1.0, input_price=1.0, output_price=2.0)
+        budget.record(500_000, 200_000)
+
+        assert budget.cost == pytest.approx(0.9)
+        budget.check(50_000)
+        # $0.05 left after the prompt buys 25k output tokens at $2/1M
+        assert budget.request_max_tokens(50_000, 100_000) == 25_000
+        assert budget.request_max_tokens(50_000, 4_000) == 4_000
+        with pytest.raises(BudgetExceededError):
+            budget.check(100_000)  # Prompt alone uses up the budget
+        with pytest.raises(BudgetExceededError):
+            budget.check(100_001)
+
+    def test_cost_limit_requires_prices(self):
+        with pytest.raises(ValueError):
+            RunBudget(max_cost=1.0)
+
+    @pytest.mark.parametrize("extra_args", [[], ["--stream"]])
+    def test_generate_stops_dispatch_and_writes_partial_deck(
+        self, tmp_path, monkeypatch, extra_args
+    ):
+        import json
+        import sqlite3
+        import zipfile
+
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+        from doc2anki.llm import client as llm_client
+        from doc2anki.llm.client import LLMResponse
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        config = tmp_path / "ai_providers.toml"
+        config.write_text(
+            '[mock]\nenable = true\nauth_type = "direct"\n'
+            'base_url = "http://127.0.0.1:9/v1"\nmodel = "mock-model"\napi_key = "sk-test"\n'
+        )
+        notes = tmp_path / "notes"
+        notes.mkdir()
+        for name in ("a", "b"):
+            sections = "".join(
+                f"# {name.upper()}{i}\n\n" + f"Facts about {name} number {i}. " * 8 + "\n\n"
+                for i in range(3)
+            )
+            (notes / f"{name}.md").write_text(sections, encoding="utf-8")
+
+        prompts: list[str] = []
+
+        def fake_call_llm(client, model, prompt, max_tokens=0, **kwargs):
+            prompts.append(prompt)
+            card = {"type": "basic", "front": f"Question {len(prompts)}?", "back": "Some answer"}
+            return LLMResponse(json.dumps({"cards": [card]}), None, 10)
+
+        monkeypatch.setattr(llm_client, "call_llm", fake_call_llm)
+        output = tmp_path / "deck.apkg"
+        result = CliRunner().invoke(
+            app,
+            ["generate", str(notes), "-p", "mock", "-c", str(config), "-o", str(output),
+             "--max-tokens", "60", "--max-output-tokens", "20", "--no-parse-cache", *extra_args],
+            env={"COLUMNS": "200"},
+        )
+
+        assert result.exit_code == 0, result.output
+        # Two requests fit the output limit; nothing is sent after the third check fails
+        assert len(prompts) == 2
+        assert "Stopping dispatch" in result.output
+        assert "Skipped 4 chunk(s)" in result.output
+        assert "b.md [1/3]" in result.output and "a.md [3/3]" in result.output
+        assert "Created partial" in result.output
+        assert "generate their cards: " + str(notes / "b.md") in result.output
+        assert "a.md was only partly processed (1 of 3 chunk(s) not sent)" in result.output
+        assert "duplicates" in result.output
+
+        with zipfile.ZipFile(output) as apkg:
+            (tmp_path / "collection.anki2").write_bytes(apkg.read("collection.anki2"))
+        with sqlite3.connect(tmp_path / "collection.anki2") as db:
+            assert db.execute("select count(*) from notes").fetchone()[0] == 2
+
+
+class TestExtractor:
+    """Tests for JSON span location and card validation."""
+
+    CARD_JSON = (
+        '{"cards": [{"type": "basic", "front": "What is {x}?", '
+        '"back": "<span style=\\"color: #fff\\">a \\\\ \\" } brace</span>", "tags": []}]}'
+    )
+
+    def test_pure_json(self):
+        from doc2anki.llm.extractor import parse_card_output
+
+        output = parse_card_output(self.CARD_JSON)
+        assert len(output.cards) == 1
+        assert output.cards[0].front == "What is {x}?"
+
+    def test_fenced_json_after_prose_braces(self):
+        from doc2anki.llm.extractor import parse_card_output, extract_json
+
+        text = f"Here you go {{not json}}:\n```json\n{self.CARD_JSON}\n```\nDone."
+        assert len(parse_card_output(text).cards) == 1
+        assert "cards" in extract_json(text)
+
+    def test_bytes_input(self):
+        from doc2anki.llm.extractor import parse_card_output
+
+        output = parse_card_output(self.CARD_JSON.encode("utf-8"))
+        assert output.cards[0].type == "basic"
+
+    def test_unclosed_prose_brace(self):
+        from doc2anki.llm.extractor import iter_json_spans
+
+        text = 'use { carefully {"a": 1}'
+        spans = list(iter_json_spans(text))
+        assert text[slice(*spans[0])] == '{"a": 1}'
+
+    def test_many_unclosed_braces(self):
+        from doc2anki.llm.extractor import iter_json_spans, parse_card_output
+
+        text = "{ " * 20000 + self.CARD_JSON
+        assert len(parse_card_output(text).cards) == 1
+
+        text = '{ {"a": 1} { {"b": 2}'
+        spans = [text[slice(*span)] for span in iter_json_spans(text)]
+        assert spans == ['{"a": 1}', '{"b": 2}']
+
+    def test_schema_error_raised(self):
+        from pydantic import ValidationError
+        from doc2anki.llm.extractor import parse_card_output
+
+        with pytest.raises(ValidationError):
+            parse_card_output('{"cards": [{"type": "basic", "front": "x"}]}')
+
+    def test_no_json(self):
+        from doc2anki.llm.extractor import parse_card_output, JSONExtractionError
+
+        with pytest.raises(JSONExtractionError):
+            parse_card_output("no json here")
+
+
+class TestPromptTemplate:
+    """Tests for template caching and prompt rendering."""
+
+    def test_default_template_loaded_once(self):
+        from doc2anki.llm.prompt import load_template
+
+        assert load_template() is load_template()
+
+    def test_prebuilt_parts_match_full_render(self):
+        from doc2anki.llm.prompt import load_template, build_prompt
+
+        template = load_template()
+        context = {"title": "TCP", "tags": ["net", "tcp"]}
+        chain = ["Networking", "TCP"]
+
+        for chunk in ("first chunk", "second {{ chunk }} with braces"):
+            expected = template.render(
+                global_context=context, chunk_content=chunk, parent_chain=chain
+            )
+            assert build_prompt(context, chunk, template, chain) == expected
+
+    def test_distinct_chains_share_static_parts(self, monkeypatch):
+        from doc2anki.llm import prompt
+        from doc2anki.llm.prompt import load_template, build_prompt
+
+        monkeypatch.setattr(prompt, "_STATIC_PARTS_CACHE", type(prompt._STATIC_PARTS_CACHE)())
+        template = load_template()
+        context = {"title": "TCP"}
+        renders = 0
+        original_render = template.render
+
+        def counting_render(*args, **kwargs):
+            nonlocal renders
+            renders += 1
+            return original_render(*args, **kwargs)
+
+        monkeypatch.setattr(template, "render", counting_render)
+        for i in range(20):
+            chain = ["Networking", f"Section {i}"]
+            accumulated = f"earlier {i}" if i % 2 else ""
+            expected = original_render(
+                global_context=context,
+                chunk_content=f"chunk {i}",
+                parent_chain=chain,
+                accumulated_context=accumulated,
+            )
+            assert build_prompt(context, f"chunk {i}", template, chain, accumulated) == expected
+
+        # Two shapes (with and without accumulated context), two renders each
+        assert renders == 4
+        assert len(prompt._STATIC_PARTS_CACHE) == 2
+
+    def test_static_parts_cache_is_bounded(self, monkeypatch):
+        from doc2anki.llm import prompt
+        from doc2anki.llm.prompt import load_template, build_prompt
+
+        monkeypatch.setattr(prompt, "_STATIC_PARTS_CACHE", type(prompt._STATIC_PARTS_CACHE)())
+        monkeypatch.setattr(prompt, "_STATIC_PARTS_CACHE_SIZE", 3)
+        template = load_template()
+        for i in range(5):
+            build_prompt({"title": f"Doc {i}"}, "chunk", template)
+
+        assert len(prompt._STATIC_PARTS_CACHE) == 3
+
+    def test_custom_template_with_filtered_chunk(self, tmp_path, monkeypatch):
+        from doc2anki.llm.prompt import load_template, build_prompt
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        path = tmp_path / "custom.j2"
+        path.write_text("{{ chunk_content | upper }} / {{ chunk_content }}", encoding="utf-8")
+
+        template = load_template(path)
+        assert load_template(path) is template
+        assert build_prompt({}, "abc", template) == "ABC / abc"
+
+    def test_custom_template_branching_on_chunk_text(self, tmp_path, monkeypatch):
+        from doc2anki.llm.prompt import load_template, build_prompt
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        path = tmp_path / "custom.j2"
+        path.write_text(
+            "{% if chunk_content|length > 20 %}long{% endif %}"
+            '{% if "TODO" in chunk_content %} todo{% endif %}'
+            " {{ chunk_content|wordcount }}: {{ chunk_content }}",
+            encoding="utf-8",
+        )
+        template = load_template(path)
+
+        for chunk in ("short", "TODO: a rather long chunk of text here"):
+            expected = template.render(global_context={}, chunk_content=chunk, parent_chain=[])
+            assert build_prompt({}, chunk, template) == expected
+
+
+class TestContextWindowGuard:
+    """Tests for fitting rendered prompts into the context window."""
+
+    def _template(self):
+        from jinja2 import Template
+
+        return Template(
+            "{% if accumulated_context %}{{ accumulated_context }}\n---\n{% endif %}"
+            "{{ chunk_content }}"
+        )
+
+    def test_small_prompt_unchanged(self):
+        from doc2anki.llm.window import fit_chunks_to_window
+        from doc2anki.pipeline import ChunkWithContext
+
+        chunks = [ChunkWithContext(chunk_content="short")]
+        result, adjustments = fit_chunks_to_window(
+            chunks, self._template(), context_window=1000, reserved_output_tokens=100
+        )
+
+        assert result == chunks
+        assert adjustments == []
+
+    def test_trims_oldest_context_first(self):
+        from doc2anki.llm.window import fit_chunks_to_window
+        from doc2anki.pipeline import ChunkWithContext
+
+        context = "\n\n".join(f"old section {i} " + "word " * 50 for i in range(10))
+        chunks = [ChunkWithContext(accumulated_context=context, chunk_content="current")]
+        result, adjustments = fit_chunks_to_window(
+            chunks, self._template(), context_window=300, reserved_output_tokens=100
+        )
+
+        assert len(result) == 1
+        assert "old section 9" in result[0].accumulated_context
+        assert "old section 0" not in result[0].accumulated_context
+        assert adjustments[0].action == "trim_context"
+        assert "paragraph(s)" in adjustments[0].detail
+
+    def test_trims_whole_context_sections(self):
+        from doc2anki.llm.window import fit_chunks_to_window
+        from doc2anki.pipeline import ChunkWithContext
+
+        sections = tuple(
+            f"## Old {i}\n\n" + "first paragraph " * 15 + "\n\n" + "second " * 15
+            for i in range(10)
+        )
+        chunks = [
+            ChunkWithContext(
+                accumulated_context="\n\n".join(sections),
+                context_sections=sections,
+                chunk_content="current",
+            )
+        ]
+        result, adjustments = fit_chunks_to_window(
+            chunks, self._template(), context_window=300, reserved_output_tokens=100
+        )
+
+        kept = result[0].context_sections
+        assert 0 < len(kept) < len(sections)
+        assert kept == sections[-len(kept):]
+        assert result[0].accumulated_context == "\n\n".join(kept)
+        assert adjustments[0].detail.startswith(f"dropped {len(sections) - len(kept)} oldest")
+        assert "section(s)" in adjustments[0].detail
+
+    def test_splits_oversized_content(self):
+        from doc2anki.llm.window import fit_chunks_to_window
+        from doc2anki.parser import count_tokens
+        from doc2anki.pipeline import ChunkWithContext
+
+        content = "\n\n".join(f"Paragraph {i}: " + "text " * 40 for i in range(10))
+        chunks = [ChunkWithContext(chunk_content=content, parent_chain=("A",))]
+        result, adjustments = fit_chunks_to_window(
+            chunks, self._template(), context_window=300, reserved_output_tokens=100
+        )
+
+        assert len(result) > 1
+        assert all(count_tokens(c.chunk_content) <= 200 for c in result)
+        assert "\n\n".join(c.chunk_content for c in result) == content
+        assert all(c.parent_chain == ("A",) for c in result)
+        assert adjustments[-1].action == "split"
+
+
+class TestTokenCalibration:
+    """Tests for per-model token count calibration."""
+
+    def test_uncalibrated_model_uses_local_counts(self, tmp_path):
+        from doc2anki.llm.calibration import TokenCalibration
+
+        calibration = TokenCalibration(tmp_path / "calibration.json")
+        calibration.record("deepseek-chat", 1000, 1300)
+
+        # Below the sample threshold the factor is not trusted yet
+        assert calibration.factor("deepseek-chat") == 1.0
+        assert calibration.factor("other") == 1.0
+
+    def test_fits_factor_and_persists(self, tmp_path):
+        from doc2anki.llm.calibration import TokenCalibration
+
+        path = tmp_path / "calibration.json"
+        calibration = TokenCalibration(path)
+        for local in (500, 1000, 2000):
+            calibration.record("deepseek-chat", local, int(local * 1.25))
+        calibration.save()
+
+        loaded = TokenCalibration.load(path)
+        assert loaded.factor("deepseek-chat") == pytest.approx(1.25)
+        assert loaded.to_provider("deepseek-chat", 1000) == 1250
+        assert loaded.to_local("deepseek-chat", 3000) == 2400
+
+    def test_chunk_limit_is_stable_across_samples(self, tmp_path):
+        from doc2anki.llm.calibration import TokenCalibration
+
+        calibration = TokenCalibration(tmp_path / "calibration.json")
+        for local in (500, 1000, 2000):
+            calibration.record("deepseek-chat", local, int(local * 1.25))
+        calibration.record("deepseek-chat", 1500, 1900)
+
+        # The factor moved, the chunk limit (and so the parse cache key) didn't
+        assert calibration.factor("deepseek-chat") != pytest.approx(1.25)
+        assert calibration.chunk_factor("deepseek-chat") == 1.25
+        assert calibration.to_local("deepseek-chat", 3000) == 2400
+
+    def test_dry_run_chunks_with_calibration(self, tmp_path, monkeypatch):
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+        from doc2anki.llm.calibration import TokenCalibration
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        config = tmp_path / "ai_providers.toml"
+        config.write_text(
+            '[mock]\nenable = true\nauth_type = "direct"\n'
+            'base_url = "http://127.0.0.1:9/v1"\nmodel = "mock-model"\napi_key = "sk-test"\n'
+        )
+        calibration = TokenCalibration.load()
+        for local in (500, 1000, 2000):
+            calibration.record("mock-model", local, local * 2)
+        calibration.save()
+        notes = tmp_path / "notes.md"
+        notes.write_text("# A\n\nText.\n", encoding="utf-8")
+
+        result = CliRunner().invoke(
+            app,
+            ["generate", str(notes), "-p", "mock", "-c", str(config), "--dry-run", "--verbose",
+             "--max-tokens", "3000"],
+            env={"COLUMNS": "200"},
+        )
+        assert result.exit_code == 0, result.output
+        assert "chunks up to 1,500 local tokens" in result.output
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        from doc2anki.llm.calibration import TokenCalibration
+
+        path = tmp_path / "calibration.json"
+        path.write_text("not json")
+
+        assert TokenCalibration.load(path).factor("any") == 1.0
+
+    def test_window_guard_uses_scale(self):
+        from jinja2 import Template
+
+        from doc2anki.llm.window import fit_chunks_to_window
+        from doc2anki.parser import count_tokens
+        from doc2anki.pipeline import ChunkWithContext
+
+        content = "\n\n".join(f"Paragraph {i}: " + "text " * 40 for i in range(4))
+        chunks = [ChunkWithContext(chunk_content=content)]
+        template = Template("{{ chunk_content }}")
+
+        unscaled, _ = fit_chunks_to_window(
+            chunks, template, context_window=400, reserved_output_tokens=100
+        )
+        scaled, _ = fit_chunks_to_window(
+            chunks, template, context_window=400, reserved_output_tokens=100, token_scale=2.0
+        )
+
+        assert len(scaled) > len(unscaled)
+        assert all(count_tokens(c.chunk_content) * 2 <= 300 for c in scaled)
+
+
+class _MockSSEHandler:
+    """Factory for a local OpenAI-compatible streaming endpoint."""
+
+    @staticmethod
+    def make(max_in_flight: int, reject_stream_options: bool = False):
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler
+
+        lock = threading.Lock()
+        state = {"in_flight": 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                include_usage = (body.get("stream_options") or {}).get("include_usage")
+                if reject_stream_options and "stream_options" in body:
+                    self.send_response(400)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(
+                        b'{"error": {"message": "Unrecognized request argument supplied: '
+                        b'stream_options"}}'
+                    )
+                    return
+                with lock:
+                    if state["in_flight"] >= max_in_flight:
+                        self.send_response(429)
+                        self.send_header("Content-Type", "application/json")
+                        self.end_headers()
+                        self.wfile.write(b'{"error": {"message": "rate limited"}}')
+                        return
+                    state["in_flight"] += 1
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for word in ("Hello", " world", "!"):
+                        time.sleep(0.01)
+                        event = {
+                            "id": "1", "object": "chat.completion.chunk", "created": 0,
+                            "model": "mock",
+                            "choices": [{"index": 0, "delta": {"content": word}}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                        self.wfile.flush()
+                    if include_usage:
+                        event = {
+                            "id": "1", "object": "chat.completion.chunk", "created": 0,
+                            "model": "mock", "choices": [],
+                            "usage": {"prompt_tokens": 50, "completion_tokens": 7,
+                                      "total_tokens": 57},
+                        }
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.write(b"data: [DONE]\n\n")
+                finally:
+                    with lock:
+                        state["in_flight"] -= 1
+
+        return Handler
+
+
+@pytest.fixture
+def mock_provider(tmp_path):
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockSSEHandler.make(max_in_flight=2))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    config = tmp_path / "ai_providers.toml"
+    config.write_text(
+        "[mock]\n"
+        "enable = true\n"
+        'auth_type = "direct"\n'
+        f'base_url = "http://127.0.0.1:{server.server_address[1]}/v1"\n'
+        'model = "mock-model"\n'
+        'api_key = "sk-test"\n'
+    )
+    yield config
+    server.shutdown()
+    server.server_close()
+
+
+class TestBenchProvider:
+    """Tests for the provider latency/throughput probe."""
+
+    def test_percentile(self):
+        from doc2anki.llm.bench import _percentile
+
+        values = [float(i) for i in range(1, 101)]
+        assert _percentile(values, 50) == 50.0
+        assert _percentile(values, 99) == 99.0
+        assert _percentile([], 50) == 0.0
+
+    def test_detects_throttling_against_mock(self, mock_provider):
+        from doc2anki.config import get_provider_config
+        from doc2anki.llm import create_client
+        from doc2anki.llm.bench import bench_provider
+
+        provider_config = get_provider_config(mock_provider, "mock")
+        client = create_client(provider_config).with_options(max_retries=0)
+
+        report = bench_provider(
+            client, "mock", "mock-model",
+            concurrency_levels=[1, 2, 8], requests_per_level=8, chunk_tokens=50,
+            slowdown_factor=100.0,  # only 429s count on a loaded CI machine
+        )
+
+        first = report.levels[0]
+        assert first.errors == 0
+        assert first.ttft(50) > 0
+        assert first.latency(50) >= first.ttft(50)
+        assert first.tokens_per_second > 0
+        assert report.throttle_concurrency == 8
+        assert report.levels[-1].throttled > 0
+        # Provider-reported usage, not the local count of "Hello world!"
+        assert {s.completion_tokens for s in first.succeeded} == {7}
+
+    def test_levels_keep_order_with_concurrency_1_baseline(self, mock_provider):
+        from doc2anki.config import get_provider_config
+        from doc2anki.llm import create_client
+        from doc2anki.llm.bench import bench_provider
+
+        provider_config = get_provider_config(mock_provider, "mock")
+        client = create_client(provider_config).with_options(max_retries=0)
+
+        report = bench_provider(
+            client, "mock", "mock-model",
+            concurrency_levels=[4, 2, 2], requests_per_level=4, chunk_tokens=50,
+            slowdown_factor=100.0, stop_on_throttle=False,
+        )
+
+        assert [level.concurrency for level in report.levels] == [4, 2]
+        assert report.baseline is not None and report.baseline.concurrency == 1
+        assert report.baseline not in report.levels
+        assert report.throttle_concurrency == 4
+
+    def test_provider_rejecting_stream_options(self):
+        import threading
+        from http.server import ThreadingHTTPServer
+
+        from openai import OpenAI
+
+        from doc2anki.llm.bench import stream_request
+        from doc2anki.parser import count_tokens
+
+        handler = _MockSSEHandler.make(max_in_flight=2, reject_stream_options=True)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = OpenAI(
+                base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                api_key="sk-test",
+                max_retries=0,
+            )
+            sample = stream_request(client, "mock-model", "Hi", max_tokens=16)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert sample.ok, sample.error
+        # No usage chunk: falls back to the local count of "Hello world!"
+        assert sample.completion_tokens == count_tokens("Hello world!")
+
+    def test_cli_command(self, mock_provider):
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+
+        result = CliRunner().invoke(
+            app,
+            ["bench-provider", "-p", "mock", "-c", str(mock_provider),
+             "--concurrency", "1,2", "--requests", "2", "--chunk-tokens", "50",
+             "--slowdown", "100"],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "No throttling up to concurrency 2" in result.output
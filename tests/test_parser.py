@@ -100,6 +100,29 @@ class TestMarkdownParser:
             for chunk in chunks:
                 assert len(chunk.strip()) > 0
 
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "",
+            "---\ntitle: T\n---",
+            "--- \ntitle: T\n ---\n# A\n\nbody\n",
+            "---\ntitle: T\n# no closing delimiter\n",
+            "# 标题 ✓\n\n内容\n\n```\n# not a heading\n```\n",
+            "intro\r\n\r\n# A\r\nbody\r\n",
+        ],
+    )
+    def test_file_parse_matches_text_parse(self, tmp_path, content):
+        from doc2anki.parser import MarkdownParser
+
+        path = tmp_path / "note.md"
+        path.write_bytes(content.encode("utf-8"))
+        parser = MarkdownParser()
+        from_file = parser.parse(path)
+        from_text = parser.parse(path.read_text(encoding="utf-8"))
+
+        assert from_file == from_text
+        assert (from_file.metadata, from_file.preamble) == (from_text.metadata, from_text.preamble)
+
 
 class TestOrgModeParser:
     """Tests for Org-mode document parsing."""
@@ -149,6 +172,76 @@ class TestOrgModeParser:
                 assert len(chunk.strip()) > 0
 
 
+ORG_CONFORMANCE_SAMPLES = {
+    "keywords_and_todo": (
+        "#+TITLE: Tasks\n#+FILETAGS: :a:b:\n#+TODO: NEXT(n) WAIT | DONE(d) CANCELED\n\n"
+        "Intro [[https://example.org][with link]] and [[plain]].\n\n"
+        "* NEXT [#A] Write the thing :work:urgent:\n"
+        "SCHEDULED: <2024-01-02 Tue> DEADLINE: <2024-01-05 Fri>\n"
+        ":PROPERTIES:\n:ID: 123\n:END:\n"
+        "CLOCK: [2024-01-01 Mon 10:00]--[2024-01-01 Mon 11:00] =>  1:00\n"
+        '- State "DONE"       from "TODO"       [2024-01-01 Mon 12:00]\n'
+        "Body text.\n"
+        "** CANCELED Old\nCLOSED: [2024-01-03 Wed 10:00]\ngone\n"
+        "** TODO Not a keyword here\n* DONE\n* [#B] Priority only\n"
+    ),
+    "drawers": (
+        ":PROPERTIES:\n:ID: root-id\n:END:\n#+TITLE: T\n#+DATE:\nNext line value\n\n"
+        "Preamble\n* H1\n:PROPERTIES:\n:A: 1\n:END:\n:PROPERTIES:\n:B: 2\n:END:\ntext\n"
+        "*** Deep\n** Mid\n* H2\nCLOCK: [2024-01-01 Mon 10:00]\nx\n"
+    ),
+    "blocks": (
+        "* Code\n#+BEGIN_SRC python\ndef f():\n    return 1\n#+END_SRC\n"
+        "* Unterminated\n#+BEGIN_EXAMPLE\nstill text\n** Really a heading\nbody\n"
+    ),
+    "todo_after_headings": (
+        "**** DONE x\n* A first\n#+TODO: A B | C\n* C done\n** TODO kept\n"
+        "#+SEQ_TODO: NEXT\n* NEXT later\n"
+    ),
+    "empty": "",
+}
+
+
+class TestNativeOrgParser:
+    """Conformance of the native Org scanner with the orgparse-based parser."""
+
+    @pytest.mark.parametrize("name", sorted(ORG_CONFORMANCE_SAMPLES))
+    def test_matches_orgparse(self, name):
+        from doc2anki.parser.orgmode import OrgParser
+
+        from .orgparse_reference import OrgparseParser
+
+        text = ORG_CONFORMANCE_SAMPLES[name]
+        assert OrgParser().parse(text) == OrgparseParser().parse(text)
+
+    def test_matches_orgparse_on_file(self):
+        from doc2anki.parser.orgmode import OrgParser
+
+        from .orgparse_reference import OrgparseParser
+
+        path = FIXTURES_DIR / "sample.org"
+        assert OrgParser().parse(path) == OrgparseParser().parse(path)
+
+    def test_heading_cleanup(self):
+        from doc2anki.parser.orgmode import OrgParser
+
+        tree = OrgParser().parse(ORG_CONFORMANCE_SAMPLES["keywords_and_todo"])
+        titles = [node.title for node in tree.iter_all_nodes()]
+
+        assert titles[:3] == ["Write the thing", "Old", "TODO Not a keyword here"]
+        assert tree.children[0].content == "Body text."
+        assert tree.preamble == "Intro with link and plain."
+
+    def test_stars_inside_blocks_are_content(self):
+        from doc2anki.parser.orgmode import OrgParser
+
+        text = "* Example\n#+BEGIN_SRC org\n* not a heading\n#+END_SRC\n"
+        tree = OrgParser().parse(text)
+
+        assert [node.title for node in tree.iter_all_nodes()] == ["Example"]
+        assert "* not a heading" in tree.children[0].content
+
+
 class TestDocumentTree:
     """Tests for DocumentTree structure."""
 
@@ -200,6 +293,122 @@ class TestDocumentTree:
         # All should be HeadingNode instances
         assert all(isinstance(n, HeadingNode) for n in nodes)
 
+    def test_deeper_than_recursion_limit(self):
+        import sys
+
+        from doc2anki.pipeline.processor import flatten_tree
+
+        depth = sys.getrecursionlimit() + 500
+        text = "".join(f"{'*' * (i + 1)} H{i}\nbody {i}\n" for i in range(depth))
+        tree = build_document_tree(text, format="org")
+        top = tree.children[0]
+
+        assert sum(1 for _ in top.iter_descendants()) == depth - 1
+        assert tree.get_nodes_at_level(depth)[0].title == f"H{depth - 1}"
+        assert top.full_content.endswith(f"H{depth - 1}\n\nbody {depth - 1}")
+        assert len(flatten_tree(tree)) == depth
+
+    def test_index_lookups(self):
+        tree = build_document_tree("# A\n\na\n\n## B\n\nb\n\n## C\n\n# D\n\n### E\n")
+        nodes = list(tree.iter_all_nodes())
+
+        assert [n.title for n in nodes] == ["A", "B", "C", "D", "E"]
+        assert tree.node_count == 5
+        assert [n.title for n in tree.get_nodes_at_level(2)] == ["B", "C"]
+        assert tree.get_nodes_at_level(4) == ()
+        assert (tree.min_level, tree.max_level) == (1, 3)
+        assert tree.get_node(3).title == "D"
+        assert tree.get_node_by_path(("D", "E")) is nodes[4]
+        assert tree.get_node_by_path(("B",)) is None
+        assert tree.get_ordinal(nodes[2]) == 2
+        assert tree.get_parent(nodes[2]) is nodes[0]
+        assert tree.get_parent(nodes[0]) is None
+
+        with pytest.raises(KeyError):
+            tree.get_ordinal(nodes[1].with_children(()))
+
+    def test_index_not_pickled(self):
+        import pickle
+
+        tree = build_document_tree(FIXTURES_DIR / "sample.md")
+        assert tree._index is not None
+        restored = pickle.loads(pickle.dumps(tree))
+
+        assert restored == tree
+        assert restored._index is None
+        assert restored.get_all_levels() == tree.get_all_levels()
+
+
+class TestNodeMemo:
+    """Tests for memoised subtree text, token counts and hashes."""
+
+    def test_values_match_direct_computation(self):
+        from doc2anki.parser import count_tokens
+
+        tree = build_document_tree(FIXTURES_DIR / "sample.md")
+        for node in tree.iter_all_nodes():
+            assert node.own_tokens == count_tokens(node.own_text)
+            assert node.subtree_tokens == count_tokens(node.full_content)
+            assert len(node.content_hash) == 64
+
+    def test_full_content_memoises_descendants(self):
+        tree = build_document_tree("# A\n\na\n\n## B\n\nb\n\n### C\n\nc\n")
+        top = tree.children[0]
+
+        assert top.full_content is top.full_content
+        child = top.children[0]
+        assert "full_content" in child._memo
+        assert child.full_content == "## B\n\nb\n\n### C\n\nc"
+
+    def test_memo_ignored_by_equality_and_pickle(self):
+        import pickle
+
+        first = build_document_tree("# A\n\ntext\n")
+        second = build_document_tree("# A\n\ntext\n")
+        first.children[0].subtree_hash
+
+        assert first == second and hash(first.children[0]) == hash(second.children[0])
+        assert first.children[0].subtree_hash == second.children[0].subtree_hash
+        assert pickle.loads(pickle.dumps(first)).children[0]._memo == {}
+
+    def test_merkle_subtree_hash(self):
+        from doc2anki.parser import HeadingNode
+
+        tree = build_document_tree(
+            "# A\n\n## X\n\nsame\n\n### Y\n\nleaf\n\n# B\n\n## X\n\nsame\n\n### Y\n\nleaf\n"
+        )
+        a, b = tree.children
+        # Hashed while freezing
+        assert "subtree_hash" in a._memo and "subtree_hash" in a.children[0]._memo
+
+        # Position-independent: equal subtrees under different parents match
+        assert a.children[0].same_subtree(b.children[0])
+        assert not a.same_subtree(b)
+
+        edited = build_document_tree(
+            "# A\n\n## X\n\nsame\n\n### Y\n\nchanged\n\n# B\n\n## X\n\nsame\n\n### Y\n\nleaf\n"
+        )
+        assert edited.children[0].subtree_hash != a.subtree_hash
+        assert edited.children[1].subtree_hash == b.subtree_hash
+
+        # Nodes built by hand hash lazily to the same values
+        rebuilt = a.with_children(
+            (HeadingNode(2, "X", "same", (HeadingNode(3, "Y", "leaf"),)),)
+        )
+        assert rebuilt.subtree_hash == a.subtree_hash
+
+    def test_compact_views_match(self):
+        from doc2anki.parser import CompactTree
+
+        tree = build_document_tree(FIXTURES_DIR / "sample.org")
+        compact = CompactTree.from_tree(tree)
+        for node, view in zip(tree.iter_all_nodes(), compact.iter_all_nodes()):
+            assert (view.full_content, view.own_tokens, view.subtree_hash) == (
+                node.full_content,
+                node.own_tokens,
+                node.subtree_hash,
+            )
+
 
 class TestChunking:
     """Tests for document chunking."""
@@ -218,6 +427,42 @@ class TestChunking:
         chunks = chunk_document("   \n\n  ", max_tokens=1000)
         assert len(chunks) == 0
 
+    def test_token_cache(self, monkeypatch):
+        from doc2anki.parser import chunker
+
+        monkeypatch.setattr(chunker, "_token_cache", chunker._TokenCache(maxsize=2))
+        first = chunker.count_tokens("alpha beta")
+        assert chunker.count_tokens("alpha beta") == first
+        info = chunker.token_cache_info()
+        assert (info.hits, info.misses, info.size) == (1, 1, 1)
+        assert info.hit_rate == 0.5
+
+        # Least recently used entry is evicted
+        chunker.count_tokens("gamma")
+        chunker.count_tokens("alpha beta")
+        chunker.count_tokens("delta")
+        assert chunker.count_tokens("gamma") == 1
+        assert chunker.token_cache_info().misses == 4
+
+        chunker.clear_token_cache()
+        assert chunker.token_cache_info() == chunker.TokenCacheInfo(0, 0, 0, 2)
+
+    @pytest.mark.parametrize("threads", [1, 4])
+    def test_count_tokens_batch(self, monkeypatch, threads):
+        from doc2anki.parser import chunker
+
+        monkeypatch.setattr(chunker, "_token_cache", chunker._TokenCache())
+        monkeypatch.setattr(chunker, "PARALLEL_MIN_CHARS", 0)
+        texts = [f"Section {i}: " + "word " * i for i in range(50)]
+        texts += [texts[3], "", "<|endoftext|> is plain text here"]
+
+        expected = [len(chunker._get_encoder().encode_ordinary(text)) for text in texts]
+        assert chunker.count_tokens_batch(texts, threads=threads) == expected
+        # Duplicates are tokenized once; a second batch is all hits
+        assert chunker.token_cache_info().misses == len(texts) - 1
+        assert chunker.count_tokens_batch(texts, threads=threads) == expected
+        assert chunker.token_cache_info().misses == len(texts) - 1
+
 
 class TestFormatDetection:
     """Tests for format detection."""
@@ -249,6 +494,27 @@ Some content
         tree = build_document_tree(org_content)
         assert tree.source_format == "org"
 
+    def test_sniff_reads_bounded_prefix(self):
+        from doc2anki.parser import sniff_format
+
+        # Org headings beyond the sniffed prefix don't count
+        content = "# A\n" + "x\n" * 100 + "* B\n* C\n"
+        assert sniff_format(content) == "org"
+        assert sniff_format(content, limit=100) == "markdown"
+
+    def test_sniff_file_extensions(self, tmp_path):
+        from doc2anki.parser import sniff_file
+
+        archive = tmp_path / "old.org_archive"
+        archive.write_text("# not a heading in org\n", encoding="utf-8")
+        unknown = tmp_path / "notes.txt"
+        unknown.write_text("* A\n** B\n", encoding="utf-8")
+
+        assert sniff_file(tmp_path / "x.markdown") == "markdown"
+        assert sniff_file(archive) == "org"
+        assert sniff_file(unknown) == "org"
+        assert build_document_tree(unknown).source_format == "org"
+
 
 class TestLosslessChunking:
     """Tests for lossless chunking pipeline."""
@@ -343,3 +609,275 @@ Section 2 content
         assert "Deep content" in chunk_text
         assert "## 2" in chunk_text
         assert "Section 2 content" in chunk_text
+
+
+class TestParserPool:
+    """Tests for the per-thread parser registry."""
+
+    def test_reuses_parser_within_thread(self):
+        from doc2anki.parser import get_parser
+
+        assert get_parser("markdown") is get_parser("md")
+        assert get_parser("org") is get_parser("orgmode")
+
+        first = build_document_tree("# A\n\ntext", format="markdown")
+        second = build_document_tree("# B\n\nmore", format="markdown")
+        assert first.children[0].title == "A"
+        assert second.children[0].title == "B"
+
+    def test_separate_parser_per_thread(self):
+        import threading
+
+        from doc2anki.parser import get_parser
+
+        main_parser = get_parser("markdown")
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_parser("markdown")))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not main_parser
+
+    def test_unknown_format(self):
+        from doc2anki.parser import get_parser
+
+        with pytest.raises(ValueError):
+            get_parser("rst")
+
+    def test_backends_imported_lazily(self):
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, doc2anki.parser\n"
+            "print(sorted(m for m in ('tree_sitter', 'tiktoken') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+
+        assert output.strip() == "[]"
+
+    def test_plugin_entry_point(self, tmp_path, monkeypatch):
+        from importlib.metadata import EntryPoint
+
+        from doc2anki.parser import ParserSpec, clear_parsers, get_parser, pool
+
+        class PlainParser:
+            def parse(self, source):
+                text = source.read_text() if isinstance(source, Path) else source
+                return build_document_tree(f"# {text.strip()}\n", format="markdown")
+
+        monkeypatch.setattr(pool, "_registry", pool._Registry())
+        monkeypatch.setattr(
+            pool,
+            "entry_points",
+            lambda group: [EntryPoint("plain", "tests.plugin:SPEC", group)]
+            if group == pool.ENTRY_POINT_GROUP
+            else [],
+        )
+        monkeypatch.setattr(
+            EntryPoint,
+            "load",
+            lambda self: ParserSpec("plain", PlainParser, extensions=(".txt",)),
+        )
+        clear_parsers()
+
+        path = tmp_path / "note.txt"
+        path.write_text("Hello")
+        tree = build_document_tree(path)
+
+        assert tree.children[0].title == "Hello"
+        assert ".txt" in pool.registered_extensions()
+        assert isinstance(get_parser("plain"), PlainParser)
+        clear_parsers()
+
+
+class TestIncrementalParse:
+    """Tests for incremental Markdown re-parsing."""
+
+    def _doc(self) -> str:
+        sections = []
+        for i in range(20):
+            level = 1 + i % 3
+            sections.append(f"{'#' * level} H{i}\n\nParagraph {i}.\n\n- item {i}\n")
+        return "---\ntitle: T\n---\nIntro.\n\n" + "\n".join(sections)
+
+    def test_matches_full_parse(self):
+        import random
+
+        from doc2anki.parser import MarkdownParser
+
+        parser = MarkdownParser()
+        rng = random.Random(0)
+        doc = self._doc()
+        state = parser.parse_incremental(doc)
+        assert state.document == parser.parse(doc)
+
+        for _ in range(200):
+            pos = rng.randint(0, len(doc))
+            if rng.random() < 0.5:
+                doc = doc[:pos] + rng.choice(["x", "\n\n", "# New\n\n", "## Sub\n", "#", "```\n"]) + doc[pos:]
+            else:
+                doc = doc[:pos] + doc[pos + rng.randint(1, 15):]
+            state = parser.parse_incremental(doc, state)
+            assert state.document == parser.parse(doc)
+
+    def test_reuses_unchanged_nodes(self):
+        from doc2anki.parser import MarkdownParser
+
+        parser = MarkdownParser()
+        doc = self._doc()
+        first = parser.parse_incremental(doc)
+        second = parser.parse_incremental(doc.replace("Paragraph 10.", "Paragraph ten."), first)
+
+        old_nodes = list(first.document.iter_all_nodes())
+        new_nodes = list(second.document.iter_all_nodes())
+        changed = [new for old, new in zip(old_nodes, new_nodes) if old is not new]
+
+        assert any(node.content.startswith("Paragraph ten.") for node in changed)
+        # Only the edited node and its ancestors are new objects
+        assert len(changed) <= 3
+        assert second.reused_nodes >= len(old_nodes) - 3
+
+    def test_previous_result_stays_valid(self):
+        from doc2anki.parser import MarkdownParser
+
+        parser = MarkdownParser()
+        doc = self._doc()
+        first = parser.parse_incremental(doc)
+        parser.parse_incremental(doc + "\n# Tail\n", first)
+        again = parser.parse_incremental(doc.replace("H3", "Third"), first)
+
+        assert again.document == parser.parse(doc.replace("H3", "Third"))
+
+    def test_setext_headings_fall_back_to_full_rebuild(self):
+        from doc2anki.parser import MarkdownParser
+
+        parser = MarkdownParser()
+        doc = "# A\n\ntext\n\nTitle\n=====\n\nmore\n"
+        state = parser.parse_incremental(doc)
+        state = parser.parse_incremental(doc.replace("more", "less"), state)
+
+        assert state.sections is None
+        assert state.document == parser.parse(doc.replace("more", "less"))
+
+
+class TestCompactTree:
+    """Tests for the array-backed CompactTree and its node views."""
+
+    @pytest.mark.parametrize("name", ["sample.md", "sample.org"])
+    def test_round_trip_matches_document_tree(self, name):
+        from doc2anki.parser import build_compact_tree
+
+        tree = build_document_tree(FIXTURES_DIR / name)
+        compact = build_compact_tree(FIXTURES_DIR / name)
+
+        assert compact.to_document_tree() == tree
+        assert [n.path for n in compact.iter_all_nodes()] == [
+            n.path for n in tree.iter_all_nodes()
+        ]
+        assert [n.full_content for n in compact.children] == [
+            n.full_content for n in tree.children
+        ]
+
+    def test_deep_org_headline(self):
+        from doc2anki.parser import build_compact_tree
+
+        text = "* Top\n" + "*" * 300 + " Deep\nbody\n"
+        tree = build_document_tree(text, format="org")
+        compact = build_compact_tree(text, format="org")
+
+        assert compact.to_document_tree() == tree
+        assert compact.max_level == 300
+
+    def test_views_expose_heading_node_api(self):
+        from doc2anki.parser import CompactTree
+
+        tree = build_document_tree("# A\n\ntext\n\n## B\n\nmore\n\n## B\n\n# C\n")
+        compact = CompactTree.from_tree(tree)
+        a, c = compact.children
+
+        assert (a.level, a.title, a.content) == (1, "A", "text")
+        assert [child.path for child in a.children] == [("A", "B"), ("A", "B")]
+        assert a.children[0].depth == 1 and a.children[0].parent == a
+        assert a.own_text == tree.children[0].own_text
+        assert [n.title for n in a.iter_descendants()] == ["B", "B"]
+        assert c.children == ()
+        assert compact.get_nodes_at_level(2) == tuple(a.children)
+        assert compact.get_all_levels() == tree.get_all_levels()
+        # Repeated titles are stored once
+        assert compact.titles == ("A", "B", "C")
+
+    def test_pipeline_accepts_compact_tree(self):
+        from doc2anki.parser import build_compact_tree
+        from doc2anki.pipeline import process_pipeline
+
+        path = FIXTURES_DIR / "sample.md"
+        assert process_pipeline(build_compact_tree(path), max_tokens=200) == process_pipeline(
+            build_document_tree(path), max_tokens=200
+        )
+
+
+class TestTreeDiff:
+    """Tests for the structural diff between document versions."""
+
+    OLD = (
+        "# A\n\na\n\n## A1\n\nx\n\n"
+        "# B\n\nb\n\n## B1\n\nkeep\n\n### B2\n\ndeep\n\n"
+        "# C\n\nc\n"
+    )
+    NEW = (
+        "# A\n\na changed\n\n## A1\n\nx\n\n"
+        "# C\n\nc\n\n## B1\n\nkeep\n\n### B2\n\ndeep\n\n"
+        "# D\n\nd\n"
+    )
+
+    def test_change_kinds(self):
+        from doc2anki.parser import diff_trees
+
+        diff = diff_trees(build_document_tree(self.OLD), build_document_tree(self.NEW))
+
+        assert [(c.kind, c.path) for c in diff.changes] == [
+            ("modified", ("A",)),
+            ("moved", ("C", "B1")),
+            ("inserted", ("D",)),
+            ("deleted", ("B",)),
+        ]
+        # The moved subtree is reported once, at its root
+        assert diff.moved[0].old.path == ("B", "B1")
+        assert ("C", "B1", "B2") in diff.changed_paths
+        assert [n.path for n in diff.unchanged_subtrees] == [("A", "A1")]
+        assert not diff.preamble_changed and not diff.metadata_changed
+
+    def test_identical_trees(self):
+        from doc2anki.parser import diff_trees
+
+        tree = build_document_tree(FIXTURES_DIR / "sample.org")
+        diff = diff_trees(tree, build_document_tree(FIXTURES_DIR / "sample.org"))
+
+        assert not diff
+        assert diff.unchanged_subtrees == tree.children
+
+    def test_duplicate_paths_and_preamble(self):
+        from doc2anki.parser import diff_trees
+
+        old = build_document_tree("intro\n\n# X\n\none\n\n# X\n\ntwo\n")
+        new = build_document_tree("# X\n\none\n\n# X\n\nthree\n")
+        diff = diff_trees(old, new)
+
+        assert [(c.kind, c.old.content) for c in diff.changes] == [("modified", "two")]
+        assert diff.preamble_changed
+
+    def test_cli_command(self, tmp_path):
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+
+        old, new = tmp_path / "old.md", tmp_path / "new.md"
+        old.write_text(self.OLD)
+        new.write_text(self.NEW)
+        result = CliRunner().invoke(app, ["diff", str(old), str(new)])
+
+        assert result.exit_code == 0, result.output
+        assert "1 inserted, 1 deleted, 1 moved, 1 modified" in result.output
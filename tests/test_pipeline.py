@@ -0,0 +1,414 @@
+"""Tests for the chunking pipeline."""
+
+from pathlib import Path
+
+import pytest
+
+from doc2anki.parser.stream import SectionRecord
+from doc2anki.pipeline import ChunkWithContext, CompressionOptions, compress_chunks
+from doc2anki.pipeline.compress import compress_text
+
+
+class TestCompression:
+    """Tests for pre-send chunk compression."""
+
+    def test_strips_non_semantic_markup(self):
+        text = (
+            "Intro <!-- note\nto self -->\n\n\n\n"
+            "![img](data:image/png;base64,iVBORw0KGgoAAAANSUhEUg==)\n"
+            "[link](https://example.com/" + "a" * 80 + ")\n"
+            ":PROPERTIES:\n:ID: 42\n:END:\n"
+            "Body"
+        )
+        result = compress_text(text, CompressionOptions())
+
+        assert "note" not in result
+        assert "iVBOR" not in result
+        assert "[link](https://example.com/…)" in result
+        assert ":PROPERTIES:" not in result
+        assert "\n\n\n" not in result
+        assert result.endswith("Body")
+
+    def test_code_and_math_untouched(self):
+        code = "```html\n<!-- keep -->\n\n\n\n<img src=\"data:image/png;base64,AAAA\">\n```"
+        math = "$$\n\\text{https://example.com/" + "b" * 80 + "}\n$$"
+        inline = "Use `https://example.com/" + "c" * 80 + "` here"
+        text = f"{code}\n\n{math}\n\n{inline}"
+
+        assert compress_text(text, CompressionOptions()) == text
+
+    def test_truncates_long_tables(self):
+        rows = "\n".join(f"| {i} | x |" for i in range(50))
+        text = f"| n | v |\n|---|---|\n{rows}"
+        result = compress_text(text, CompressionOptions(max_table_rows=5))
+
+        assert "| 4 | x |" in result
+        assert "| 5 | x |" not in result
+        assert "45 more rows" in result
+
+    def test_negative_table_rows_rejected(self):
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+
+        with pytest.raises(ValueError):
+            CompressionOptions(max_table_rows=-1)
+        with pytest.raises(ValueError):
+            CompressionOptions.from_rules(["tables"], max_table_rows=-3)
+
+        result = CliRunner().invoke(
+            app, ["generate", "notes.md", "-p", "x", "--compress", "--max-table-rows", "-1"]
+        )
+        assert result.exit_code == 2
+        assert "--max-table-rows" in result.output
+
+    def test_rule_selection(self):
+        options = CompressionOptions.from_rules(["html_comments"])
+        text = "a <!-- x --> [l](https://example.com/" + "d" * 80 + ")"
+
+        result = compress_text(text, options)
+        assert "<!--" not in result
+        assert "d" * 80 in result
+
+    def test_compress_chunks_reports_savings(self):
+        chunks = [ChunkWithContext(chunk_content="text <!-- " + "padding " * 50 + "-->")]
+        stats = compress_chunks(chunks, CompressionOptions())
+
+        assert chunks[0].chunk_content == "text"
+        assert stats.tokens_saved > 0
+        assert stats.tokens_after < stats.tokens_before
+
+
+class TestParallelParsing:
+    """Tests for parsing and chunking files across worker processes."""
+
+    def _files(self, tmp_path):
+        files = []
+        for i in range(6):
+            path = tmp_path / f"note{i}.md"
+            path.write_text(f"# Note {i}\n\nBody of note {i}.\n\n## Part\n\nMore {i}.\n")
+            files.append(path)
+        return files
+
+    def test_parallel_matches_serial_order(self, tmp_path):
+        from doc2anki.pipeline import parse_files
+
+        files = self._files(tmp_path)
+        serial = list(parse_files(files, max_tokens=500, jobs=1))
+        parallel = list(parse_files(files, max_tokens=500, jobs=2))
+
+        assert [r.path for r in parallel] == files
+        assert [r.chunks for r in parallel] == [r.chunks for r in serial]
+        assert [r.tree for r in parallel] == [r.tree for r in serial]
+
+    def test_errors_are_reported_per_file(self, tmp_path):
+        from doc2anki.pipeline import parse_files
+
+        missing = tmp_path / "missing.md"
+        results = list(parse_files([missing], jobs=1))
+
+        assert results[0].error_stage == "parse"
+        assert results[0].tree is None
+
+    def test_stopping_early_cancels_queued_items(self):
+        import threading
+        import time
+
+        from doc2anki.pipeline.parallel import map_in_workers
+
+        threads_before = threading.active_count()
+        results = map_in_workers(time.sleep, [0.5] * 16, jobs=2)
+        next(results)
+        start = time.perf_counter()
+        results.close()  # as when the CLI exits on the first failed file
+
+        # Doesn't wait for the items already running in the workers either
+        assert time.perf_counter() - start < 0.25
+
+        # Let the pool wind down before later tests fork
+        deadline = time.monotonic() + 5
+        while threading.active_count() > threads_before and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def test_trees_only(self, tmp_path):
+        from doc2anki.pipeline import parse_files
+
+        results = list(parse_files(self._files(tmp_path), jobs=2, chunk=False))
+
+        assert all(r.tree is not None and r.chunks == [] for r in results)
+
+    def test_parse_cache(self, tmp_path, monkeypatch):
+        import os
+
+        from doc2anki.pipeline import ParseCache, parse_files
+        from doc2anki.pipeline import parallel
+
+        files = self._files(tmp_path)
+        cache = ParseCache(tmp_path / "cache")
+        first = list(parse_files(files, max_tokens=500, cache=cache))
+
+        def fail(path):
+            raise AssertionError(f"re-parsed {path}")
+
+        monkeypatch.setattr(parallel, "build_document_tree", fail)
+        # Touched but unchanged files are still hits
+        os.utime(files[0], ns=(0, 0))
+        cached = list(parse_files(files, max_tokens=500, cache=cache))
+
+        assert [r.tree for r in cached] == [r.tree for r in first]
+        assert [r.chunks for r in cached] == [r.chunks for r in first]
+
+        # Edits, other options and rebuilds miss
+        files[1].write_text("# Changed\n")
+        assert next(parse_files(files[1:2], cache=cache)).error_stage == "parse"
+        assert next(parse_files(files[2:3], max_tokens=400, cache=cache)).error is not None
+        rebuild = ParseCache(tmp_path / "cache", rebuild=True)
+        assert next(parse_files(files[3:4], max_tokens=500, cache=rebuild)).error is not None
+
+    def test_parse_cache_edit_during_parse(self, tmp_path, monkeypatch):
+        from doc2anki.pipeline import ParseCache, parse_files
+        from doc2anki.pipeline import parallel
+
+        path = tmp_path / "note.md"
+        path.write_text("# Alpha\n")
+        cache = ParseCache(tmp_path / "cache")
+        build = parallel.build_document_tree
+
+        def build_then_edit(source):
+            tree = build(source)
+            path.write_text("# Bravo\n")  # Same size, new content
+            return tree
+
+        monkeypatch.setattr(parallel, "build_document_tree", build_then_edit)
+        assert next(parse_files([path], cache=cache)).tree.children[0].title == "Alpha"
+
+        monkeypatch.setattr(parallel, "build_document_tree", build)
+        assert next(parse_files([path], cache=cache)).tree.children[0].title == "Bravo"
+
+    def test_parse_cache_prune(self, tmp_path):
+        import os
+
+        from doc2anki.pipeline import ParseCache, parse_files
+
+        files = self._files(tmp_path)
+        cache = ParseCache(tmp_path / "cache")
+        entries: list[Path] = []
+        for i, path in enumerate(files):
+            next(parse_files([path], max_tokens=500, cache=cache))
+            (entry,) = set(cache.directory.iterdir()).difference(entries)
+            os.utime(entry, ns=(i + 1, i + 1))  # Last used in file order
+            entries.append(entry)
+        (cache.directory / "junk.bin").write_bytes(b"not a pickle")
+        files[5].unlink()
+
+        # junk and the deleted file's entry, then the least recently used beyond 3
+        assert cache.prune(max_entries=3) == 4
+        assert set(cache.directory.iterdir()) == set(entries[2:5])
+
+    def test_parse_cache_prune_from_other_directory(self, tmp_path, monkeypatch):
+        from doc2anki.pipeline import ParseCache, parse_files
+
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "notes.md").write_text("# A\n\nText.\n", encoding="utf-8")
+        cache = ParseCache(tmp_path / "cache")
+
+        monkeypatch.chdir(project)
+        next(parse_files([Path("notes.md")], max_tokens=500, cache=cache))
+        monkeypatch.chdir(tmp_path)
+        assert cache.prune() == 0
+        assert len(list(cache.directory.iterdir())) == 1
+
+    def test_parse_cache_stale_entry_is_a_miss(self, tmp_path):
+        import pickle
+
+        from doc2anki.pipeline import ParseCache, parse_files
+
+        files = self._files(tmp_path)[:1]
+        cache = ParseCache(tmp_path / "cache")
+        first = next(parse_files(files, max_tokens=500, cache=cache))
+        (entry,) = (tmp_path / "cache").iterdir()
+
+        # Payload referring to a class that no longer exists
+        with entry.open("rb") as handle:
+            header = pickle.load(handle)
+        with entry.open("wb") as handle:
+            pickle.dump(header, handle)
+            handle.write(b"cdoc2anki.no_such_module\nParsedFile\n.")
+
+        again = next(parse_files(files, max_tokens=500, cache=cache))
+        assert again.error is None and again.chunks == first.chunks
+        with entry.open("rb") as handle:
+            pickle.load(handle)
+            assert pickle.load(handle).chunks == first.chunks
+
+
+class TestClassifiedPipeline:
+    """Tests for chunking interactively classified nodes."""
+
+    def test_context_sections_follow_nodes(self):
+        from doc2anki.parser.markdown import build_tree
+        from doc2anki.pipeline import ChunkType, ClassifiedNode, process_pipeline
+
+        tree = build_tree("# Intro\n\nOne.\n\nTwo.\n\n# Card\n\nFact.\n")
+        intro, card = tree.children
+        chunks = process_pipeline(
+            tree,
+            classified_nodes=[
+                ClassifiedNode(intro, ChunkType.CONTEXT_ONLY),
+                ClassifiedNode(card, ChunkType.CARD_ONLY),
+            ],
+        )
+
+        assert chunks[0].context_sections == ("# Intro\n\nOne.\n\nTwo.",)
+        assert chunks[0].accumulated_context == "\n\n".join(chunks[0].context_sections)
+
+
+class TestStreaming:
+    """Tests for chunking files without building a DocumentTree."""
+
+    FIXTURES = Path(__file__).parent / "fixtures"
+
+    @pytest.mark.parametrize("name", ["sample.md", "sample.org"])
+    def test_blocks_match_flatten_tree(self, name):
+        from doc2anki.parser import build_document_tree
+        from doc2anki.pipeline import stream_content_blocks
+        from doc2anki.pipeline.processor import flatten_tree
+
+        path = self.FIXTURES / name
+        tree = build_document_tree(path)
+        fmt = "markdown" if path.suffix == ".md" else "org"
+        with path.open(encoding="utf-8") as handle:
+            metadata, blocks = stream_content_blocks(handle, fmt)
+            assert list(blocks) == flatten_tree(tree)
+        assert metadata == tree.metadata
+
+    @pytest.mark.parametrize("name", ["sample.md", "sample.org"])
+    def test_chunks_match_process_pipeline(self, name):
+        from doc2anki.parser import build_document_tree
+        from doc2anki.pipeline import process_pipeline, stream_file_chunks
+
+        path = self.FIXTURES / name
+        _, chunks = stream_file_chunks(path, max_tokens=200)
+
+        assert list(chunks) == process_pipeline(build_document_tree(path), max_tokens=200)
+
+    def test_sections_are_read_lazily(self):
+        from doc2anki.parser.stream import stream_sections
+
+        consumed = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"# Heading {i}\n"
+                yield f"Body {i}\n"
+
+        metadata, records = stream_sections(lines(), "markdown")
+        first = next(records)
+
+        assert first.title == "Heading 0" and first.content == "Body 0"
+        assert len(consumed) < 5
+
+    def test_code_fences_and_setext_headings(self):
+        from doc2anki.parser.stream import stream_sections
+
+        text = "Title\n=====\n\n```\n# not a heading\n```\n\nSub\n---\ntext\n"
+        _, records = stream_sections(text.splitlines(keepends=True), "markdown")
+        records = list(records)
+
+        assert [(r.level, r.title) for r in records] == [(1, "Title"), (2, "Sub")]
+        assert "# not a heading" in records[0].content
+
+    def test_org_drawers_and_planning_dropped(self):
+        from doc2anki.parser.stream import stream_sections
+
+        text = (
+            "#+TITLE: Notes\n"
+            "* TODO [#A] Task :work:\n"
+            "SCHEDULED: <2024-01-01>\n"
+            ":PROPERTIES:\n:ID: 1\n:END:\n"
+            "Body\n"
+        )
+        metadata, records = stream_sections(text.splitlines(keepends=True), "org")
+
+        assert metadata.title == "Notes"
+        assert list(records)[0] == SectionRecord(1, "Task", "Body")
+
+    def test_parse_files_stream(self, tmp_path):
+        from doc2anki.pipeline import parse_files
+
+        path = tmp_path / "note.md"
+        path.write_text("---\ntitle: T\n---\n# A\n\nBody\n")
+        result = next(parse_files([path], max_tokens=500, stream=True))
+        expected = next(parse_files([path], max_tokens=500))
+
+        assert result.tree is None
+        assert result.metadata.title == "T"
+        assert result.chunks == expected.chunks
+
+    def test_parse_files_lazy_stream_is_not_cached(self, tmp_path):
+        from doc2anki.pipeline import ParseCache, parse_files
+
+        path = tmp_path / "note.md"
+        path.write_text("# A\n\nBody\n\n# B\n\nMore\n")
+        cache = ParseCache(tmp_path / "cache")
+        result = next(parse_files([path], max_tokens=5, stream=True, cache=cache, lazy=True))
+        expected = next(parse_files([path], max_tokens=5))
+
+        assert not isinstance(result.chunks, list)
+        assert list(result.chunks) == expected.chunks
+        assert not (tmp_path / "cache").exists()
+
+
+class TestScan:
+    """Tests for the corpus inventory."""
+
+    FIXTURES = Path(__file__).parent / "fixtures"
+
+    def test_stats_match_pipeline(self):
+        from doc2anki.parser import build_document_tree
+        from doc2anki.pipeline import process_pipeline, scan_files
+
+        files = [self.FIXTURES / "sample.md", self.FIXTURES / "sample.org"]
+        for stats, path in zip(scan_files(files, max_tokens=100, jobs=1), files):
+            tree = build_document_tree(path)
+            assert stats.error is None
+            assert stats.format == tree.source_format
+            assert stats.frontmatter_keys == tuple(tree.metadata.raw_data)
+            assert stats.headings == sum(1 for _ in tree.iter_all_nodes())
+            assert stats.chunks == len(process_pipeline(tree, max_tokens=100))
+
+    def test_oversized_sections_and_errors(self, tmp_path):
+        from doc2anki.pipeline import ScanTotals, scan_files
+
+        note = tmp_path / "note.md"
+        note.write_text("# A\n\nshort\n\n## B\n\n" + "word " * 300 + "\n")
+        missing = tmp_path / "missing.md"
+
+        totals = ScanTotals()
+        results = list(scan_files([note, missing], max_tokens=100, jobs=1))
+        for stats in results:
+            totals.add(stats)
+
+        assert [s.path for s in results[0].oversized] == [("A", "B")]
+        assert results[0].depth == 2
+        assert results[1].error is not None
+        assert (totals.files, totals.failed, totals.oversized) == (2, 1, 1)
+
+    def test_cli_json(self, tmp_path):
+        import json
+
+        from typer.testing import CliRunner
+
+        from doc2anki.cli import app
+
+        (tmp_path / "a.md").write_text("---\ntitle: T\n---\n# A\n\ntext\n")
+        (tmp_path / "b.org").write_text("* B\nbody\n")
+        result = CliRunner().invoke(app, ["scan", str(tmp_path), "--json", "-j", "1"])
+
+        assert result.exit_code == 0, result.output
+        report = json.loads(result.output)
+        assert [f["format"] for f in report["files"]] == ["markdown", "org"]
+        assert report["files"][0]["frontmatter_keys"] == ["title"]
+        assert report["totals"]["headings"] == 2